@@ -0,0 +1 @@
+"""Benchmark harnesses and local stand-ins for external services."""
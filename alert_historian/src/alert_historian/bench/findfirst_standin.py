@@ -0,0 +1,233 @@
+"""In-process stand-in for the FindFirst endpoints used by FindFirstClient."""
+
+import base64
+import json
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+@dataclass
+class StandinConfig:
+  latency_ms: float = 0.0
+  error_rate: float = 0.0
+  rate_limit_rate: float = 0.0
+  null_rate: float = 0.0
+  token_ttl_seconds: int = 3600
+  username: str = "jsmith"
+  password: str = "test"
+  seed: int = 0
+
+
+def _make_token(exp: float, nonce: int) -> str:
+  def part(obj: dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(obj).encode("utf-8")).decode("ascii").rstrip("=")
+  return f"{part({'alg': 'none'})}.{part({'exp': int(exp), 'jti': nonce})}.standin"
+
+
+class _StandinState:
+  def __init__(self, config: StandinConfig):
+    self.config = config
+    self.lock = threading.Lock()
+    self.rng = random.Random(config.seed)
+    self.tokens: dict[str, float] = {}
+    self.tags: dict[str, int] = {}
+    self.bookmarks: dict[str, dict[str, Any]] = {}
+    self.request_counts: dict[str, int] = {}
+
+  def roll(self, rate: float) -> bool:
+    if rate <= 0:
+      return False
+    with self.lock:
+      return self.rng.random() < rate
+
+  def issue_token(self) -> str:
+    with self.lock:
+      token = _make_token(time.time() + self.config.token_ttl_seconds, len(self.tokens))
+      self.tokens[token] = time.time() + self.config.token_ttl_seconds
+      return token
+
+  def token_valid(self, token: str | None) -> bool:
+    with self.lock:
+      expires_at = self.tokens.get(token or "")
+    return expires_at is not None and expires_at > time.time()
+
+  def expire_tokens(self) -> None:
+    with self.lock:
+      self.tokens.clear()
+
+
+class _Handler(BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"
+  state: _StandinState
+
+  def setup(self) -> None:
+    super().setup()
+    # Headers and body are separate writes; without this, keep-alive requests stall on delayed ACKs.
+    self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+  def log_message(self, format: str, *args: Any) -> None:
+    return
+
+  def _send(self, status: int, body: Any = None, headers: dict[str, str] | None = None,
+      content_type: str = "application/json") -> None:
+    if isinstance(body, bytes):
+      raw = body
+    else:
+      raw = b"" if body is None else json.dumps(body).encode("utf-8")
+    self.send_response(status)
+    self.send_header("Content-Type", content_type)
+    self.send_header("Content-Length", str(len(raw)))
+    for key, value in (headers or {}).items():
+      self.send_header(key, value)
+    self.end_headers()
+    self.wfile.write(raw)
+
+  def _read_json(self) -> Any:
+    length = int(self.headers.get("Content-Length") or 0)
+    raw = self.rfile.read(length) if length else b""
+    return json.loads(raw) if raw else None
+
+  def _authorized(self) -> bool:
+    cookie = SimpleCookie(self.headers.get("Cookie") or "")
+    morsel = cookie.get("findfirst")
+    return self.state.token_valid(morsel.value if morsel else None)
+
+  def _begin(self) -> str:
+    path = self.path.split("?", 1)[0]
+    with self.state.lock:
+      self.state.request_counts[path] = self.state.request_counts.get(path, 0) + 1
+    if self.state.config.latency_ms > 0:
+      time.sleep(self.state.config.latency_ms / 1000.0)
+    return path
+
+  def do_POST(self) -> None:
+    path = self._begin()
+    body = self._read_json()
+    if path == "/user/signin":
+      self._signin()
+    elif not self._authorized():
+      self._send(401, {"error": "unauthorized"})
+    elif path == "/api/tags":
+      self._create_tags(body or [])
+    elif path == "/api/bookmark/addBookmarks":
+      self._add_bookmarks(body or [])
+    else:
+      self._send(404, {"error": "not found"})
+
+  def do_GET(self) -> None:
+    path = self._begin()
+    if not self._authorized():
+      self._send(401, {"error": "unauthorized"})
+    elif path == "/api/tags":
+      with self.state.lock:
+        rows = [{"id": tag_id, "title": title, "bookmarks": []} for title, tag_id in self.state.tags.items()]
+      self._send(200, rows)
+    elif path == "/api/bookmarks/export":
+      self._export()
+    else:
+      self._send(404, {"error": "not found"})
+
+  def _signin(self) -> None:
+    config = self.state.config
+    expected = base64.b64encode(f"{config.username}:{config.password}".encode("utf-8")).decode("ascii")
+    if self.headers.get("Authorization") != f"Basic {expected}":
+      self._send(400, {"error": "bad credentials"})
+      return
+    token = self.state.issue_token()
+    self._send(200, {"refreshToken": "standin"}, headers={"Set-Cookie": f"findfirst={token}; Path=/; HttpOnly"})
+
+  def _create_tags(self, titles: list[str]) -> None:
+    created = []
+    with self.state.lock:
+      for title in titles:
+        if title not in self.state.tags:
+          self.state.tags[title] = len(self.state.tags) + 1
+        created.append({"id": self.state.tags[title], "title": title, "bookmarks": []})
+    self._send(200, created)
+
+  def _add_bookmarks(self, reqs: list[dict[str, Any]]) -> None:
+    config = self.state.config
+    if self.state.roll(config.rate_limit_rate):
+      self._send(429, {"error": "rate limited"})
+      return
+    if self.state.roll(config.error_rate):
+      self._send(503, {"error": "unavailable"})
+      return
+    out: list[dict[str, Any] | None] = []
+    for req in reqs:
+      url = str(req.get("url") or "")
+      if self.state.roll(config.null_rate):
+        out.append(None)
+        continue
+      with self.state.lock:
+        if url in self.state.bookmarks:
+          out.append(None)
+          continue
+        bookmark = {
+            "id": len(self.state.bookmarks) + 1,
+            "title": req.get("title") or url,
+            "url": url,
+            "scrapable": bool(req.get("scrapable")),
+            "tags": [{"id": tag_id} for tag_id in req.get("tagIds") or []],
+        }
+        self.state.bookmarks[url] = bookmark
+      out.append(bookmark)
+    self._send(200, out)
+
+  def _export(self) -> None:
+    # Like FindFirst, the export lists only bookmarks that carry at least one tag.
+    with self.state.lock:
+      rows = [b for b in self.state.bookmarks.values() if b.get("tags")]
+    lines = ["<!DOCTYPE NETSCAPE-Bookmark-file-1>", "<TITLE>FindFirst Bookmarks</TITLE>", "<DL><p>"]
+    lines.extend(f'    <DT><A HREF="{b["url"]}" ADD_DATE=0 LAST_MODIFIED=0>{b["title"]}</A>' for b in rows)
+    lines.append("</DL>")
+    self._send(200, ("\n".join(lines) + "\n").encode("utf-8"), content_type="application/octet-stream")
+
+
+class FindFirstStandin:
+  """Serve the stand-in on an ephemeral localhost port; use as a context manager."""
+
+  def __init__(self, config: StandinConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+    self.state = _StandinState(config or StandinConfig())
+    handler = type("StandinHandler", (_Handler,), {"state": self.state})
+    self._server = ThreadingHTTPServer((host, port), handler)
+    self._server.daemon_threads = True
+    self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+  @property
+  def base_url(self) -> str:
+    host, port = self._server.server_address[:2]
+    return f"http://{host}:{port}"
+
+  @property
+  def bookmarks(self) -> dict[str, dict[str, Any]]:
+    return self.state.bookmarks
+
+  @property
+  def request_counts(self) -> dict[str, int]:
+    return self.state.request_counts
+
+  def expire_tokens(self) -> None:
+    """Invalidate every issued JWT, as if they all expired mid-run."""
+    self.state.expire_tokens()
+
+  def start(self) -> "FindFirstStandin":
+    self._thread.start()
+    return self
+
+  def stop(self) -> None:
+    self._server.shutdown()
+    self._server.server_close()
+    self._thread.join(timeout=5)
+
+  def __enter__(self) -> "FindFirstStandin":
+    return self.start()
+
+  def __exit__(self, *exc: Any) -> None:
+    self.stop()
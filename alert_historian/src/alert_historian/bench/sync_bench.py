@@ -0,0 +1,196 @@
+"""Sync throughput benchmark: drives sync_pending_items against the FindFirst stand-in."""
+
+import math
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from alert_historian.bench.findfirst_standin import FindFirstStandin, StandinConfig
+from alert_historian.config.settings import Settings
+from alert_historian.ingestion.normalize import normalize_item
+from alert_historian.ingestion.schema import CanonicalAlertPayload, RawRef
+from alert_historian.state.store import StateStore
+from alert_historian.sync.engine import sync_pending_items
+from alert_historian.sync.findfirst_client import ClientResponse, FindFirstClient
+
+
+ITEMS_PER_PAYLOAD = 50
+BENCH_TOPICS = ["vector databases", "AI agents", "robotics", "quantum computing", "battery storage"]
+
+
+@dataclass
+class SyncBenchResult:
+  items: int
+  workers: int
+  seed_seconds: float
+  sync_seconds: float
+  items_per_sec: float
+  batch_count: int
+  batch_p50_ms: float
+  batch_p99_ms: float
+  db_write_seconds: float
+  stats: dict[str, int] = field(default_factory=dict)
+
+
+class TimedFindFirstClient(FindFirstClient):
+  def __init__(self, settings: Settings):
+    super().__init__(settings)
+    self.batch_seconds: list[float] = []
+
+  def bulk_add_bookmarks(self, payload: list[dict[str, Any]]) -> ClientResponse:
+    started = time.perf_counter()
+    try:
+      return super().bulk_add_bookmarks(payload)
+    finally:
+      self.batch_seconds.append(time.perf_counter() - started)
+
+
+class TimedStateStore(StateStore):
+  def __init__(self, db_path: Path):
+    super().__init__(db_path)
+    self.write_seconds = 0.0
+
+  def record_sync_attempt(self, *args: Any, **kwargs: Any) -> None:
+    started = time.perf_counter()
+    try:
+      super().record_sync_attempt(*args, **kwargs)
+    finally:
+      self.write_seconds += time.perf_counter() - started
+
+  def record_sync_attempts(self, *args: Any, **kwargs: Any) -> None:
+    started = time.perf_counter()
+    try:
+      super().record_sync_attempts(*args, **kwargs)
+    finally:
+      self.write_seconds += time.perf_counter() - started
+
+  def add_known_urls(self, *args: Any, **kwargs: Any) -> int:
+    started = time.perf_counter()
+    try:
+      return super().add_known_urls(*args, **kwargs)
+    finally:
+      self.write_seconds += time.perf_counter() - started
+
+  def set_checkpoint(self, *args: Any, **kwargs: Any) -> None:
+    started = time.perf_counter()
+    try:
+      super().set_checkpoint(*args, **kwargs)
+    finally:
+      self.write_seconds += time.perf_counter() - started
+
+
+def percentile(values: list[float], q: float) -> float:
+  """Nearest-rank percentile; q in [0, 100]."""
+  if not values:
+    return 0.0
+  ordered = sorted(values)
+  rank = max(1, min(len(ordered), math.ceil(q / 100.0 * len(ordered))))
+  return ordered[rank - 1]
+
+
+def synthetic_payloads(n_items: int) -> Iterator[CanonicalAlertPayload]:
+  received_at = datetime.utcnow()
+  for start in range(0, n_items, ITEMS_PER_PAYLOAD):
+    topic = BENCH_TOPICS[(start // ITEMS_PER_PAYLOAD) % len(BENCH_TOPICS)]
+    items = [
+        normalize_item(
+            url=f"https://bench-{idx % 997}.example.com/story/{idx}",
+            title=f"Story {idx} about {topic}",
+            snippet=f"Synthetic snippet {idx}",
+        )
+        for idx in range(start, min(start + ITEMS_PER_PAYLOAD, n_items))
+    ]
+    yield CanonicalAlertPayload(
+        source="google_alerts_export",
+        source_account="bench",
+        source_message_id=f"<bench-{start}>",
+        received_at=received_at,
+        alert_topic=topic,
+        alert_query_raw=topic,
+        items=items,
+        raw_ref=RawRef(store="json_export", path="bench"),
+    )
+
+
+def bench_settings(base_url: str, workdir: Path, batch_size: int) -> Settings:
+  return Settings(**{
+      "ALERT_HISTORIAN_STATE_DB": workdir / "bench.db",
+      "ALERT_HISTORIAN_FINDFIRST_BASE_URL": base_url,
+      "ALERT_HISTORIAN_FINDFIRST_USERNAME": "jsmith",
+      "ALERT_HISTORIAN_FINDFIRST_PASSWORD": "test",
+      "ALERT_HISTORIAN_FINDFIRST_SESSION_PATH": workdir / "findfirst_session.json",
+      "ALERT_HISTORIAN_SYNC_BATCH_SIZE": batch_size,
+  })
+
+
+def run_sync_benchmark(
+    n_items: int,
+    config: StandinConfig | None = None,
+    *,
+    batch_size: int = 100,
+    workers: int = 1,
+    workdir: Path | None = None,
+) -> SyncBenchResult:
+  """Seed `n_items` pending items into a fresh state DB and time one sync run across `workers` threads."""
+  with tempfile.TemporaryDirectory(prefix="alert-historian-bench-") as tmp:
+    root = Path(workdir or tmp)
+    root.mkdir(parents=True, exist_ok=True)
+    with FindFirstStandin(config) as standin:
+      settings = bench_settings(standin.base_url, root, batch_size)
+      seed_store = StateStore(settings.state_db)
+      try:
+        started = time.perf_counter()
+        seed_store.save_payloads(synthetic_payloads(n_items))
+        seed_seconds = time.perf_counter() - started
+      finally:
+        seed_store.close()
+
+      clients: list[TimedFindFirstClient] = []
+      stores: list[TimedStateStore] = []
+      results: list[dict[str, int]] = []
+      errors: list[BaseException] = []
+
+      def worker(idx: int) -> None:
+        store = TimedStateStore(settings.state_db)
+        client = TimedFindFirstClient(settings)
+        clients.append(client)
+        stores.append(store)
+        try:
+          results.append(sync_pending_items(settings, store, "bench", client=client, worker_id=f"bench-{idx}"))
+        except BaseException as e:
+          errors.append(e)
+        finally:
+          store.close()
+
+      threads = [threading.Thread(target=worker, args=(idx,)) for idx in range(max(1, workers))]
+      started = time.perf_counter()
+      for t in threads:
+        t.start()
+      for t in threads:
+        t.join()
+      sync_seconds = time.perf_counter() - started
+      if errors:
+        raise errors[0]
+
+  stats: Counter[str] = Counter()
+  for r in results:
+    stats.update({k: v for k, v in r.items() if k != "total"})
+  stats["total"] = sum(v for k, v in stats.items() if k != "total")
+  batch_ms = [s * 1000.0 for client in clients for s in client.batch_seconds]
+  return SyncBenchResult(
+      items=n_items,
+      workers=len(threads),
+      seed_seconds=seed_seconds,
+      sync_seconds=sync_seconds,
+      items_per_sec=n_items / sync_seconds if sync_seconds > 0 else 0.0,
+      batch_count=len(batch_ms),
+      batch_p50_ms=percentile(batch_ms, 50),
+      batch_p99_ms=percentile(batch_ms, 99),
+      db_write_seconds=sum(store.write_seconds for store in stores),
+      stats=dict(stats),
+  )
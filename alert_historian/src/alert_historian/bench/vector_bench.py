@@ -0,0 +1,168 @@
+"""
+Vector backend benchmark: build the same synthetic index in ChromaDB and the flat NumPy index, then
+measure startup, query latency and peak RSS for each in a fresh subprocess, so import cost counts.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from alert_historian.bench.sync_bench import BENCH_TOPICS, percentile
+from alert_historian.narrative.local_embeddings import HashingEmbedder
+from alert_historian.state.store import PendingSyncItem
+
+BENCH_DIM = 384
+BENCH_DAYS = 30
+
+
+@dataclass
+class VectorBenchResult:
+  backend: str
+  items: int
+  build_seconds: float
+  startup_ms: float
+  query_p50_ms: float
+  query_p99_ms: float
+  filtered_query_p50_ms: float
+  peak_rss_mb: float
+  disk_mb: float
+
+
+def synthetic_items(n_items: int) -> list[PendingSyncItem]:
+  items = []
+  for idx in range(n_items):
+    topic = BENCH_TOPICS[idx % len(BENCH_TOPICS)]
+    url = f"https://bench-{idx % 997}.example.com/story/{idx}"
+    items.append(PendingSyncItem(
+        item_key=f"bench-{idx}",
+        message_key=f"msg-{idx // 50}",
+        topic=topic,
+        day=f"2026-01-{(idx % BENCH_DAYS) + 1:02d}",
+        url=url,
+        url_normalized=url,
+        title=f"Story {idx} about {topic}",
+        snippet=f"Synthetic snippet {idx} covering {topic} developments, release {idx % 113}",
+        source_domain=f"bench-{idx % 997}.example.com",
+        source_message_id=f"<bench-{idx // 50}>",
+    ))
+  return items
+
+
+def query_texts(n_queries: int) -> list[str]:
+  return [f"latest {BENCH_TOPICS[i % len(BENCH_TOPICS)]} release {i % 113}" for i in range(n_queries)]
+
+
+def _disk_mb(path: Path) -> float:
+  return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / (1024 * 1024)
+
+
+def peak_rss_mb() -> float:
+  # ru_maxrss survives fork+exec, so a child spawned by a large parent would report the parent's peak.
+  try:
+    with open("/proc/self/status", encoding="ascii") as fh:
+      for line in fh:
+        if line.startswith("VmHWM:"):
+          return int(line.split()[1]) / 1024.0
+  except OSError:
+    pass
+  # ru_maxrss is KiB on Linux.
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _store_path(backend: str, root: Path) -> Path:
+  return root / backend
+
+
+def build_index(backend: str, root: Path, items: list[PendingSyncItem], *, dim: int, flat_dtype: str) -> float:
+  from alert_historian.narrative.vector_store import create_vector_store
+
+  embedder = HashingEmbedder(dim=dim)
+  started = time.perf_counter()
+  store = create_vector_store(backend, _store_path(backend, root), embedder, flat_dtype=flat_dtype)
+  try:
+    store.upsert_items(items)
+  finally:
+    store.close()
+  return time.perf_counter() - started
+
+
+def probe(backend: str, root: Path, *, n_queries: int, dim: int, flat_dtype: str) -> dict[str, float]:
+  """Open an existing index and time queries; meant to run in a fresh interpreter."""
+  vectors = HashingEmbedder(dim=dim)(query_texts(n_queries))
+  started = time.perf_counter()
+  from alert_historian.narrative.vector_store import create_vector_store
+
+  store = create_vector_store(backend, _store_path(backend, root), lambda texts: [], flat_dtype=flat_dtype)
+  startup = time.perf_counter() - started
+
+  plain: list[float] = []
+  filtered: list[float] = []
+  for idx, vector in enumerate(vectors):
+    t0 = time.perf_counter()
+    store.query_embedding(vector, n_results=10)
+    plain.append(time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    store.query_embedding(vector, n_results=10, where={"topic": BENCH_TOPICS[idx % len(BENCH_TOPICS)]})
+    filtered.append(time.perf_counter() - t0)
+  store.close()
+  return {
+      "startup_ms": startup * 1000.0,
+      "query_p50_ms": percentile(plain, 50) * 1000.0,
+      "query_p99_ms": percentile(plain, 99) * 1000.0,
+      "filtered_query_p50_ms": percentile(filtered, 50) * 1000.0,
+      "peak_rss_mb": peak_rss_mb(),
+  }
+
+
+def run_vector_benchmark(
+    n_items: int,
+    *,
+    backends: tuple[str, ...] = ("chroma", "flat"),
+    n_queries: int = 200,
+    dim: int = BENCH_DIM,
+    flat_dtype: str = "int8",
+    workdir: Path | None = None,
+) -> list[VectorBenchResult]:
+  items = synthetic_items(n_items)
+  results: list[VectorBenchResult] = []
+  with tempfile.TemporaryDirectory(prefix="alert-historian-vector-bench-") as tmp:
+    root = Path(workdir or tmp)
+    root.mkdir(parents=True, exist_ok=True)
+    for backend in backends:
+      build_seconds = build_index(backend, root, items, dim=dim, flat_dtype=flat_dtype)
+      proc = subprocess.run(
+          [sys.executable, "-m", "alert_historian.bench.vector_bench", backend, str(root),
+           "--queries", str(n_queries), "--dim", str(dim), "--flat-dtype", flat_dtype],
+          check=True, capture_output=True, text=True, env=os.environ.copy())
+      measured = json.loads(proc.stdout.strip().splitlines()[-1])
+      results.append(VectorBenchResult(
+          backend=backend if backend != "flat" else f"flat-{flat_dtype}",
+          items=n_items,
+          build_seconds=build_seconds,
+          disk_mb=_disk_mb(_store_path(backend, root)),
+          **measured,
+      ))
+  return results
+
+
+def main() -> int:
+  parser = argparse.ArgumentParser(description="Probe one built vector index (used by run_vector_benchmark)")
+  parser.add_argument("backend")
+  parser.add_argument("root", type=Path)
+  parser.add_argument("--queries", type=int, default=200)
+  parser.add_argument("--dim", type=int, default=BENCH_DIM)
+  parser.add_argument("--flat-dtype", default="int8")
+  args = parser.parse_args()
+  print(json.dumps(probe(args.backend, args.root, n_queries=args.queries, dim=args.dim, flat_dtype=args.flat_dtype)))
+  return 0
+
+
+if __name__ == "__main__":
+  raise SystemExit(main())
@@ -1,52 +1,89 @@
 import argparse
-from datetime import datetime
+import signal
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
 
 from alert_historian.config.settings import get_settings
-from alert_historian.ingestion.pipeline import (
-    load_canonical_from_artifact,
-    payloads_to_pending_items,
-)
+from alert_historian.daemon import AlertDaemon
 from alert_historian.ingestion.pipeline import ingest
-from alert_historian.narrative.chronicle import (
-    create_openai_llm_client,
-    load_chronicle,
-    update_chronicle,
+from alert_historian.narrative.chronicle import create_openai_llm_client
+from alert_historian.narrative.chronicle_sections import (
+    build_topic_contexts,
+    load_chronicle_sections,
+    update_chronicle_sections,
 )
-from alert_historian.narrative.delta import generate_delta
-from alert_historian.narrative.vector_store import AlertVectorStore
-from alert_historian.reporting.daily_report import build_daily_report
+from alert_historian.narrative.clustering import cluster_items
+from alert_historian.narrative.context_packer import ContextPacker
+from alert_historian.narrative.delta import DELTA_MODES, generate_delta, generate_topic_deltas
+from alert_historian.narrative.embedding_cache import EmbeddingCache
+from alert_historian.narrative.embeddings import create_embedding_fn
+from alert_historian.narrative.llm_cache import LLMResponseCache, cached_llm_client
+from alert_historian.narrative.novelty import NOVELTY_LABELS, score_novelty
+from alert_historian.narrative.partitions import PartitionedVectorStore
+from alert_historian.narrative.rollups import build_rollups, rollup_collection_name, summary_pyramid, upsert_rollups
+from alert_historian.narrative.search import search_history
+from alert_historian.narrative.vector_store import build_topic_queries, collection_name_for_model, create_vector_store
+from alert_historian.orchestrator import run_pipeline
+from alert_historian.reporting.daily_report import build_daily_report, build_range_report, build_reports
+from alert_historian.reporting.render import REPORT_FORMATS, parse_formats
 from alert_historian.state.store import StateStore
 from alert_historian.sync.engine import sync_pending_items
+from alert_historian.sync.findfirst_client import FindFirstClient
+from alert_historian.sync.reconcile import ReconcileReport, reconcile
 
 
-def run_ingest() -> tuple[str, int]:
+def run_ingest() -> tuple[str, list[str]]:
   settings = get_settings()
   store = StateStore(settings.state_db)
   try:
-    run_id, inserted = ingest(settings, store)
-    print(f"[ingest] run_id={run_id} inserted={inserted}")
-    return run_id, inserted
+    run_id, created = ingest(settings, store)
+    print(f"[ingest] run_id={run_id} inserted={len(created)}")
+    return run_id, created
   finally:
     store.close()
 
 
-def run_sync(run_id: str | None = None) -> dict[str, int]:
+def run_sync(run_id: str | None = None, worker_id: str | None = None) -> dict[str, int]:
   settings = get_settings()
   run = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
   store = StateStore(settings.state_db)
   try:
-    stats = sync_pending_items(settings, store, run)
+    stats = sync_pending_items(settings, store, run, worker_id=worker_id)
     print(f"[sync] run_id={run} stats={stats}")
     return stats
   finally:
     store.close()
 
 
+def run_reconcile(requeue: bool = False, show: int = 20) -> ReconcileReport:
+  settings = get_settings()
+  run = "reconcile-" + datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+  store = StateStore(settings.state_db)
+  client = FindFirstClient(settings)
+  try:
+    signin_resp = client.ensure_session()
+    if signin_resp.status_code != 200:
+      raise RuntimeError(f"FindFirst signin failed ({signin_resp.status_code})")
+    report = reconcile(client, store, run, requeue=requeue, sample_size=show)
+    print(
+        f"[reconcile] run_id={run} remote={report.remote_urls} tracked={report.tracked_urls} "
+        f"missing_remote={report.missing_remote} untracked_remote={report.untracked_remote} "
+        f"requeued={report.requeued} index_pruned={report.index_pruned}")
+    for url in report.missing_sample:
+      print(f"  missing: {url}")
+    return report
+  finally:
+    store.close()
+
+
 def run_report(
     run_id: str,
     inserted_count: int,
     sync_stats: dict[str, int],
     narrative_delta: str | None = None,
+    novelty_summary: str | None = None,
 ) -> str:
   settings = get_settings()
   store = StateStore(settings.state_db)
@@ -58,6 +95,8 @@ def run_report(
         inserted_count,
         sync_stats,
         narrative_delta=narrative_delta,
+        novelty_summary=novelty_summary,
+        formats=parse_formats(settings.report_formats),
     )
     print(f"[report] path={path}")
     return str(path)
@@ -65,68 +104,451 @@ def run_report(
     store.close()
 
 
-def _run_narrative_pipeline(
-    settings,
-    run_id: str,
-    today_items: list,
-) -> str:
-  """Run Chronicle update and Narrative Delta generation. Returns delta markdown."""
-  artifact_path = settings.artifacts_dir / f"canonical-{run_id}.json"
-  if not artifact_path.exists():
-    return ""
+def run_reports(
+    since: str | None,
+    until: str | None,
+    workers: int,
+    *,
+    formats: list[str] | None = None,
+    combined: bool = False,
+) -> list[Path]:
+  """Regenerate reports for a day range from the state DB rollups (default: today), per day or as one document."""
+  settings = get_settings()
+  end = date.fromisoformat(until) if until else datetime.utcnow().date()
+  start = date.fromisoformat(since) if since else end
+  if start > end:
+    raise ValueError(f"--since {start} is after --until {end}")
+  formats = parse_formats(formats or settings.report_formats)
+  store = StateStore(settings.state_db)
+  try:
+    if combined:
+      paths = build_range_report(store, settings.reports_dir, start, end, formats=formats)
+    else:
+      paths = build_reports(store, settings.reports_dir, start, end, max_workers=workers, formats=formats)
+  finally:
+    store.close()
+  print(f"[report] files={len(paths)} formats={','.join(formats)} dir={settings.reports_dir}")
+  return paths
 
-  vector_store = AlertVectorStore(
-      persist_path=settings.chroma_path,
+
+def _create_embedding_fn(settings):
+  return create_embedding_fn(
+      settings.embedding_backend,
       api_key=settings.openai_api_key,
-      embedding_model=settings.embedding_model,
+      model=settings.embedding_model,
+      max_batch_tokens=settings.embedding_batch_tokens,
+      concurrency=settings.embedding_concurrency,
+      hashing_dim=settings.hashing_embedding_dim,
+      local_model=settings.local_embedding_model,
   )
-  vector_store.upsert_items(today_items)
 
-  query_text = " ".join(
-      f"{item.title} {item.snippet}" for item in today_items[:10]
-  ).strip() or "recent alerts"
-  past_context = vector_store.query(query_text, n_results=10)
 
-  chronicle_path = settings.chronicle_path
-  llm_client = create_openai_llm_client(
-      api_key=settings.openai_api_key,
-      model=settings.llm_model,
+def _open_vector_store(
+    settings,
+    embedding_fn,
+    embedding_cache: EmbeddingCache,
+    collection_name: str,
+    *,
+    partitioned: bool = False,
+):
+  return create_vector_store(
+      settings.vector_backend,
+      settings.flat_index_path if settings.vector_backend == "flat" else settings.chroma_path,
+      embedding_fn,
+      flat_dtype=settings.flat_index_dtype,
+      partitioning=settings.vector_partitioning if partitioned else "none",
+      embedding_model=embedding_fn.model_id,
+      embedding_cache=embedding_cache,
+      collection_name=collection_name,
   )
 
-  new_context = "\n\n".join(
-      f"[{item.day}] {item.topic}: {item.title}\n{item.snippet[:200]}"
-      for item in today_items[:15]
-  )
-  update_chronicle(chronicle_path, new_context, llm_client)
-  chronicle_content = load_chronicle(chronicle_path)
 
-  return generate_delta(
-      today_items,
-      past_context,
-      chronicle_content,
+def _print_rollup_result(prefix: str, result) -> None:
+  counts = result.counts()
+  print(f"{prefix} rollups " + " ".join(f"{level}={n}" for level, n in counts.items())
+        + f" failed={len(result.failed)}")
+
+
+def _open_rollup_store(settings, embedding_fn, embedding_cache: EmbeddingCache):
+  return _open_vector_store(
+      settings, embedding_fn, embedding_cache, rollup_collection_name(collection_name_for_model(embedding_fn.model_id)))
+
+
+def _update_rollups(
+    settings,
+    state: StateStore,
+    llm_client,
+    packer: ContextPacker,
+    embedding_fn,
+    embedding_cache: EmbeddingCache,
+    topic_queries: dict[str, str],
+) -> dict[str, list[str]]:
+  """
+  Build at most `rollup_max_periods` pending rollups per level, embed them, and return each of today's
+  topics' summary pyramid. A longer backlog is left to later runs or `backfill-rollups`.
+  """
+  today = datetime.utcnow().date()
+  result = build_rollups(
+      state,
       llm_client,
+      today=today,
+      packer=packer,
+      max_workers=settings.narrative_concurrency,
+      max_periods=settings.rollup_max_periods,
+  )
+  _print_rollup_result("[narrative]", result)
+
+  rollup_store = _open_rollup_store(settings, embedding_fn, embedding_cache)
+  try:
+    upsert_rollups(rollup_store, result.created)
+    # Older periods that resemble today's items, beyond the fixed-size pyramid.
+    related = rollup_store.query_many(topic_queries, n_results=settings.rollup_related_results)
+  finally:
+    rollup_store.close()
+
+  summaries: dict[str, list[str]] = {}
+  for topic in topic_queries:
+    pyramid = summary_pyramid(state, topic, today=today)
+    extra = [
+        f"- [{r['metadata'].get('level')} {r['metadata'].get('period')}] {r['document']}"
+        for r in related.get(topic, [])
+    ]
+    summaries[topic] = [entry for entry in extra if entry not in pyramid] + pyramid
+  return summaries
+
+
+def _run_narrative_pipeline(
+    settings,
+    run_id: str,
+    today_items: list,
+    *,
+    refresh_llm_cache: bool = False,
+    vector_store=None,
+) -> tuple[str, str | None]:
+  """
+  Run Chronicle update and Narrative Delta generation for topics with something new in `today_items`
+  (the items this run created). Returns (delta markdown, novelty summary markdown or None when gating is off).
+  An open item `vector_store` (as `serve` keeps) is used and left open; otherwise one is opened for the run.
+  """
+  embedding_cache = EmbeddingCache(settings.embedding_cache_path)
+  llm_cache = LLMResponseCache(settings.llm_cache_path, max_bytes=settings.llm_cache_max_mb * 1024 * 1024)
+  state = StateStore(settings.state_db)
+  packer = ContextPacker.for_model(settings.llm_model, settings.llm_prompt_budget_tokens)
+  try:
+    embedding_fn = _create_embedding_fn(settings)
+    llm_client = cached_llm_client(
+        create_openai_llm_client(api_key=settings.openai_api_key, model=settings.llm_model),
+        llm_cache,
+        settings.llm_model,
+        bypass=settings.llm_cache_bypass or refresh_llm_cache,
+    )
+
+    own_vector_store = vector_store is None
+    if own_vector_store:
+      vector_store = _open_vector_store(
+          settings, embedding_fn, embedding_cache, collection_name_for_model(embedding_fn.model_id), partitioned=True)
+    try:
+      today = datetime.utcnow().date()
+      window_days = settings.retrieval_window_days
+      window_start = (today - timedelta(days=window_days)).isoformat() if window_days > 0 else None
+      novelty = None
+      narrative_items = today_items
+      if settings.novelty_gating:
+        # Score against what was stored before today's items are added, within the retrieval window
+        # (which also keeps the lookup to the partitions that window covers).
+        novelty = score_novelty(
+            today_items,
+            vector_store.nearest_distances(today_items, start_day=window_start),
+            redundant_below=settings.novelty_redundant_distance,
+            new_above=settings.novelty_new_distance,
+        )
+        narrative_items = novelty.filter_items(today_items)
+        labels = list(novelty.item_labels.values())
+        print("[narrative] novelty " + " ".join(f"{label}={labels.count(label)}" for label in NOVELTY_LABELS)
+              + f" skipped_topics={len(novelty.skipped_topics)}")
+      vector_store.upsert_items(today_items)
+      print(f"[narrative] embedding cache hits={vector_store.cache_hits} misses={vector_store.cache_misses}")
+      if isinstance(vector_store, PartitionedVectorStore):
+        compacted = vector_store.compact(
+            today=today,
+            keep_months=settings.vector_compact_after_months,
+            representatives_per_topic=settings.vector_representatives_per_topic,
+        )
+        for key, (before, after) in compacted.items():
+          print(f"[narrative] compacted vector partition {key}: {before} -> {after} items")
+
+      clusters = None
+      if settings.story_clustering and narrative_items:
+        # Cache hits: the upsert above just embedded these items.
+        clusters = cluster_items(
+            narrative_items, vector_store.embed_items(narrative_items), max_distance=settings.story_cluster_distance)
+        print(f"[narrative] story clusters={len(clusters)} items={len(narrative_items)}")
+      topic_queries = build_topic_queries(narrative_items)
+      past_context = vector_store.query_many(
+          topic_queries,
+          n_results=5,
+          exclude_ids={item.item_key for item in today_items},
+          start_day=window_start,
+          recency_half_life_days=settings.retrieval_recency_half_life_days or None,
+          today=today,
+          overfetch=settings.retrieval_overfetch,
+      )
+    finally:
+      if own_vector_store:
+        vector_store.close()
+
+    # Rollups cover closed periods, so they are brought up to date even when today has nothing new.
+    summaries: dict[str, list[str]] = {}
+    if settings.rollups_enabled:
+      summaries = _update_rollups(settings, state, llm_client, packer, embedding_fn, embedding_cache, topic_queries)
+
+    novelty_summary = novelty.markdown() if novelty else None
+    if not narrative_items:
+      print("[narrative] no new or continuing items; skipping Chronicle and Delta")
+      return "", novelty_summary
+
+    chronicle_path = settings.chronicle_path
+    topic_contexts = build_topic_contexts(narrative_items, packer=packer, clusters=clusters)
+    chronicle_update = update_chronicle_sections(
+        chronicle_path,
+        topic_contexts,
+        llm_client,
+        max_workers=settings.narrative_concurrency,
+        packer=packer,
+        summaries=summaries,
+    )
+    print(f"[narrative] chronicle sections updated={len(chronicle_update.updated_topics)} "
+          f"failed={len(chronicle_update.failed_topics)}")
+    for topic, reason in sorted(chronicle_update.failed_topics.items()):
+      print(f"[narrative] chronicle section {topic!r} not updated: {reason}")
+    # Only today's topics are relevant to the Delta, and the full Chronicle may not fit the prompt.
+    chronicle_content = load_chronicle_sections(chronicle_path, list(topic_contexts))
+
+    if settings.narrative_delta_mode not in DELTA_MODES:
+      raise ValueError(f"Unknown narrative delta mode {settings.narrative_delta_mode!r}; expected one of {DELTA_MODES}")
+    if settings.narrative_delta_mode == "per-topic":
+      delta = generate_topic_deltas(
+          narrative_items,
+          past_context,
+          chronicle_content,
+          llm_client,
+          max_workers=settings.narrative_concurrency,
+          packer=packer,
+          summaries=summaries,
+          clusters=clusters,
+      )
+    else:
+      delta = generate_delta(
+          narrative_items,
+          past_context,
+          chronicle_content,
+          llm_client,
+          packer=packer,
+          summaries=summaries,
+          clusters=clusters,
+      )
+    return delta, novelty_summary
+  finally:
+    for call in packer.usage:
+      print(f"[narrative] llm call {call.label}: prompt_tokens={call.prompt_tokens} "
+            f"completion_tokens={call.completion_tokens} seconds={call.seconds:.2f}")
+    totals = packer.usage_totals()
+    print(f"[narrative] llm usage calls={totals['calls']} prompt_tokens={totals['prompt_tokens']} "
+          f"completion_tokens={totals['completion_tokens']} budget_per_call={packer.budget_tokens}")
+    print(f"[narrative] llm cache hits={llm_cache.hits} misses={llm_cache.misses}")
+    state.close()
+    llm_cache.close()
+    embedding_cache.close()
+
+
+def run_pipelined(run_id: str | None = None, *, embed: bool = False):
+  """Ingest and sync as concurrent stages (see `alert_historian.orchestrator`); with `embed`, also fill the embedding cache."""
+  settings = get_settings()
+  result = run_pipeline(
+      settings,
+      run_id,
+      embedding_fn=_create_embedding_fn(settings) if embed else None,
+      queue_size=settings.pipeline_queue_size,
   )
+  print(f"[ingest] run_id={result.run_id} inserted={result.inserted}")
+  print(f"[sync] run_id={result.run_id} stats={result.sync_stats}")
+  for stage in result.stages:
+    print(f"[pipeline] stage={stage.name} processed={stage.processed} busy_s={stage.busy_seconds:.2f}"
+          + (f" {stage.note}" if stage.note else ""))
+  print(f"[pipeline] seconds={result.seconds:.2f} queue_peaks="
+        + ",".join(f"{name}={peak}" for name, peak in result.queue_peaks.items()))
+  return result
 
 
-def run_once(no_narrative: bool = False) -> int:
-  run_id, inserted = run_ingest()
-  stats = run_sync(run_id)
+def run_once(no_narrative: bool = False, refresh_llm_cache: bool = False, sequential: bool = False) -> int:
+  settings = get_settings()
+  narrative = not no_narrative and bool(settings.openai_api_key)
+  if settings.pipelined_run_once and not sequential:
+    result = run_pipelined(embed=narrative)
+    run_id, inserted, stats = result.run_id, result.inserted, result.sync_stats
+  else:
+    run_id, created = run_ingest()
+    inserted = len(created)
+    stats = run_sync(run_id)
 
   narrative_delta: str | None = None
-  if not no_narrative:
-    settings = get_settings()
-    if settings.openai_api_key:
-      artifact_path = settings.artifacts_dir / f"canonical-{run_id}.json"
-      if artifact_path.exists():
-        payloads = load_canonical_from_artifact(artifact_path)
-        today_items = payloads_to_pending_items(payloads)
-        if today_items:
-          try:
-            narrative_delta = _run_narrative_pipeline(settings, run_id, today_items)
-          except Exception as e:
-            print(f"[narrative] skipped: {e}")
-
-  run_report(run_id, inserted, stats, narrative_delta=narrative_delta)
+  novelty_summary: str | None = None
+  if narrative and inserted:
+    store = StateStore(settings.state_db)
+    try:
+      today_items = store.items_first_seen_in_run(run_id)
+    finally:
+      store.close()
+    try:
+      narrative_delta, novelty_summary = _run_narrative_pipeline(
+          settings, run_id, today_items, refresh_llm_cache=refresh_llm_cache)
+    except Exception as e:
+      print(f"[narrative] skipped: {e}")
+
+  run_report(run_id, inserted, stats, narrative_delta=narrative_delta, novelty_summary=novelty_summary)
+  return 0
+
+
+def run_backfill_rollups(max_periods: int | None = None, refresh_llm_cache: bool = False) -> int:
+  """
+  Summarize the whole rollup backlog (or `max_periods` per level) outside the narrative run, e.g. after
+  upgrading a store with months of history; each run-once or serve cycle only builds a few.
+  """
+  settings = get_settings()
+  if not settings.openai_api_key:
+    raise ValueError("rollups are LLM summaries; set ALERT_HISTORIAN_OPENAI_API_KEY")
+  embedding_cache = EmbeddingCache(settings.embedding_cache_path)
+  llm_cache = LLMResponseCache(settings.llm_cache_path, max_bytes=settings.llm_cache_max_mb * 1024 * 1024)
+  state = StateStore(settings.state_db)
+  try:
+    embedding_fn = _create_embedding_fn(settings)
+    llm_client = cached_llm_client(
+        create_openai_llm_client(api_key=settings.openai_api_key, model=settings.llm_model),
+        llm_cache,
+        settings.llm_model,
+        bypass=settings.llm_cache_bypass or refresh_llm_cache,
+    )
+    result = build_rollups(
+        state,
+        llm_client,
+        today=datetime.utcnow().date(),
+        packer=ContextPacker.for_model(settings.llm_model, settings.llm_prompt_budget_tokens),
+        max_workers=settings.narrative_concurrency,
+        max_periods=max_periods,
+    )
+    _print_rollup_result("[backfill-rollups]", result)
+    rollup_store = _open_rollup_store(settings, embedding_fn, embedding_cache)
+    try:
+      upsert_rollups(rollup_store, result.created)
+    finally:
+      rollup_store.close()
+  finally:
+    state.close()
+    llm_cache.close()
+    embedding_cache.close()
+  return 1 if result.failed else 0
+
+
+def run_serve(no_narrative: bool = False, refresh_llm_cache: bool = False) -> int:
+  """Watch the IMAP folder with IDLE and process new alert mail as it arrives, until SIGINT/SIGTERM."""
+  settings = get_settings()
+  if settings.input_mode.lower() != "imap":
+    raise ValueError("serve watches an IMAP folder; set ALERT_HISTORIAN_INPUT_MODE=imap")
+  stop = threading.Event()
+  # Opened on first use and kept for the life of the process (chromadb is slow to import and open).
+  warm: dict = {}
+
+  def narrate(run_id: str, items: list) -> tuple[str, str | None]:
+    if "vector_store" not in warm:
+      embedding_fn = _create_embedding_fn(settings)
+      warm["embedding_cache"] = EmbeddingCache(settings.embedding_cache_path)
+      warm["vector_store"] = _open_vector_store(
+          settings, embedding_fn, warm["embedding_cache"], collection_name_for_model(embedding_fn.model_id),
+          partitioned=True)
+    return _run_narrative_pipeline(
+        settings, run_id, items, refresh_llm_cache=refresh_llm_cache, vector_store=warm["vector_store"])
+
+  narrative = narrate if settings.openai_api_key and not no_narrative else None
+  previous = {sig: signal.signal(sig, lambda *_: stop.set()) for sig in (signal.SIGINT, signal.SIGTERM)}
+  try:
+    AlertDaemon(settings, narrative=narrative, stop=stop).run()
+  finally:
+    for sig, handler in previous.items():
+      signal.signal(sig, handler)
+    if "vector_store" in warm:
+      warm["vector_store"].close()
+      warm["embedding_cache"].close()
+  return 0
+
+
+def run_search(args: argparse.Namespace) -> int:
+  settings = get_settings()
+  store = StateStore(settings.state_db)
+  embedding_cache = None
+  vector_store = None
+  try:
+    if args.hybrid:
+      embedding_fn = _create_embedding_fn(settings)
+      embedding_cache = EmbeddingCache(settings.embedding_cache_path)
+      vector_store = _open_vector_store(
+          settings, embedding_fn, embedding_cache, collection_name_for_model(embedding_fn.model_id), partitioned=True)
+    started = time.perf_counter()
+    hits = search_history(
+        store,
+        " ".join(args.query),
+        vector_store=vector_store,
+        topic=args.topic,
+        start_day=args.since,
+        end_day=args.until,
+        limit=args.limit,
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+  finally:
+    if vector_store is not None:
+      vector_store.close()
+    if embedding_cache is not None:
+      embedding_cache.close()
+    store.close()
+
+  for hit in hits:
+    ranks = " ".join(f"{name}#{rank}" for name, rank in sorted(hit.ranks.items()))
+    print(f"{hit.score:9.3g}  {hit.item.day}  [{hit.item.topic}] {hit.item.title}  ({ranks})\n          {hit.item.url}")
+  print(f"[search] hits={len(hits)} mode={'hybrid' if args.hybrid else 'bm25'} ms={elapsed_ms:.1f}")
+  return 0
+
+
+def run_bench_sync(args: argparse.Namespace) -> int:
+  from alert_historian.bench.findfirst_standin import StandinConfig
+  from alert_historian.bench.sync_bench import run_sync_benchmark
+
+  config = StandinConfig(
+      latency_ms=args.latency_ms,
+      error_rate=args.error_rate,
+      rate_limit_rate=args.rate_limit_rate,
+      null_rate=args.null_rate,
+      seed=args.seed,
+  )
+  for n_items in args.items:
+    result = run_sync_benchmark(n_items, config, batch_size=args.batch_size, workers=args.workers)
+    print(
+        f"[bench-sync] items={result.items} workers={result.workers} seed_s={result.seed_seconds:.2f} sync_s={result.sync_seconds:.2f} "
+        f"items_per_sec={result.items_per_sec:.1f} batches={result.batch_count} "
+        f"batch_p50_ms={result.batch_p50_ms:.1f} batch_p99_ms={result.batch_p99_ms:.1f} "
+        f"db_write_s={result.db_write_seconds:.2f} stats={result.stats}")
+  return 0
+
+
+def run_bench_vectors(args: argparse.Namespace) -> int:
+  from alert_historian.bench.vector_bench import run_vector_benchmark
+
+  for n_items in args.items:
+    for result in run_vector_benchmark(
+        n_items, backends=tuple(args.backends), n_queries=args.queries, dim=args.dim, flat_dtype=args.flat_dtype):
+      print(
+          f"[bench-vectors] backend={result.backend} items={result.items} build_s={result.build_seconds:.2f} "
+          f"startup_ms={result.startup_ms:.1f} query_p50_ms={result.query_p50_ms:.2f} "
+          f"query_p99_ms={result.query_p99_ms:.2f} filtered_p50_ms={result.filtered_query_p50_ms:.2f} "
+          f"peak_rss_mb={result.peak_rss_mb:.0f} disk_mb={result.disk_mb:.1f}")
   return 0
 
 
@@ -134,27 +556,104 @@ def main() -> int:
   parser = argparse.ArgumentParser(prog="alert_historian")
   sub = parser.add_subparsers(dest="command")
   sub.add_parser("ingest")
-  sub.add_parser("sync")
-  sub.add_parser("report")
+  sync_parser = sub.add_parser("sync")
+  sync_parser.add_argument(
+      "--worker-id",
+      default=None,
+      help="Lease owner name when several sync processes share one state DB (default: host:pid)",
+  )
+  report_parser = sub.add_parser("report", help="Write daily reports from the per-day rollups")
+  report_parser.add_argument("--since", default=None, help="First day to (re)generate (YYYY-MM-DD; default: --until)")
+  report_parser.add_argument("--until", default=None, help="Last day to (re)generate (YYYY-MM-DD; default: today)")
+  report_parser.add_argument("--workers", type=int, default=4, help="Reports written in parallel")
+  report_parser.add_argument("--format", nargs="+", choices=list(REPORT_FORMATS), default=None,
+      help="Output formats (default: ALERT_HISTORIAN_REPORT_FORMATS)")
+  report_parser.add_argument("--combined", action="store_true",
+      help="Write one report covering the whole range instead of one per day")
+  reconcile_parser = sub.add_parser(
+      "reconcile", help="Diff synced items against the FindFirst bookmark export in one pass")
+  reconcile_parser.add_argument(
+      "--requeue", action="store_true", help="Return items whose bookmark is gone from FindFirst to the pending pool")
+  reconcile_parser.add_argument("--show", type=int, default=20, help="Print up to N missing URLs")
+  backfill_parser = sub.add_parser(
+      "backfill-rollups", help="Summarize every closed period still missing a rollup (run-once builds only a few)")
+  backfill_parser.add_argument(
+      "--max-periods", type=int, default=None, help="At most N LLM summaries per level (default: no limit)")
+  backfill_parser.add_argument(
+      "--refresh-llm-cache", action="store_true", help="Send every rollup prompt to the LLM, bypassing the cache")
   run_once_parser = sub.add_parser("run-once")
   run_once_parser.add_argument(
       "--no-narrative",
       action="store_true",
       help="Skip narrative engine (Chronicle, Delta) even when API key is set",
   )
+  run_once_parser.add_argument(
+      "--refresh-llm-cache",
+      action="store_true",
+      help="Send every narrative prompt to the LLM instead of answering repeats from the response cache",
+  )
+  run_once_parser.add_argument(
+      "--sequential",
+      action="store_true",
+      help="Run ingest, sync and narrative one after another instead of as overlapping pipeline stages",
+  )
+  serve_parser = sub.add_parser("serve", help="Process new alert mail as it arrives (IMAP IDLE) until interrupted")
+  serve_parser.add_argument("--no-narrative", action="store_true", help="Skip narrative engine even when API key is set")
+  serve_parser.add_argument(
+      "--refresh-llm-cache", action="store_true", help="Send every narrative prompt to the LLM, bypassing the cache")
+  search_parser = sub.add_parser("search", help="Full-text search of stored items, optionally fused with vector search")
+  search_parser.add_argument("query", nargs="+", help="Words that must all match; end a word with * for prefixes")
+  search_parser.add_argument("--topic", default=None, help="Only items of this alert topic")
+  search_parser.add_argument("--since", default=None, help="First day to include (YYYY-MM-DD)")
+  search_parser.add_argument("--until", default=None, help="Last day to include (YYYY-MM-DD)")
+  search_parser.add_argument("--limit", type=int, default=20)
+  search_parser.add_argument(
+      "--hybrid", action="store_true", help="Fuse BM25 hits with vector nearest neighbours (reciprocal rank fusion)")
+  bench_parser = sub.add_parser("bench-sync", help="Measure sync throughput against a local FindFirst stand-in")
+  bench_parser.add_argument("--items", type=int, nargs="+", default=[10_000],
+      help="Item counts to benchmark, e.g. --items 10000 100000 1000000")
+  bench_parser.add_argument("--batch-size", type=int, default=100)
+  bench_parser.add_argument("--workers", type=int, default=1, help="Parallel sync workers sharing the state DB")
+  bench_parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per stand-in request")
+  bench_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of bulk calls answered with 503")
+  bench_parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+      help="Fraction of bulk calls answered with 429")
+  bench_parser.add_argument("--null-rate", type=float, default=0.0, help="Fraction of bulk entries returned as null")
+  bench_parser.add_argument("--seed", type=int, default=0)
+  vector_bench_parser = sub.add_parser(
+      "bench-vectors", help="Compare the Chroma and flat NumPy vector backends on a synthetic index")
+  vector_bench_parser.add_argument("--items", type=int, nargs="+", default=[10_000])
+  vector_bench_parser.add_argument("--backends", nargs="+", choices=["chroma", "flat"], default=["chroma", "flat"])
+  vector_bench_parser.add_argument("--queries", type=int, default=200)
+  vector_bench_parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (hashing embedder)")
+  vector_bench_parser.add_argument("--flat-dtype", choices=["int8", "float16"], default="int8")
   args = parser.parse_args()
 
   if args.command == "ingest":
     run_ingest()
     return 0
   if args.command == "sync":
-    run_sync()
+    run_sync(worker_id=args.worker_id)
+    return 0
+  if args.command == "reconcile":
+    run_reconcile(requeue=args.requeue, show=args.show)
     return 0
   if args.command == "report":
-    run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    run_report(run_id, inserted_count=0, sync_stats={})
+    run_reports(args.since, args.until, args.workers, formats=args.format, combined=args.combined)
     return 0
+  if args.command == "backfill-rollups":
+    return run_backfill_rollups(max_periods=args.max_periods, refresh_llm_cache=args.refresh_llm_cache)
+  if args.command == "serve":
+    return run_serve(no_narrative=args.no_narrative, refresh_llm_cache=args.refresh_llm_cache)
+  if args.command == "search":
+    return run_search(args)
+  if args.command == "bench-sync":
+    return run_bench_sync(args)
+  if args.command == "bench-vectors":
+    return run_bench_vectors(args)
   if args.command in ("run-once", None):
     no_narrative = getattr(args, "no_narrative", False)
-    return run_once(no_narrative=no_narrative)
+    refresh_llm_cache = getattr(args, "refresh_llm_cache", False)
+    sequential = getattr(args, "sequential", False)
+    return run_once(no_narrative=no_narrative, refresh_llm_cache=refresh_llm_cache, sequential=sequential)
   return 0
@@ -15,6 +15,7 @@ class Settings(BaseSettings):
   state_db: Path = Field(default=Path("./state/alert_historian.db"), alias="ALERT_HISTORIAN_STATE_DB")
   artifacts_dir: Path = Field(default=Path("./artifacts"), alias="ALERT_HISTORIAN_ARTIFACTS_DIR")
   reports_dir: Path = Field(default=Path("./reports/daily"), alias="ALERT_HISTORIAN_REPORTS_DIR")
+  report_formats: str = Field(default="md", alias="ALERT_HISTORIAN_REPORT_FORMATS")
 
   input_mode: str = Field(default="json", alias="ALERT_HISTORIAN_INPUT_MODE")
   json_input: Path = Field(default=Path("./sample/alerts.json"), alias="ALERT_HISTORIAN_JSON_INPUT")
@@ -25,6 +26,9 @@ class Settings(BaseSettings):
   imap_password: str = Field(default="", alias="ALERT_HISTORIAN_IMAP_PASSWORD")
   imap_folder: str = Field(default="INBOX", alias="ALERT_HISTORIAN_IMAP_FOLDER")
   imap_since_uid: int = Field(default=0, alias="ALERT_HISTORIAN_IMAP_SINCE_UID")
+  serve_idle_seconds: int = Field(default=1500, alias="ALERT_HISTORIAN_SERVE_IDLE_SECONDS")
+  serve_poll_seconds: int = Field(default=60, alias="ALERT_HISTORIAN_SERVE_POLL_SECONDS")
+  serve_reconnect_max_seconds: int = Field(default=300, alias="ALERT_HISTORIAN_SERVE_RECONNECT_MAX_SECONDS")
 
   alert_list_id: str = Field(default="alerts.google.com", alias="ALERT_HISTORIAN_ALERT_LIST_ID")
   alert_sender: str = Field(default="googlealerts-noreply@google.com", alias="ALERT_HISTORIAN_ALERT_SENDER")
@@ -32,15 +36,53 @@ class Settings(BaseSettings):
   findfirst_base_url: str = Field(default="http://localhost:9000", alias="ALERT_HISTORIAN_FINDFIRST_BASE_URL")
   findfirst_username: str = Field(default="jsmith", alias="ALERT_HISTORIAN_FINDFIRST_USERNAME")
   findfirst_password: str = Field(default="test", alias="ALERT_HISTORIAN_FINDFIRST_PASSWORD")
+  findfirst_session_path: Path | None = Field(
+      default=Path("./state/findfirst_session.json"), alias="ALERT_HISTORIAN_FINDFIRST_SESSION_PATH")
 
   sync_batch_size: int = Field(default=100, alias="ALERT_HISTORIAN_SYNC_BATCH_SIZE")
   use_domain_tags: bool = Field(default=True, alias="ALERT_HISTORIAN_USE_DOMAIN_TAGS")
+  sync_worker_id: str = Field(default="", alias="ALERT_HISTORIAN_SYNC_WORKER_ID")
+  sync_lease_seconds: int = Field(default=300, alias="ALERT_HISTORIAN_SYNC_LEASE_SECONDS")
+  sync_claim_batches: int = Field(default=5, alias="ALERT_HISTORIAN_SYNC_CLAIM_BATCHES")
+  url_index_max_age_hours: int = Field(default=24, alias="ALERT_HISTORIAN_URL_INDEX_MAX_AGE_HOURS")
+  pipelined_run_once: bool = Field(default=True, alias="ALERT_HISTORIAN_PIPELINED_RUN_ONCE")
+  pipeline_queue_size: int = Field(default=64, alias="ALERT_HISTORIAN_PIPELINE_QUEUE_SIZE")
 
+  vector_backend: str = Field(default="chroma", alias="ALERT_HISTORIAN_VECTOR_BACKEND")
   chroma_path: Path = Field(default=Path("./artifacts/chroma"), alias="ALERT_HISTORIAN_CHROMA_PATH")
+  flat_index_path: Path = Field(default=Path("./artifacts/flat_index"), alias="ALERT_HISTORIAN_FLAT_INDEX_PATH")
+  flat_index_dtype: str = Field(default="int8", alias="ALERT_HISTORIAN_FLAT_INDEX_DTYPE")
+  vector_partitioning: str = Field(default="month", alias="ALERT_HISTORIAN_VECTOR_PARTITIONING")
+  vector_compact_after_months: int = Field(default=12, alias="ALERT_HISTORIAN_VECTOR_COMPACT_AFTER_MONTHS")
+  vector_representatives_per_topic: int = Field(default=20, alias="ALERT_HISTORIAN_VECTOR_REPRESENTATIVES_PER_TOPIC")
+  embedding_backend: str = Field(default="openai", alias="ALERT_HISTORIAN_EMBEDDING_BACKEND")
   embedding_model: str = Field(default="text-embedding-3-small", alias="ALERT_HISTORIAN_EMBEDDING_MODEL")
+  embedding_cache_path: Path = Field(
+      default=Path("./artifacts/embedding_cache.db"), alias="ALERT_HISTORIAN_EMBEDDING_CACHE_PATH")
+  embedding_batch_tokens: int = Field(default=100_000, alias="ALERT_HISTORIAN_EMBEDDING_BATCH_TOKENS")
+  embedding_concurrency: int = Field(default=4, alias="ALERT_HISTORIAN_EMBEDDING_CONCURRENCY")
+  hashing_embedding_dim: int = Field(default=512, alias="ALERT_HISTORIAN_HASHING_EMBEDDING_DIM")
+  local_embedding_model: str = Field(default="all-MiniLM-L6-v2", alias="ALERT_HISTORIAN_LOCAL_EMBEDDING_MODEL")
   openai_api_key: str = Field(default="", alias="ALERT_HISTORIAN_OPENAI_API_KEY")
   llm_model: str = Field(default="gpt-4o-mini", alias="ALERT_HISTORIAN_LLM_MODEL")
   chronicle_path: Path = Field(default=Path("./artifacts/chronicle.md"), alias="ALERT_HISTORIAN_CHRONICLE_PATH")
+  llm_prompt_budget_tokens: int = Field(default=8_000, alias="ALERT_HISTORIAN_LLM_PROMPT_BUDGET_TOKENS")
+  llm_cache_path: Path = Field(default=Path("./artifacts/llm_cache.db"), alias="ALERT_HISTORIAN_LLM_CACHE_PATH")
+  llm_cache_max_mb: int = Field(default=64, alias="ALERT_HISTORIAN_LLM_CACHE_MAX_MB")
+  llm_cache_bypass: bool = Field(default=False, alias="ALERT_HISTORIAN_LLM_CACHE_BYPASS")
+  narrative_concurrency: int = Field(default=4, alias="ALERT_HISTORIAN_NARRATIVE_CONCURRENCY")
+  retrieval_window_days: int = Field(default=365, alias="ALERT_HISTORIAN_RETRIEVAL_WINDOW_DAYS")
+  retrieval_recency_half_life_days: float = Field(default=60.0, alias="ALERT_HISTORIAN_RETRIEVAL_RECENCY_HALF_LIFE_DAYS")
+  retrieval_overfetch: int = Field(default=4, alias="ALERT_HISTORIAN_RETRIEVAL_OVERFETCH")
+  novelty_gating: bool = Field(default=True, alias="ALERT_HISTORIAN_NOVELTY_GATING")
+  novelty_redundant_distance: float = Field(default=0.08, alias="ALERT_HISTORIAN_NOVELTY_REDUNDANT_DISTANCE")
+  novelty_new_distance: float = Field(default=0.35, alias="ALERT_HISTORIAN_NOVELTY_NEW_DISTANCE")
+  story_clustering: bool = Field(default=True, alias="ALERT_HISTORIAN_STORY_CLUSTERING")
+  story_cluster_distance: float = Field(default=0.25, alias="ALERT_HISTORIAN_STORY_CLUSTER_DISTANCE")
+  rollups_enabled: bool = Field(default=True, alias="ALERT_HISTORIAN_ROLLUPS_ENABLED")
+  rollup_max_periods: int = Field(default=12, alias="ALERT_HISTORIAN_ROLLUP_MAX_PERIODS")
+  rollup_related_results: int = Field(default=3, alias="ALERT_HISTORIAN_ROLLUP_RELATED_RESULTS")
+  narrative_delta_mode: str = Field(default="per-topic", alias="ALERT_HISTORIAN_NARRATIVE_DELTA_MODE")
 
 
 @lru_cache
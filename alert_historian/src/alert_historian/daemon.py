@@ -0,0 +1,143 @@
+"""
+`serve`: a long-running process that keeps the IMAP connection, state DB, FindFirst session and vector
+store open and waits for alert mail with IMAP IDLE. Each wake-up fetches the messages after the last
+UID it has seen and takes them through ingest, sync, the optional narrative step and the daily
+report as one run, so new alerts land within seconds instead of at the next cron tick. The daily
+report covers every cycle of the day: each cycle's narrative sections are stored in the state DB
+and the report is rebuilt from them and the day's rollups.
+
+Connection errors (including a failed cycle) close the IMAP connection and reconnect after an
+exponential backoff; the first cycle after (re)connecting also drains items left pending. Setting
+`stop` (SIGINT/SIGTERM in the CLI) lets the current cycle finish, leaves IDLE and logs out.
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from alert_historian.config.settings import Settings
+from alert_historian.ingestion.imap_adapter import ImapMailbox
+from alert_historian.ingestion.pipeline import ArtifactWriter
+from alert_historian.reporting.daily_report import DELTA_SECTION, NOVELTY_SECTION, build_day_report
+from alert_historian.reporting.render import parse_formats
+from alert_historian.state.store import PendingSyncItem, StateStore
+from alert_historian.sync.engine import SyncSession
+from alert_historian.sync.findfirst_client import FindFirstClient
+
+RECONNECT_BASE_SECONDS = 1.0
+
+NarrativeFn = Callable[[str, list[PendingSyncItem]], tuple[str | None, str | None]]
+
+
+@dataclass
+class CycleResult:
+  run_id: str
+  messages: int
+  inserted: int
+  sync_stats: dict[str, int]
+  report: str | None = None
+
+
+class AlertDaemon:
+  def __init__(
+      self,
+      settings: Settings,
+      *,
+      narrative: NarrativeFn | None = None,
+      stop: threading.Event | None = None,
+      mailbox_factory: Callable[[Settings], ImapMailbox] = ImapMailbox.connect,
+      client: FindFirstClient | None = None,
+  ):
+    self.settings = settings
+    self.narrative = narrative
+    self.stop = stop or threading.Event()
+    self.mailbox_factory = mailbox_factory
+    self.client = client
+    self.last_uid = 0
+    self.last_cycle: CycleResult | None = None
+
+  def run(self) -> None:
+    """Serve until `stop` is set."""
+    settings = self.settings
+    store = StateStore(settings.state_db)
+    self.client = self.client or FindFirstClient(settings)
+    mailbox: ImapMailbox | None = None
+    failures = 0
+    try:
+      while not self.stop.is_set():
+        try:
+          catch_up = mailbox is None
+          if mailbox is None:
+            mailbox = self.mailbox_factory(settings)
+            print(f"[serve] connected to {settings.imap_folder} idle={mailbox.supports_idle}")
+          self.cycle(store, mailbox, drain=catch_up)
+          failures = 0
+          self._wait_for_mail(mailbox)
+        except Exception as e:
+          failures += 1
+          delay = min(settings.serve_reconnect_max_seconds, RECONNECT_BASE_SECONDS * 2 ** (failures - 1))
+          print(f"[serve] {type(e).__name__}: {e}; reconnecting in {delay:.0f}s")
+          if mailbox is not None:
+            mailbox.close()
+            mailbox = None
+          self.stop.wait(delay)
+    finally:
+      if mailbox is not None:
+        mailbox.close()
+      store.close()
+      print("[serve] stopped")
+
+  def _wait_for_mail(self, mailbox: ImapMailbox) -> None:
+    if mailbox.supports_idle:
+      # Servers may drop an IDLE after 30 minutes (RFC 2177), so it is re-issued before that.
+      mailbox.idle(self.settings.serve_idle_seconds, self.stop)
+    else:
+      self.stop.wait(self.settings.serve_poll_seconds)
+
+  def cycle(self, store: StateStore, mailbox: ImapMailbox, *, drain: bool = False) -> CycleResult | None:
+    """
+    Ingest the messages after the last seen UID and sync, narrate and report them as one run.
+    Returns None when there was nothing to do.
+    """
+    settings = self.settings
+    run = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+    since_uid = max(store.get_checkpoint(settings.imap_folder), self.last_uid)
+    created: list[str] = []
+    artifact = ArtifactWriter(settings.artifacts_dir, run)
+    try:
+      for payload in mailbox.fetch_since(since_uid):
+        created.extend(store.save_new_payloads([payload], run))
+        artifact.write(payload)
+      self.last_uid = max(self.last_uid, mailbox.last_uid)
+      if not artifact.count:
+        artifact.abort()
+      else:
+        artifact.close()
+    except BaseException:
+      artifact.abort()
+      raise
+    if not created and not drain:
+      return None
+
+    session = SyncSession(settings, store, run, client=self.client)
+    session.sync_items(created)
+    session.drain()
+    stats = session.finish()
+    print(f"[serve] run_id={run} messages={artifact.count} inserted={len(created)} sync={stats}")
+    if not created:
+      return None
+
+    narrative_delta = novelty_summary = None
+    if self.narrative is not None:
+      try:
+        narrative_delta, novelty_summary = self.narrative(run, store.items_first_seen_in_run(run))
+      except Exception as e:
+        print(f"[narrative] skipped: {e}")
+    # The day's report is rebuilt from every cycle's stored sections, so earlier cycles stay in it.
+    day = datetime.utcnow().date().isoformat()
+    store.save_report_sections(day, run, {NOVELTY_SECTION: novelty_summary, DELTA_SECTION: narrative_delta})
+    path = build_day_report(store, settings.reports_dir, day, formats=parse_formats(settings.report_formats))
+    print(f"[report] path={path}")
+    self.last_cycle = CycleResult(run, artifact.count, len(created), stats, str(path))
+    return self.last_cycle
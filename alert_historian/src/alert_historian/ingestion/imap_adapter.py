@@ -1,5 +1,10 @@
 import imaplib
 import re
+import select
+import ssl
+import threading
+import time
+from typing import Iterator
 from email import message_from_bytes
 from email.message import Message
 
@@ -9,6 +14,9 @@ from alert_historian.ingestion.schema import CanonicalAlertPayload, RawRef
 
 
 HREF_RE = re.compile(r'href=[\'"](?P<url>https?://[^\'"]+)[\'"]', re.IGNORECASE)
+EXISTS_RE = re.compile(rb"^\* \d+ EXISTS", re.IGNORECASE)
+IDLE_POLL_SECONDS = 1.0
+IDLE_RESPONSE_SECONDS = 30.0
 
 
 def _header(msg: Message, key: str) -> str:
@@ -42,37 +50,166 @@ def _is_google_alert(msg: Message, settings: Settings) -> bool:
   return settings.alert_sender.lower() in sender or settings.alert_list_id.lower() in list_id
 
 
-def fetch_from_imap(settings: Settings, since_uid: int) -> list[CanonicalAlertPayload]:
-  results: list[CanonicalAlertPayload] = []
+def _iter_messages(
+    client: imaplib.IMAP4,
+    settings: Settings,
+    since_uid: int,
+) -> Iterator[tuple[int, CanonicalAlertPayload | None]]:
+  """(uid, payload) for each message after `since_uid` in the selected folder; payload is None for non-alerts."""
+  status, data = client.uid("search", None, f"UID {since_uid + 1}:*")
+  if status != "OK":
+    return
+  uid_list = data[0].decode().split() if data and data[0] else []
+  for uid in uid_list:
+    # "N:*" always matches the newest message, even when its UID is below N.
+    if int(uid) <= since_uid:
+      continue
+    f_status, fetched = client.uid("fetch", uid, "(RFC822)")
+    if f_status != "OK" or not fetched or not fetched[0]:
+      continue
+    raw = fetched[0][1]
+    msg = message_from_bytes(raw)
+    if not _is_google_alert(msg, settings):
+      yield int(uid), None
+      continue
+    body = _extract_text_body(msg)
+    item_tuples = _extract_urls_and_items(body)
+    items = [normalize_item(url=u, title=t, snippet=s) for (u, t, s) in item_tuples]
+    if not items:
+      yield int(uid), None
+      continue
+    yield int(uid), CanonicalAlertPayload(
+        source="google_alerts_imap",
+        source_account=settings.imap_username,
+        source_message_id=_header(msg, "Message-ID") or f"uid:{uid}",
+        source_uid=f"{settings.imap_folder}:{uid}",
+        alert_topic=_header(msg, "Subject") or "google-alert",
+        alert_query_raw=_header(msg, "Subject"),
+        items=items,
+        raw_ref=RawRef(store="imap", folder=settings.imap_folder, uid=int(uid)),
+    )
+
+
+def iter_from_imap(settings: Settings, since_uid: int) -> Iterator[CanonicalAlertPayload]:
+  """Yield alert payloads for messages after `since_uid`, fetching one message at a time."""
   with imaplib.IMAP4_SSL(settings.imap_host, settings.imap_port) as client:
     client.login(settings.imap_username, settings.imap_password)
     client.select(settings.imap_folder)
-    status, data = client.uid("search", None, f"UID {since_uid + 1}:*")
-    if status != "OK":
-      return results
-    uid_list = data[0].decode().split() if data and data[0] else []
-    for uid in uid_list:
-      f_status, fetched = client.uid("fetch", uid, "(RFC822)")
-      if f_status != "OK" or not fetched or not fetched[0]:
-        continue
-      raw = fetched[0][1]
-      msg = message_from_bytes(raw)
-      if not _is_google_alert(msg, settings):
+    for _, payload in _iter_messages(client, settings, since_uid):
+      if payload is not None:
+        yield payload
+
+
+def fetch_from_imap(settings: Settings, since_uid: int) -> list[CanonicalAlertPayload]:
+  return list(iter_from_imap(settings, since_uid))
+
+
+class _LineReader:
+  """CRLF lines straight from the socket, with a timeout (imaplib's buffered file cannot wait with one)."""
+
+  def __init__(self, sock):
+    self.sock = sock
+    self.buffer = b""
+
+  def readline(self, timeout: float) -> bytes | None:
+    """One line, or None when none arrived within `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    while b"\n" not in self.buffer:
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        return None
+      # TLS may hold decrypted bytes that select() cannot see.
+      pending = getattr(self.sock, "pending", None)
+      if not (pending and pending()):
+        readable, _, _ = select.select([self.sock], [], [], remaining)
+        if not readable:
+          return None
+      try:
+        chunk = self.sock.recv(4096)
+      except ssl.SSLWantReadError:
         continue
-      body = _extract_text_body(msg)
-      item_tuples = _extract_urls_and_items(body)
-      items = [normalize_item(url=u, title=t, snippet=s) for (u, t, s) in item_tuples]
-      if not items:
+      if not chunk:
+        raise imaplib.IMAP4.abort("IMAP connection closed")
+      self.buffer += chunk
+    line, _, self.buffer = self.buffer.partition(b"\n")
+    return line + b"\n"
+
+
+class ImapMailbox:
+  """
+  One logged-in IMAP connection to the alert folder, kept open by `serve`: fetch messages after a UID,
+  then wait for new mail with IDLE (RFC 2177). `last_uid` is the highest UID looked at so far.
+  """
+
+  def __init__(self, settings: Settings, client: imaplib.IMAP4):
+    self.settings = settings
+    self.client = client
+    self.last_uid = 0
+
+  @classmethod
+  def connect(cls, settings: Settings) -> "ImapMailbox":
+    client = imaplib.IMAP4_SSL(settings.imap_host, settings.imap_port)
+    try:
+      client.login(settings.imap_username, settings.imap_password)
+      status, _ = client.select(settings.imap_folder)
+      if status != "OK":
+        raise imaplib.IMAP4.error(f"cannot select IMAP folder {settings.imap_folder!r}")
+    except BaseException:
+      client.shutdown()
+      raise
+    return cls(settings, client)
+
+  @property
+  def supports_idle(self) -> bool:
+    return "IDLE" in getattr(self.client, "capabilities", ())
+
+  def fetch_since(self, since_uid: int) -> Iterator[CanonicalAlertPayload]:
+    """Alert payloads for messages after `since_uid` (and after `last_uid`), advancing `last_uid`."""
+    for uid, payload in _iter_messages(self.client, self.settings, max(since_uid, self.last_uid)):
+      self.last_uid = max(self.last_uid, uid)
+      if payload is not None:
+        yield payload
+
+  def idle(self, timeout: float, stop: threading.Event | None = None) -> bool:
+    """
+    Wait in IDLE until the server announces new mail, `timeout` seconds pass or `stop` is set, then
+    leave IDLE. Returns whether new mail was announced.
+    """
+    client = self.client
+    tag = client._new_tag()
+    client.tagged_commands.pop(tag, None)
+    client.send(tag + b" IDLE\r\n")
+    reader = _LineReader(client.sock)
+    line = reader.readline(IDLE_RESPONSE_SECONDS)
+    if line is None or not line.startswith(b"+"):
+      raise imaplib.IMAP4.error(f"IDLE not accepted: {line!r}")
+
+    new_mail = False
+    deadline = time.monotonic() + timeout
+    while not new_mail and not (stop and stop.is_set()):
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        break
+      line = reader.readline(min(IDLE_POLL_SECONDS, remaining))
+      if line is None:
         continue
-      payload = CanonicalAlertPayload(
-          source="google_alerts_imap",
-          source_account=settings.imap_username,
-          source_message_id=_header(msg, "Message-ID") or f"uid:{uid}",
-          source_uid=f"{settings.imap_folder}:{uid}",
-          alert_topic=_header(msg, "Subject") or "google-alert",
-          alert_query_raw=_header(msg, "Subject"),
-          items=items,
-          raw_ref=RawRef(store="imap", folder=settings.imap_folder, uid=int(uid)),
-      )
-      results.append(payload)
-  return results
+      if line.upper().startswith(b"* BYE"):
+        raise imaplib.IMAP4.abort(f"server closed the IDLE connection: {line.strip()!r}")
+      new_mail = bool(EXISTS_RE.match(line))
+
+    client.send(b"DONE\r\n")
+    while True:
+      line = reader.readline(IDLE_RESPONSE_SECONDS)
+      if line is None:
+        raise imaplib.IMAP4.abort("no response to IDLE DONE")
+      if line.startswith(tag + b" "):
+        if not line[len(tag) + 1:].upper().startswith(b"OK"):
+          raise imaplib.IMAP4.error(f"IDLE failed: {line.strip()!r}")
+        return new_mail
+      new_mail = new_mail or bool(EXISTS_RE.match(line))
+
+  def close(self) -> None:
+    try:
+      self.client.logout()
+    except (OSError, imaplib.IMAP4.error):
+      pass
@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 from alert_historian.ingestion.normalize import normalize_item
 from alert_historian.ingestion.schema import CanonicalAlertPayload, RawRef
@@ -24,10 +24,10 @@ def _get_items(raw: dict[str, Any]) -> list[dict[str, Any]]:
   return out
 
 
-def load_json_export(path: Path) -> list[CanonicalAlertPayload]:
+def iter_json_export(path: Path) -> Iterator[CanonicalAlertPayload]:
+  """Yield canonical payloads from an export file, one entry at a time."""
   payload = json.loads(path.read_text(encoding="utf-8"))
   entries = payload if isinstance(payload, list) else [payload]
-  out: list[CanonicalAlertPayload] = []
   for entry in entries:
     items = []
     for item in _get_items(entry):
@@ -44,15 +44,17 @@ def load_json_export(path: Path) -> list[CanonicalAlertPayload]:
     source_message_id = str(entry.get("source_message_id") or entry.get("id") or "")
     if not source_message_id:
       source_message_id = f"json:{hash(str(entry))}"
-    out.append(
-        CanonicalAlertPayload(
-            source="google_alerts_export",
-            source_account=str(entry.get("source_account") or "json-export"),
-            source_message_id=source_message_id,
-            source_uid=None,
-            alert_topic=str(entry.get("alert_topic") or entry.get("topic") or "unknown-topic"),
-            alert_query_raw=str(entry.get("alert_query_raw") or entry.get("query") or ""),
-            items=items,
-            raw_ref=RawRef(store="json_export", path=str(path)),
-        ))
-  return out
+    yield CanonicalAlertPayload(
+        source="google_alerts_export",
+        source_account=str(entry.get("source_account") or "json-export"),
+        source_message_id=source_message_id,
+        source_uid=None,
+        alert_topic=str(entry.get("alert_topic") or entry.get("topic") or "unknown-topic"),
+        alert_query_raw=str(entry.get("alert_query_raw") or entry.get("query") or ""),
+        items=items,
+        raw_ref=RawRef(store="json_export", path=str(path)),
+    )
+
+
+def load_json_export(path: Path) -> list[CanonicalAlertPayload]:
+  return list(iter_json_export(path))
@@ -1,10 +1,13 @@
 import json
+import os
+import tempfile
 from datetime import datetime
 from pathlib import Path
+from typing import Iterator
 
 from alert_historian.config.settings import Settings
-from alert_historian.ingestion.imap_adapter import fetch_from_imap
-from alert_historian.ingestion.json_export_adapter import load_json_export
+from alert_historian.ingestion.imap_adapter import iter_from_imap
+from alert_historian.ingestion.json_export_adapter import iter_json_export
 from alert_historian.ingestion.schema import CanonicalAlertPayload
 from alert_historian.state.store import PendingSyncItem, StateStore, make_item_key, make_message_key
 
@@ -14,19 +17,56 @@ def _artifact_path(root: Path, run_id: str) -> Path:
   return root / f"canonical-{run_id}.json"
 
 
-def ingest(settings: Settings, store: StateStore, run_id: str | None = None) -> tuple[str, int]:
-  run = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+class ArtifactWriter:
+  """Streams payloads into the run's canonical artifact (a JSON array); it replaces the file on `close`."""
+
+  def __init__(self, root: Path, run_id: str):
+    self.path = _artifact_path(root, run_id)
+    fd, self._tmp_name = tempfile.mkstemp(prefix=f".{self.path.name}.", dir=str(self.path.parent))
+    self._fh = os.fdopen(fd, "w", encoding="utf-8")
+    self._fh.write("[")
+    self.count = 0
+
+  def write(self, payload: CanonicalAlertPayload) -> None:
+    self._fh.write(("\n" if not self.count else ",\n") + json.dumps(payload.model_dump(mode="json"), indent=2))
+    self.count += 1
+
+  def close(self) -> Path:
+    self._fh.write("\n]\n")
+    self._fh.close()
+    os.replace(self._tmp_name, self.path)
+    return self.path
+
+  def abort(self) -> None:
+    self._fh.close()
+    if os.path.exists(self._tmp_name):
+      os.unlink(self._tmp_name)
+
+
+def iter_payloads(settings: Settings, store: StateStore) -> Iterator[CanonicalAlertPayload]:
+  """
+  Payloads from the configured input (IMAP after the stored checkpoint, or the JSON export), read
+  lazily. The checkpoint is read up front, so `store` is not used while iterating.
+  """
   if settings.input_mode.lower() == "imap":
-    since_uid = store.get_checkpoint(settings.imap_folder)
-    payloads = fetch_from_imap(settings, since_uid)
-  else:
-    payloads = load_json_export(settings.json_input)
-
-  inserted = store.save_payloads(payloads)
-  artifact = _artifact_path(settings.artifacts_dir, run)
-  serializable = [p.model_dump(mode="json") for p in payloads]
-  artifact.write_text(json.dumps(serializable, indent=2), encoding="utf-8")
-  return run, inserted
+    return iter_from_imap(settings, store.get_checkpoint(settings.imap_folder))
+  return iter_json_export(settings.json_input)
+
+
+def ingest(settings: Settings, store: StateStore, run_id: str | None = None) -> tuple[str, list[str]]:
+  """Fetch, store and archive alerts. Returns the run id and the keys of items this run created."""
+  run = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+  created: list[str] = []
+  artifact = ArtifactWriter(settings.artifacts_dir, run)
+  try:
+    for payload in iter_payloads(settings, store):
+      created.extend(store.save_new_payloads([payload], run))
+      artifact.write(payload)
+    artifact.close()
+  except BaseException:
+    artifact.abort()
+    raise
+  return run, created
 
 
 def load_canonical_from_artifact(path: Path) -> list[CanonicalAlertPayload]:
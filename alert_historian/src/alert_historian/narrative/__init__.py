@@ -5,13 +5,18 @@ from alert_historian.narrative.chronicle import (
   load_chronicle,
   update_chronicle,
 )
+from alert_historian.narrative.chronicle_sections import load_chronicle_sections, update_chronicle_sections
 from alert_historian.narrative.delta import generate_delta
+from alert_historian.narrative.embedding_cache import EmbeddingCache
 from alert_historian.narrative.vector_store import AlertVectorStore
 
 __all__ = [
   "AlertVectorStore",
+  "EmbeddingCache",
   "create_openai_llm_client",
   "generate_delta",
   "load_chronicle",
+  "load_chronicle_sections",
   "update_chronicle",
+  "update_chronicle_sections",
 ]
@@ -1,5 +1,6 @@
 """Chronicle engine: evolving markdown timeline maintained by LLM."""
 
+import threading
 from pathlib import Path
 from typing import Callable
 
@@ -70,12 +71,17 @@ def create_openai_llm_client(
     api_key: str,
     model: str = "gpt-4o-mini",
 ) -> Callable[[str, str | None], str]:
-  """Create an LLM client that uses OpenAI's chat API."""
+  """Create an LLM client that uses OpenAI's chat API; one OpenAI client is shared by all calls."""
+  client = None
+  lock = threading.Lock()
 
   def _call(user: str, system: str | None) -> str:
-    from openai import OpenAI
+    nonlocal client
+    with lock:
+      if client is None:
+        from openai import OpenAI
 
-    client = OpenAI(api_key=api_key)
+        client = OpenAI(api_key=api_key)
     messages = []
     if system:
       messages.append({"role": "system", "content": system})
@@ -0,0 +1,347 @@
+"""
+Sectioned Chronicle: one markdown fragment per topic plus a JSON section index, rendered to chronicle.md.
+
+Only topics with new context are sent to the LLM, each with just its own section, and those calls run
+concurrently. Results are merged under a file lock: fragments and the index are replaced atomically,
+then chronicle.md is re-rendered from the fragments. A section another run changed in the meantime is
+not overwritten.
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable, Iterator
+
+from alert_historian.narrative.chronicle import CHRONICLE_TEMPLATE
+from alert_historian.narrative.clustering import StoryCluster, singleton_clusters
+from alert_historian.narrative.context_packer import ContextPacker, ContextSection
+from alert_historian.state.store import PendingSyncItem
+
+try:
+  import fcntl
+except ImportError:  # Windows
+  fcntl = None
+  import msvcrt
+
+INDEX_VERSION = 1
+DEFAULT_SECTION_WORKERS = 4
+SLUG_MAX_LEN = 48
+CONTEXT_TOKENS_PER_TOPIC = 1_500
+
+# Entries of the current section shown for continuity; older history reaches the prompt only through the
+# rollup pyramid, so prompt size does not grow with the section.
+RECENT_SECTION_ENTRIES = 5
+
+SECTION_SYSTEM_PROMPT = """You maintain one topic section of an Alert Chronicle: a markdown timeline of Google Alerts.
+Your task: write today's entry for this topic from the new context below.
+
+Rules:
+- Write ONE markdown bullet starting with "- <today's date>:" summarizing the new developments (1-3 sentences).
+- Use the summaries and recent entries only to note continuations, shifts or emerging patterns.
+- Output ONLY the new entry: no ## topic heading, no earlier entries, no other topics."""
+
+SECTION_USER_TEMPLATE = """Today's date: {date_str}
+Topic: {topic}
+
+New context to incorporate:
+---
+{context}
+---
+
+Long-range summaries for this topic (monthly, weekly, daily):
+{summaries}
+
+Most recent entries in this section:
+---
+{recent}
+---
+
+Output today's entry:"""
+
+_HEADING_RE = re.compile(r"^## +(.+?)\s*$", re.MULTILINE)
+# Windows only: msvcrt.LK_LOCK gives up after about 10 seconds, so waits longer than that retry.
+LOCK_RETRY_SECONDS = 0.1
+
+
+@dataclass
+class ChronicleUpdateResult:
+  content: str
+  updated_topics: list[str] = field(default_factory=list)
+  failed_topics: dict[str, str] = field(default_factory=dict)
+
+
+def sections_dir_for(path: Path) -> Path:
+  return path.with_name(f"{path.stem}.d")
+
+
+def topic_slug(topic: str) -> str:
+  base = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-")[:SLUG_MAX_LEN] or "topic"
+  return f"{base}-{sha256(topic.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _lock_file(fh) -> None:
+  """Block until this process holds the exclusive lock on `fh` (flock, or a byte-range lock on Windows)."""
+  if fcntl is not None:
+    fcntl.flock(fh, fcntl.LOCK_EX)
+    return
+  while True:
+    fh.seek(0)
+    try:
+      msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+      return
+    except OSError:
+      time.sleep(LOCK_RETRY_SECONDS)
+
+
+def _unlock_file(fh) -> None:
+  if fcntl is not None:
+    fcntl.flock(fh, fcntl.LOCK_UN)
+  else:
+    fh.seek(0)
+    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _atomic_write(path: Path, text: str) -> None:
+  path.parent.mkdir(parents=True, exist_ok=True)
+  fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+  try:
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+      fh.write(text)
+    os.replace(tmp, path)
+  except BaseException:
+    Path(tmp).unlink(missing_ok=True)
+    raise
+
+
+def strip_topic_heading(body: str, topic: str) -> str:
+  """LLM output for one topic without a leading `## <topic>` heading the model may have added anyway."""
+  body = body.strip()
+  first, _, rest = body.partition("\n")
+  match = _HEADING_RE.match(first)
+  if match and match.group(1).strip().lower() == topic.lower():
+    body = rest.strip()
+  return body
+
+
+def section_entries(section: str) -> list[str]:
+  """The non-blank lines of a section body, oldest first."""
+  return [line for line in section.splitlines() if line.strip()]
+
+
+def split_chronicle(content: str) -> dict[str, str]:
+  """Split a rendered Chronicle into {topic: section body} on its ## headings."""
+  matches = list(_HEADING_RE.finditer(content))
+  sections: dict[str, str] = {}
+  for idx, match in enumerate(matches):
+    end = matches[idx + 1].start() if idx + 1 < len(matches) else len(content)
+    sections[match.group(1).strip()] = content[match.end():end].strip()
+  return sections
+
+
+def build_topic_contexts(
+    items: list[PendingSyncItem],
+    *,
+    packer: ContextPacker | None = None,
+    tokens_per_topic: int = CONTEXT_TOKENS_PER_TOPIC,
+    clusters: list[StoryCluster] | None = None,
+) -> dict[str, str]:
+  """
+  New-context text for each topic with items: whole entries, in order, up to `tokens_per_topic`.
+  With story `clusters` there is one entry per story (its representative and size), largest first.
+  """
+  packer = packer or ContextPacker()
+  grouped: dict[str, list[str]] = {}
+  for cluster in clusters if clusters is not None else singleton_clusters(items):
+    item = cluster.representative
+    grouped.setdefault(item.topic, []).append(f"[{item.day}] {cluster.title()}\n{item.snippet}".strip())
+  return {
+      topic: packer.pack("", [ContextSection(topic, entries, separator="\n\n")], budget_tokens=tokens_per_topic)
+      .sections[topic]
+      for topic, entries in sorted(grouped.items())
+  }
+
+
+class ChronicleSections:
+  """Per-topic Chronicle fragments under `<chronicle stem>.d/`, indexed by `index.json`."""
+
+  def __init__(self, path: Path):
+    self.path = Path(path)
+    self.root = sections_dir_for(self.path)
+    self.index_path = self.root / "index.json"
+    self.fragments_dir = self.root / "sections"
+    self.preamble_path = self.root / "preamble.md"
+
+  @contextmanager
+  def _locked(self) -> Iterator[None]:
+    self.root.mkdir(parents=True, exist_ok=True)
+    with (self.root / ".lock").open("a+") as fh:
+      _lock_file(fh)
+      try:
+        yield
+      finally:
+        _unlock_file(fh)
+
+  def load_index(self) -> dict[str, dict[str, str]]:
+    if not self.index_path.exists():
+      return {}
+    return json.loads(self.index_path.read_text(encoding="utf-8")).get("topics", {})
+
+  def _ensure_migrated(self) -> dict[str, dict[str, str]]:
+    """
+    Build fragments from an existing monolithic chronicle.md the first time sections are used. Text
+    before the first ## heading is kept as the preamble that chronicle.md is rendered under.
+    """
+    if self.index_path.exists() or not self.path.exists():
+      return self.load_index()
+    content = self.path.read_text(encoding="utf-8")
+    first = _HEADING_RE.search(content)
+    preamble = content[:first.start() if first else len(content)].strip()
+    if preamble:
+      _atomic_write(self.preamble_path, preamble + "\n")
+    sections = split_chronicle(content)
+    now = datetime.utcnow().isoformat()
+    return self._write(dict.fromkeys(sections, now), sections, {})
+
+  def load(self) -> dict[str, dict[str, str]]:
+    """The section index, migrating a pre-existing chronicle.md on first use."""
+    with self._locked():
+      return self._ensure_migrated()
+
+  def read_section(self, topic: str, index: dict[str, dict[str, str]] | None = None) -> str:
+    entry = (index if index is not None else self.load_index()).get(topic)
+    if not entry:
+      return ""
+    fragment = self.fragments_dir / entry["file"]
+    return fragment.read_text(encoding="utf-8") if fragment.exists() else ""
+
+  def render(self, index: dict[str, dict[str, str]] | None = None, topics: list[str] | None = None) -> str:
+    index = index if index is not None else self.load_index()
+    chosen = sorted(index) if topics is None else [t for t in sorted(topics) if t in index]
+    preamble = self.preamble_path.read_text(encoding="utf-8") if self.preamble_path.exists() else CHRONICLE_TEMPLATE
+    parts = [preamble.rstrip("\n") + "\n"]
+    for topic in chosen:
+      parts.append(f"## {topic}\n\n{self.read_section(topic, index).strip()}\n")
+    return "\n".join(parts)
+
+  def _write(
+      self,
+      updated_at: dict[str, str],
+      bodies: dict[str, str],
+      index: dict[str, dict[str, str]],
+  ) -> dict[str, dict[str, str]]:
+    index = dict(index)
+    for topic, body in bodies.items():
+      file_name = f"{topic_slug(topic)}.md"
+      _atomic_write(self.fragments_dir / file_name, body.strip() + "\n")
+      index[topic] = {
+          "file": file_name,
+          "updated_at": updated_at[topic],
+          "sha256": sha256(body.strip().encode("utf-8")).hexdigest(),
+      }
+    _atomic_write(self.index_path, json.dumps({"version": INDEX_VERSION, "topics": index}, indent=2, sort_keys=True))
+    _atomic_write(self.path, self.render(index))
+    return index
+
+  def merge(
+      self,
+      bodies: dict[str, str],
+      base_hashes: dict[str, str | None] | None = None,
+  ) -> tuple[str, list[str]]:
+    """
+    Replace the given topic sections and re-render chronicle.md under the lock. Topics whose section
+    changed since `base_hashes` was read (another run merged first) are skipped and returned as conflicts.
+    """
+    with self._locked():
+      index = self._ensure_migrated()
+      conflicts = [
+          topic for topic in bodies
+          if base_hashes is not None and (index.get(topic) or {}).get("sha256") != base_hashes.get(topic)
+      ]
+      accepted = {topic: body for topic, body in bodies.items() if topic not in conflicts}
+      if accepted:
+        now = datetime.utcnow().isoformat()
+        index = self._write(dict.fromkeys(accepted, now), accepted, index)
+      elif not self.path.exists():
+        _atomic_write(self.path, self.render(index))
+      return self.render(index), sorted(conflicts)
+
+
+def update_chronicle_sections(
+    path: Path,
+    topic_contexts: dict[str, str],
+    llm_client: Callable[[str, str | None], str],
+    *,
+    date_str: str | None = None,
+    max_workers: int = DEFAULT_SECTION_WORKERS,
+    packer: ContextPacker | None = None,
+    summaries: dict[str, list[str]] | None = None,
+) -> ChronicleUpdateResult:
+  """
+  Update only the Chronicle sections for topics in `topic_contexts`, one LLM call per topic run
+  concurrently. A topic whose call fails keeps its previous section and is reported in `failed_topics`.
+  The LLM writes only today's entry, which is appended to the section locally, so sections grow on disk
+  but not in prompts: each prompt holds the new context, then the topic's rollup pyramid (`summaries`)
+  and its last `RECENT_SECTION_ENTRIES` entries, as far as the budget allows.
+  """
+  packer = packer or ContextPacker()
+  summaries = summaries or {}
+  sections = ChronicleSections(path)
+  date_str = date_str or datetime.utcnow().date().isoformat()
+  index = sections.load()
+  current = {topic: sections.read_section(topic, index) for topic in topic_contexts}
+  base_hashes = {topic: (index.get(topic) or {}).get("sha256") for topic in topic_contexts}
+
+  def update_topic(topic: str) -> str:
+    header = {"date_str": date_str, "topic": topic}
+    fixed = SECTION_SYSTEM_PROMPT + SECTION_USER_TEMPLATE.format(**header, context="", summaries="", recent="")
+    context = [entry for entry in topic_contexts[topic].split("\n\n") if entry.strip()]
+    packed = packer.pack(fixed, [
+        ContextSection("context", context, separator="\n\n"),
+        ContextSection("summaries", summaries.get(topic, []), newest_last=True),
+        ContextSection(
+            "recent", section_entries(current[topic])[-RECENT_SECTION_ENTRIES:], newest_last=True,
+            empty="(new topic; no entries yet)"),
+    ])
+    if packed.dropped["context"] == len(context):
+      raise ValueError(f"no new context fits the {packed.budget_tokens}-token prompt budget; section not updated")
+    user = SECTION_USER_TEMPLATE.format(**header, **packed.sections)
+    entry = strip_topic_heading(packer.call(llm_client, f"chronicle:{topic}", user, SECTION_SYSTEM_PROMPT, packed), topic)
+    if not entry:
+      return ""
+    return f"{current[topic].rstrip()}\n{entry}" if current[topic].strip() else entry
+
+  topics = sorted(t for t, ctx in topic_contexts.items() if ctx.strip())
+  bodies: dict[str, str] = {}
+  failed: dict[str, str] = {}
+  if topics:
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(topics)))) as pool:
+      futures = {topic: pool.submit(update_topic, topic) for topic in topics}
+      for topic, future in futures.items():
+        try:
+          body = future.result()
+        except Exception as e:
+          failed[topic] = str(e)
+          continue
+        if body:
+          bodies[topic] = body
+        else:
+          failed[topic] = "empty LLM response"
+
+  content, conflicts = sections.merge(bodies, base_hashes)
+  for topic in conflicts:
+    failed[topic] = "section changed by a concurrent update; retry"
+  updated = sorted(t for t in bodies if t not in conflicts)
+  return ChronicleUpdateResult(content=content, updated_topics=updated, failed_topics=failed)
+
+
+def load_chronicle_sections(path: Path, topics: list[str]) -> str:
+  """Render just the named topics' sections, e.g. as prompt context for the Narrative Delta."""
+  return ChronicleSections(path).render(topics=topics)
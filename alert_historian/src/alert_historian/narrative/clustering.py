@@ -0,0 +1,94 @@
+"""
+Story clustering: group the day's items of each topic that report the same story, so the narrative
+prompts get one representative per story with its size instead of near-identical titles.
+
+Clustering is threshold-based and vectorized: the cosine-similarity graph of a topic's embeddings is
+built in row chunks, then items in order of neighbour count (within `max_distance`) become
+representatives of their still unassigned neighbours, so the work is quadratic in the topic's items.
+Each member is within `max_distance` of its representative, which avoids single-linkage chaining.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+
+from alert_historian.state.store import PendingSyncItem
+
+DEFAULT_CLUSTER_DISTANCE = 0.25
+SIMILARITY_CHUNK_ROWS = 1024
+
+
+@dataclass
+class StoryCluster:
+  representative: PendingSyncItem
+  members: list[PendingSyncItem]
+
+  @property
+  def topic(self) -> str:
+    return self.representative.topic
+
+  @property
+  def size(self) -> int:
+    return len(self.members)
+
+  def title(self) -> str:
+    """Representative title, with the number of articles when several report the story."""
+    title = self.representative.title
+    return f"{title} ({self.size} articles)" if self.size > 1 else title
+
+
+def singleton_clusters(items: list[PendingSyncItem]) -> list[StoryCluster]:
+  """One cluster per item, in order: the unclustered view of `items`."""
+  return [StoryCluster(item, [item]) for item in items]
+
+
+def clusters_by_topic(clusters: list[StoryCluster]) -> dict[str, list[StoryCluster]]:
+  by_topic: dict[str, list[StoryCluster]] = defaultdict(list)
+  for cluster in clusters:
+    by_topic[cluster.topic].append(cluster)
+  return dict(sorted(by_topic.items()))
+
+
+def _neighbours(vectors: np.ndarray, min_similarity: float) -> np.ndarray:
+  """Boolean adjacency (self included) of rows whose cosine similarity is at least `min_similarity`."""
+  adjacency = np.empty((len(vectors), len(vectors)), dtype=bool)
+  for start in range(0, len(vectors), SIMILARITY_CHUNK_ROWS):
+    end = start + SIMILARITY_CHUNK_ROWS
+    adjacency[start:end] = vectors[start:end] @ vectors.T >= min_similarity
+  np.fill_diagonal(adjacency, True)
+  return adjacency
+
+
+def cluster_items(
+    items: list[PendingSyncItem],
+    embeddings: list[list[float]],
+    *,
+    max_distance: float = DEFAULT_CLUSTER_DISTANCE,
+) -> list[StoryCluster]:
+  """
+  Story clusters of `items` (with their `embeddings`, e.g. from `VectorStoreBase.embed_items`) within
+  each topic: topics sorted, then largest clusters first, ties in item order.
+  """
+  positions: dict[str, list[int]] = defaultdict(list)
+  for idx, item in enumerate(items):
+    positions[item.topic].append(idx)
+
+  clusters: list[StoryCluster] = []
+  for topic in sorted(positions):
+    indices = positions[topic]
+    vectors = np.asarray([embeddings[i] for i in indices], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+    adjacency = _neighbours(vectors, 1.0 - max_distance)
+    unassigned = np.ones(len(indices), dtype=bool)
+    topic_clusters: list[tuple[int, list[int]]] = []
+    for center in np.argsort(-adjacency.sum(axis=1), kind="stable"):
+      if unassigned[center]:
+        members = np.flatnonzero(adjacency[center] & unassigned)
+        unassigned[members] = False
+        topic_clusters.append((int(center), [int(m) for m in members]))
+    topic_clusters.sort(key=lambda c: (-len(c[1]), min(c[1])))
+    for center, members in topic_clusters:
+      clusters.append(StoryCluster(items[indices[center]], [items[indices[m]] for m in members]))
+  return clusters
@@ -0,0 +1,184 @@
+"""
+Token-budgeted prompt context: fill a per-model token budget by priority instead of fixed character cuts.
+
+Sections are packed in the order given (e.g. today's items, then the most similar past items, then the
+most recent Chronicle entries) and whole entries are kept; only an entry that would be the first of its
+section is shortened, at a sentence boundary. Every LLM call made through `ContextPacker.call` records its
+prompt and completion token counts and latency.
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from alert_historian.narrative.embeddings import TokenCounter, token_counter_for_model
+
+DEFAULT_CONTEXT_WINDOW = 128_000
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4.1-mini": 1_047_576,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+}
+RESERVED_OUTPUT_TOKENS = 4_096
+DEFAULT_PROMPT_BUDGET = 8_000
+TRUNCATION_MARK = " …"
+
+_SENTENCE_END_RE = re.compile(r"[.!?](?=\s)|\n")
+
+
+def context_window_for_model(model: str) -> int:
+  # Longest matching prefix, so dated snapshots ("gpt-4o-mini-2024-07-18") resolve to their family.
+  matches = [name for name in MODEL_CONTEXT_WINDOWS if model == name or model.startswith(f"{name}-")]
+  return MODEL_CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+
+
+def prompt_budget_for_model(model: str, cap: int = DEFAULT_PROMPT_BUDGET) -> int:
+  """Prompt tokens to spend per call: `cap`, bounded by the model's window minus room for the answer."""
+  return max(1, min(cap, context_window_for_model(model) - RESERVED_OUTPUT_TOKENS))
+
+
+def truncate_to_sentence(text: str, max_tokens: int, counter: TokenCounter) -> str:
+  """Shorten `text` to `max_tokens`, cutting at the last sentence end when one keeps at least half of it."""
+  if counter.count(text) <= max_tokens:
+    return text
+  mark_tokens = counter.count(TRUNCATION_MARK)
+  if max_tokens <= mark_tokens:
+    return ""
+  head = counter.truncate(text, max_tokens - mark_tokens)
+  ends = [m.end() for m in _SENTENCE_END_RE.finditer(head)]
+  if ends and ends[-1] >= len(head) // 2:
+    head = head[:ends[-1]]
+  return head.rstrip() + TRUNCATION_MARK
+
+
+@dataclass
+class ContextSection:
+  """
+  One prompt section. `newest_last` packs from the end (e.g. Chronicle entries) and keeps their order;
+  `max_tokens` caps the section's share of the budget.
+  """
+
+  name: str
+  entries: list[str]
+  separator: str = "\n"
+  newest_last: bool = False
+  max_tokens: int | None = None
+  empty: str = "(none)"
+
+
+@dataclass
+class PackedContext:
+  sections: dict[str, str]
+  tokens: dict[str, int]
+  dropped: dict[str, int]
+  used_tokens: int
+  budget_tokens: int
+
+
+@dataclass
+class LLMCallUsage:
+  label: str
+  prompt_tokens: int
+  completion_tokens: int
+  seconds: float
+  context_tokens: dict[str, int] = field(default_factory=dict)
+
+
+class ContextPacker:
+  """Pack prompt sections into a token budget and meter the LLM calls made with them."""
+
+  def __init__(self, budget_tokens: int = DEFAULT_PROMPT_BUDGET, counter: TokenCounter | None = None):
+    self.budget_tokens = budget_tokens
+    self.counter = counter or TokenCounter()
+    self.usage: list[LLMCallUsage] = []
+    self._lock = threading.Lock()
+
+  @classmethod
+  def for_model(cls, model: str, budget_tokens: int = DEFAULT_PROMPT_BUDGET) -> "ContextPacker":
+    return cls(prompt_budget_for_model(model, budget_tokens), token_counter_for_model(model))
+
+  def pack(self, fixed: str, sections: list[ContextSection], *, budget_tokens: int | None = None) -> PackedContext:
+    """
+    Fill what is left of the budget after `fixed` (system prompt, template, text that must be sent whole)
+    with `sections` in priority order. A section stops at the first entry that no longer fits. Each
+    section's `empty` placeholder is reserved up front, so empty later sections still fit.
+    """
+    budget = self.budget_tokens if budget_tokens is None else budget_tokens
+    placeholders = [self.counter.count(section.empty) for section in sections]
+    remaining = budget - self.counter.count(fixed) - sum(placeholders)
+    packed: dict[str, str] = {}
+    tokens: dict[str, int] = {}
+    dropped: dict[str, int] = {}
+    for section, placeholder in zip(sections, placeholders):
+      remaining += placeholder
+      entries = [e for e in section.entries if e.strip()]
+      ordered = list(reversed(entries)) if section.newest_last else entries
+      sep_tokens = self.counter.count(section.separator) if section.separator.strip() else 1
+      available = remaining if section.max_tokens is None else min(remaining, section.max_tokens)
+      kept: list[str] = []
+      spent = 0
+      for entry in ordered:
+        cost = self.counter.count(entry) + (sep_tokens if kept else 0)
+        if cost > available - spent:
+          if not kept:
+            shortened = truncate_to_sentence(entry, available - spent, self.counter)
+            if shortened:
+              kept.append(shortened)
+              spent += self.counter.count(shortened)
+          break
+        kept.append(entry)
+        spent += cost
+      if section.newest_last:
+        kept.reverse()
+      if not kept:
+        spent = placeholder
+      remaining -= spent
+      packed[section.name] = section.separator.join(kept) if kept else section.empty
+      tokens[section.name] = spent
+      dropped[section.name] = len(entries) - len(kept)
+    return PackedContext(
+        sections=packed,
+        tokens=tokens,
+        dropped=dropped,
+        used_tokens=budget - remaining,
+        budget_tokens=budget,
+    )
+
+  def call(
+      self,
+      llm_client: Callable[[str, str | None], str],
+      label: str,
+      user: str,
+      system: str | None,
+      packed: PackedContext | None = None,
+  ) -> str:
+    """Call `llm_client` and record prompt/completion tokens and latency under `label`."""
+    started = time.perf_counter()
+    response = llm_client(user, system)
+    seconds = time.perf_counter() - started
+    usage = LLMCallUsage(
+        label=label,
+        prompt_tokens=self.counter.count(user) + (self.counter.count(system) if system else 0),
+        completion_tokens=self.counter.count(response or ""),
+        seconds=seconds,
+        context_tokens=dict(packed.tokens) if packed else {},
+    )
+    with self._lock:
+      self.usage.append(usage)
+    return response
+
+  def usage_totals(self) -> dict[str, float]:
+    with self._lock:
+      calls = list(self.usage)
+    return {
+        "calls": len(calls),
+        "prompt_tokens": sum(c.prompt_tokens for c in calls),
+        "completion_tokens": sum(c.completion_tokens for c in calls),
+        "max_seconds": max((c.seconds for c in calls), default=0.0),
+    }
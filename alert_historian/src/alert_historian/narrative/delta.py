@@ -1,72 +1,235 @@
 """Narrative Delta: links today's alerts to historical context."""
 
+import logging
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import Callable
 
+from alert_historian.narrative.chronicle_sections import (
+    RECENT_SECTION_ENTRIES,
+    section_entries,
+    split_chronicle,
+    strip_topic_heading,
+)
+from alert_historian.narrative.clustering import StoryCluster, clusters_by_topic, singleton_clusters
+from alert_historian.narrative.context_packer import ContextPacker, ContextSection
 from alert_historian.state.store import PendingSyncItem
 
 
-def generate_delta(
-    today_items: list[PendingSyncItem],
-    past_context: list[dict],
-    chronicle_content: str,
-    llm_client: Callable[[str, str | None], str],
-    *,
-    date_str: str | None = None,
-) -> str:
-  """
-  Produce 1-2 sentence "story links" per topic, connecting today's alerts to historical context.
-  Returns formatted markdown suitable for inclusion in the daily report.
-  """
-  from datetime import datetime
-
-  if not today_items:
-    return ""
+logger = logging.getLogger(__name__)
 
-  date_str = date_str or datetime.utcnow().date().isoformat()
-
-  by_topic: dict[str, list[PendingSyncItem]] = defaultdict(list)
-  for item in today_items:
-    by_topic[item.topic].append(item)
+DELTA_MODES = ("per-topic", "single")
+DEFAULT_DELTA_WORKERS = 4
 
-  today_summary = []
-  for topic, items in sorted(by_topic.items()):
-    titles = [item.title for item in items[:5]]
-    today_summary.append(f"**{topic}** ({len(items)} items): " + "; ".join(titles[:3]))
-
-  past_summary = []
-  for r in past_context[:15]:
-    meta = r.get("metadata") or {}
-    topic = meta.get("topic", "?")
-    title = meta.get("title", "")
-    day = meta.get("day", "")
-    if title:
-      past_summary.append(f"- [{day}] {topic}: {title}")
-
-  system = """You write brief "story links" that connect today's Google Alert items to past context.
+DELTA_SYSTEM_PROMPT = """You write brief "story links" that connect today's Google Alert items to past context.
 For each topic with new items today, write 1-2 sentences that:
 - Link today's news to what we've seen before in the Chronicle
 - Note continuations, shifts, or emerging patterns
 - Be specific and concise
 Output valid markdown. Use ## for topic headings and bullets for the story links."""
 
-  today_items_str = "\n".join(today_summary)
-  past_items_str = "\n".join(past_summary) if past_summary else "(none)"
-  chronicle_excerpt = chronicle_content[:4000] if chronicle_content else "(empty)"
+TOPIC_DELTA_SYSTEM_PROMPT = """You write brief "story links" that connect today's Google Alert items on one topic to past context.
+Write 1-2 sentences that:
+- Link today's news to what we've seen before in the Chronicle
+- Note continuations, shifts, or emerging patterns
+- Be specific and concise
+Output ONLY markdown bullets for the story links: no ## topic heading, no other topics."""
 
-  user = f"""Today's date: {date_str}
+DELTA_USER_TEMPLATE = """Today's date: {date_str}
 
 Today's new items (by topic):
-{today_items_str}
+{today}
+
+Long-range summaries (monthly, weekly, daily):
+{summaries}
 
 Relevant past items from the vector store:
-{past_items_str}
+{past}
 
 Chronicle excerpt:
 ---
-{chronicle_excerpt}
+{chronicle}
 ---
 
 Write the Narrative Delta section. For each topic with new items, provide a ## heading and 1-2 sentence story link(s)."""
 
-  return llm_client(user, system)
+TOPIC_DELTA_USER_TEMPLATE = """Today's date: {date_str}
+Topic: {topic}
+
+Today's new items ({count}, as {stories} stories):
+{today}
+
+Long-range summaries (monthly, weekly, daily):
+{summaries}
+
+Relevant past items from the vector store:
+{past}
+
+Chronicle section:
+---
+{chronicle}
+---
+
+Write the story link bullets for this topic:"""
+
+
+def _past_line(r: dict, default_topic: str = "?") -> str | None:
+  meta = r.get("metadata") or {}
+  title = meta.get("title", "")
+  if not title:
+    return None
+  return f"- [{meta.get('day', '')}] {meta.get('topic', default_topic)}: {title}"
+
+
+def _past_entries(past_context: list[dict] | dict[str, list[dict]]) -> list[str]:
+  """Past results as prompt entries, most similar first; grouped results give one entry per topic."""
+  if isinstance(past_context, dict):
+    entries = []
+    for topic, results in sorted(past_context.items()):
+      lines = [line for r in results if (line := _past_line(r, topic))]
+      entries.append(f"{topic}:\n" + ("\n".join(lines) if lines else "(none)"))
+    return entries
+  return [line for r in past_context if (line := _past_line(r))]
+
+
+def _chronicle_entries(section: str) -> list[str]:
+  """The last entries of a Chronicle section; older history comes from the rollup pyramid instead."""
+  return section_entries(section)[-RECENT_SECTION_ENTRIES:]
+
+
+def _group_by_topic(items: list[PendingSyncItem]) -> dict[str, list[PendingSyncItem]]:
+  by_topic: dict[str, list[PendingSyncItem]] = defaultdict(list)
+  for item in items:
+    by_topic[item.topic].append(item)
+  return by_topic
+
+
+def _stories_by_topic(items: list[PendingSyncItem], clusters: list[StoryCluster] | None) -> dict[str, list[StoryCluster]]:
+  return clusters_by_topic(clusters if clusters is not None else singleton_clusters(items))
+
+
+def generate_delta(
+    today_items: list[PendingSyncItem],
+    past_context: list[dict] | dict[str, list[dict]],
+    chronicle_content: str,
+    llm_client: Callable[[str, str | None], str],
+    *,
+    date_str: str | None = None,
+    packer: ContextPacker | None = None,
+    summaries: dict[str, list[str]] | None = None,
+    clusters: list[StoryCluster] | None = None,
+) -> str:
+  """
+  Produce 1-2 sentence "story links" per topic, connecting today's alerts to historical context.
+  `past_context` is either one flat result list or results grouped per topic (`query_many`).
+  With story `clusters` (`cluster_items`), each story is listed once with its size.
+  The prompt is filled by `packer`: today's items first, then each topic's rollup pyramid
+  (`summaries`), then past items, then the last `RECENT_SECTION_ENTRIES` Chronicle entries of today's topics in equal shares.
+  Returns formatted markdown suitable for inclusion in the daily report.
+  """
+  if not today_items:
+    return ""
+
+  packer = packer or ContextPacker()
+  date_str = date_str or datetime.utcnow().date().isoformat()
+  by_topic = _group_by_topic(today_items)
+  today_entries = [
+      f"**{topic}** ({len(by_topic[topic])} items): " + "; ".join(cluster.title() for cluster in stories)
+      for topic, stories in _stories_by_topic(today_items, clusters).items()
+  ]
+
+  summaries = summaries or {}
+  summary_entries = [
+      f"{topic}:\n" + "\n".join(summaries[topic]) for topic in sorted(by_topic) if summaries.get(topic)
+  ]
+  fixed = DELTA_SYSTEM_PROMPT + DELTA_USER_TEMPLATE.format(
+      date_str=date_str, today="", summaries="", past="", chronicle="")
+  packed = packer.pack(fixed, [
+      ContextSection("today", today_entries),
+      ContextSection("summaries", summary_entries, separator="\n\n"),
+      ContextSection("past", _past_entries(past_context), separator="\n\n" if isinstance(past_context, dict) else "\n"),
+  ])
+  chronicle = split_chronicle(chronicle_content or "")
+  topics = [topic for topic in sorted(by_topic) if chronicle.get(topic)]
+  left = packed.budget_tokens - packed.used_tokens
+  share = left // max(1, len(topics))
+  chronicle_packed = packer.pack("", [
+      ContextSection(
+          topic,
+          _chronicle_entries(chronicle[topic]),
+          newest_last=True,
+          max_tokens=share - packer.counter.count(f"## {topic}\n\n\n\n"),
+      )
+      for topic in topics
+  ], budget_tokens=left)
+  chronicle_excerpt = "\n\n".join(
+      f"## {topic}\n\n{chronicle_packed.sections[topic]}" for topic in topics) or "(empty)"
+
+  user = DELTA_USER_TEMPLATE.format(
+      date_str=date_str,
+      today=packed.sections["today"],
+      summaries=packed.sections["summaries"],
+      past=packed.sections["past"],
+      chronicle=chronicle_excerpt,
+  )
+  packed.tokens.update({f"chronicle:{t}": n for t, n in chronicle_packed.tokens.items()})
+  return packer.call(llm_client, "delta", user, DELTA_SYSTEM_PROMPT, packed)
+
+
+def generate_topic_deltas(
+    today_items: list[PendingSyncItem],
+    past_context: dict[str, list[dict]],
+    chronicle_content: str,
+    llm_client: Callable[[str, str | None], str],
+    *,
+    date_str: str | None = None,
+    max_workers: int = DEFAULT_DELTA_WORKERS,
+    packer: ContextPacker | None = None,
+    summaries: dict[str, list[str]] | None = None,
+    clusters: list[StoryCluster] | None = None,
+) -> str:
+  """
+  Per-topic Narrative Delta: one LLM call per topic with only that topic's items, past results
+  (`query_many`) and Chronicle section, run concurrently. Each prompt is filled by `packer`: items
+  (one per story with `clusters`, largest first), then the topic's rollup pyramid (`summaries`), past
+  items and the last `RECENT_SECTION_ENTRIES` Chronicle entries, newest first. Sections are assembled
+  in sorted topic order, so the output matches `generate_delta`. A topic whose call fails gets a
+  placeholder bullet.
+  """
+  if not today_items:
+    return ""
+
+  packer = packer or ContextPacker()
+  summaries = summaries or {}
+  date_str = date_str or datetime.utcnow().date().isoformat()
+  by_topic = _group_by_topic(today_items)
+  stories = _stories_by_topic(today_items, clusters)
+  chronicle = split_chronicle(chronicle_content or "")
+
+  def delta_for(topic: str) -> str:
+    header = {"date_str": date_str, "topic": topic, "count": len(by_topic[topic]), "stories": len(stories.get(topic, []))}
+    fixed = TOPIC_DELTA_SYSTEM_PROMPT + TOPIC_DELTA_USER_TEMPLATE.format(
+        **header, today="", summaries="", past="", chronicle="")
+    packed = packer.pack(fixed, [
+        ContextSection("today", [f"- {cluster.title()}" for cluster in stories.get(topic, [])]),
+        ContextSection("summaries", summaries.get(topic, []), newest_last=True),
+        ContextSection("past", [line for r in past_context.get(topic, []) if (line := _past_line(r, topic))]),
+        ContextSection("chronicle", _chronicle_entries(chronicle.get(topic, "")), newest_last=True, empty="(empty)"),
+    ])
+    user = TOPIC_DELTA_USER_TEMPLATE.format(**header, **packed.sections)
+    return strip_topic_heading(packer.call(llm_client, f"delta:{topic}", user, TOPIC_DELTA_SYSTEM_PROMPT, packed), topic)
+
+  topics = sorted(by_topic)
+  with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(topics)))) as pool:
+    futures = {topic: pool.submit(delta_for, topic) for topic in topics}
+    parts = []
+    for topic, future in futures.items():
+      try:
+        body = future.result() or "- _(no story link generated)_"
+      except Exception:
+        # Error text can carry API details, so it goes to the log rather than into the report.
+        logger.exception("narrative delta for topic %r failed", topic)
+        body = "- _(story link unavailable)_"
+      parts.append(f"## {topic}\n\n{body}")
+  return "\n\n".join(parts)
@@ -0,0 +1,69 @@
+"""Persistent embedding cache keyed by (embedding model, sha256 of document text)."""
+
+import sqlite3
+from array import array
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable
+
+LOOKUP_CHUNK = 500
+
+
+def text_hash(text: str) -> str:
+  return sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+  """SQLite-backed store of float32 embedding vectors, so identical text is embedded once per model."""
+
+  def __init__(self, path: Path):
+    self.path = Path(path)
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self.conn = sqlite3.connect(str(self.path))
+    self.conn.execute("""
+      CREATE TABLE IF NOT EXISTS embeddings (
+        model TEXT NOT NULL,
+        text_hash TEXT NOT NULL,
+        dim INTEGER NOT NULL,
+        vector BLOB NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (model, text_hash)
+      )
+    """)
+    self.conn.commit()
+
+  def close(self) -> None:
+    self.conn.close()
+
+  def get_many(self, model: str, texts: list[str]) -> list[list[float] | None]:
+    """Return cached vectors aligned with `texts`; None marks a miss."""
+    hashes = [text_hash(t) for t in texts]
+    found: dict[str, list[float]] = {}
+    unique = list(dict.fromkeys(hashes))
+    for start in range(0, len(unique), LOOKUP_CHUNK):
+      chunk = unique[start:start + LOOKUP_CHUNK]
+      placeholders = ",".join("?" for _ in chunk)
+      cur = self.conn.execute(
+          f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+          (model, *chunk))
+      for h, blob in cur.fetchall():
+        found[h] = array("f", blob).tolist()
+    return [found.get(h) for h in hashes]
+
+  def put_many(self, model: str, texts: list[str], vectors: list[list[float]]) -> None:
+    now = datetime.utcnow().isoformat()
+    self.conn.executemany(
+        """
+        INSERT OR REPLACE INTO embeddings(model, text_hash, dim, vector, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        ((model, text_hash(t), len(v), array("f", v).tobytes(), now) for t, v in zip(texts, vectors)))
+    self.conn.commit()
+
+  def fill(self, model: str, texts: list[str], embed_fn: Callable[[list[str]], list[list[float]]]) -> int:
+    """Embed and store the texts not cached yet for `model`. Returns how many were embedded."""
+    missing = list(dict.fromkeys(t for t, vector in zip(texts, self.get_many(model, texts)) if vector is None))
+    if missing:
+      self.put_many(model, missing, embed_fn(missing))
+    return len(missing)
@@ -0,0 +1,244 @@
+"""Token-aware, concurrent embedding dispatch: pack documents into batches and embed them in parallel."""
+
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable
+
+from alert_historian.narrative.local_embeddings import (
+  DEFAULT_HASHING_DIM,
+  DEFAULT_SENTENCE_TRANSFORMER,
+  HashingEmbedder,
+  SentenceTransformerEmbedder,
+  sentence_transformers_available,
+)
+
+EmbedBatchFn = Callable[[list[str]], list[list[float]]]
+
+# OpenAI embedding limits: 8191 tokens per input, 2048 inputs and 300k tokens per request.
+MAX_INPUT_TOKENS = 8191
+MAX_BATCH_INPUTS = 2048
+DEFAULT_BATCH_TOKENS = 100_000
+DEFAULT_CONCURRENCY = 4
+MAX_EMBED_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = [1, 2, 4, 8, 16]
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+DEFAULT_ENCODING = "cl100k_base"
+# "local" picks sentence-transformers when installed and the hashing embedder otherwise.
+EMBEDDING_BACKENDS = ("openai", "hashing", "sentence-transformers", "local")
+
+
+class TokenCounter:
+  """Count and truncate tokens with tiktoken; falls back to a byte-based estimate when the encoding can't load."""
+
+  def __init__(self, encoding=None):
+    self.encoding = encoding
+
+  @property
+  def exact(self) -> bool:
+    return self.encoding is not None
+
+  def count(self, text: str) -> int:
+    if self.encoding is not None:
+      return len(self.encoding.encode(text, disallowed_special=()))
+    # BPE tokens average ~4 bytes of English text; 3 keeps the estimate on the safe side.
+    return math.ceil(len(text.encode("utf-8")) / 3)
+
+  def truncate(self, text: str, max_tokens: int) -> str:
+    if self.encoding is not None:
+      tokens = self.encoding.encode(text, disallowed_special=())
+      return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+    raw = text.encode("utf-8")
+    return text if len(raw) <= max_tokens * 3 else raw[:max_tokens * 3].decode("utf-8", errors="ignore")
+
+
+@lru_cache(maxsize=8)
+def token_counter_for_model(model: str) -> TokenCounter:
+  """tiktoken counter for `model`; an estimating counter if tiktoken has no cached encoding (e.g. offline)."""
+  try:
+    import tiktoken
+
+    try:
+      encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+      encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+  except Exception:
+    return TokenCounter()
+  return TokenCounter(encoding)
+
+
+def pack_batches(
+    token_counts: list[int],
+    *,
+    max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    max_batch_inputs: int = MAX_BATCH_INPUTS,
+) -> list[list[int]]:
+  """Group document indices, in order, into batches under both the token and input-count budgets."""
+  batches: list[list[int]] = []
+  current: list[int] = []
+  current_tokens = 0
+  for idx, n_tokens in enumerate(token_counts):
+    if current and (current_tokens + n_tokens > max_batch_tokens or len(current) >= max_batch_inputs):
+      batches.append(current)
+      current, current_tokens = [], 0
+    current.append(idx)
+    current_tokens += n_tokens
+  if current:
+    batches.append(current)
+  return batches
+
+
+def is_retryable_embedding_error(exc: BaseException) -> bool:
+  status = getattr(exc, "status_code", None)
+  if isinstance(status, int):
+    return status in RETRYABLE_STATUS_CODES or status >= 500
+  try:
+    import openai
+  except ImportError:
+    return False
+  return isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError))
+
+
+class EmbeddingDispatcher:
+  """
+  Callable drop-in for an `embedding_fn`: packs texts into token-bounded batches,
+  embeds them on a bounded thread pool with retry, and returns vectors in input order.
+  """
+
+  def __init__(
+      self,
+      embed_batch: EmbedBatchFn,
+      *,
+      counter: TokenCounter | None = None,
+      max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+      max_batch_inputs: int = MAX_BATCH_INPUTS,
+      max_input_tokens: int = MAX_INPUT_TOKENS,
+      concurrency: int = DEFAULT_CONCURRENCY,
+      max_attempts: int = MAX_EMBED_ATTEMPTS,
+      sleep: Callable[[float], None] = time.sleep,
+      model_id: str = "",
+  ):
+    self.model_id = model_id
+    self._embed_batch = embed_batch
+    self._counter = counter or TokenCounter()
+    self._max_batch_tokens = max(1, max_batch_tokens)
+    self._max_batch_inputs = max(1, min(MAX_BATCH_INPUTS, max_batch_inputs))
+    self._max_input_tokens = max(1, min(max_input_tokens, self._max_batch_tokens))
+    self._concurrency = max(1, concurrency)
+    self._max_attempts = max(1, max_attempts)
+    self._sleep = sleep
+    self.batches_sent = 0
+    self.retries = 0
+    self._stats_lock = threading.Lock()
+
+  def __call__(self, texts: list[str]) -> list[list[float]]:
+    if not texts:
+      return []
+    prepared: list[str] = []
+    token_counts: list[int] = []
+    for text in texts:
+      # Empty input is rejected by the API; one oversized input would fail its whole batch.
+      text = self._counter.truncate(text or " ", self._max_input_tokens)
+      prepared.append(text)
+      token_counts.append(self._counter.count(text))
+    batches = pack_batches(
+        token_counts, max_batch_tokens=self._max_batch_tokens, max_batch_inputs=self._max_batch_inputs)
+
+    out: list[list[float] | None] = [None] * len(texts)
+    if len(batches) == 1 or self._concurrency == 1:
+      for indices in batches:
+        self._fill(out, indices, prepared)
+    else:
+      with ThreadPoolExecutor(max_workers=min(self._concurrency, len(batches))) as pool:
+        # list() re-raises the first batch failure after retries are exhausted.
+        list(pool.map(lambda indices: self._fill(out, indices, prepared), batches))
+    return out  # type: ignore[return-value]
+
+  def _fill(self, out: list[list[float] | None], indices: list[int], prepared: list[str]) -> None:
+    vectors = self._embed_with_retry([prepared[i] for i in indices])
+    if len(vectors) != len(indices):
+      raise RuntimeError(f"embedding batch returned {len(vectors)} vectors for {len(indices)} inputs")
+    for idx, vector in zip(indices, vectors):
+      out[idx] = vector
+
+  def _embed_with_retry(self, batch: list[str]) -> list[list[float]]:
+    attempt = 1
+    while True:
+      try:
+        vectors = self._embed_batch(batch)
+        with self._stats_lock:
+          self.batches_sent += 1
+        return vectors
+      except Exception as e:
+        if attempt >= self._max_attempts or not is_retryable_embedding_error(e):
+          raise
+        with self._stats_lock:
+          self.retries += 1
+        base = RETRY_BACKOFF_SECONDS[min(attempt - 1, len(RETRY_BACKOFF_SECONDS) - 1)]
+        self._sleep(base + random.uniform(0, 0.25 * base))
+        attempt += 1
+
+
+class OpenAIEmbeddingBatch:
+  """Embed one batch through a single lazily created, shared OpenAI client."""
+
+  def __init__(self, api_key: str, model: str):
+    self._api_key = api_key
+    self._model = model
+    self._client = None
+    self._lock = threading.Lock()
+
+  def _get_client(self):
+    with self._lock:
+      if self._client is None:
+        from openai import OpenAI
+
+        # Retries are handled by EmbeddingDispatcher so they share its backoff.
+        self._client = OpenAI(api_key=self._api_key, max_retries=0)
+      return self._client
+
+  def __call__(self, texts: list[str]) -> list[list[float]]:
+    resp = self._get_client().embeddings.create(input=texts, model=self._model)
+    return [e.embedding for e in sorted(resp.data, key=lambda e: e.index)]
+
+
+def create_openai_embedding_fn(
+    *,
+    api_key: str,
+    model: str = "text-embedding-3-small",
+    max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> EmbeddingDispatcher:
+  return EmbeddingDispatcher(
+      OpenAIEmbeddingBatch(api_key, model),
+      counter=token_counter_for_model(model),
+      max_batch_tokens=max_batch_tokens,
+      concurrency=concurrency,
+      model_id=model,
+  )
+
+
+def create_embedding_fn(
+    backend: str = "openai",
+    *,
+    api_key: str = "",
+    model: str = "text-embedding-3-small",
+    max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    hashing_dim: int = DEFAULT_HASHING_DIM,
+    local_model: str = DEFAULT_SENTENCE_TRANSFORMER,
+) -> EmbedBatchFn:
+  """Build the embedding function for `backend`; the result's `model_id` keys caches and collections."""
+  if backend == "local":
+    backend = "sentence-transformers" if sentence_transformers_available() else "hashing"
+  if backend == "openai":
+    return create_openai_embedding_fn(
+        api_key=api_key, model=model, max_batch_tokens=max_batch_tokens, concurrency=concurrency)
+  if backend == "hashing":
+    return HashingEmbedder(dim=hashing_dim)
+  if backend == "sentence-transformers":
+    return SentenceTransformerEmbedder(local_model)
+  raise ValueError(f"unknown embedding backend {backend!r}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
@@ -0,0 +1,359 @@
+"""
+NumPy flat vector index: a quantized, memory-mapped embedding matrix plus a SQLite metadata sidecar.
+
+Vectors are L2-normalized on insert and stored as int8 with a per-row float32 scale (default) or as
+float16, so cosine similarity is a chunked matrix product. int8 is the default: decoding it to float32
+is several times cheaper than float16 on CPUs without hardware half-float conversion. Metadata filters
+run in SQLite first and only the matching rows are scored. Row numbers are dense and stable:
+re-upserting an id overwrites its row in place.
+"""
+
+import json
+import re
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from alert_historian.narrative.embedding_cache import EmbeddingCache
+from alert_historian.narrative.embeddings import DEFAULT_BATCH_TOKENS, DEFAULT_CONCURRENCY
+from alert_historian.narrative.vector_store import COLLECTION_NAME, EXPORT_PAGE, VectorStoreBase
+
+FLAT_DTYPES = ("int8", "float16")
+SCORE_CHUNK_ROWS = 4096
+LOOKUP_CHUNK = 500
+INDEXED_METADATA_KEYS = ("topic", "day", "day_num")
+INT8_MAX = 127.0
+
+_METADATA_KEY_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_COMPARISON_OPS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _metadata_expr(key: str) -> str:
+  if not _METADATA_KEY_RE.match(key):
+    raise ValueError(f"unsupported metadata key in where filter: {key!r}")
+  # Literal path (not a bound parameter) so SQLite can use the expression indexes below.
+  return f"json_extract(metadata_json, '$.{key}')"
+
+
+def where_to_sql(where: dict[str, Any]) -> tuple[str, list[Any]]:
+  """Translate a Chroma-style `where` filter ($and/$or, $eq/$ne/$gt/$gte/$lt/$lte/$in/$nin) to SQL."""
+  clauses: list[str] = []
+  params: list[Any] = []
+  for key, value in where.items():
+    if key in ("$and", "$or"):
+      parts = [where_to_sql(sub) for sub in value]
+      joiner = " AND " if key == "$and" else " OR "
+      clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+      for _, sub_params in parts:
+        params.extend(sub_params)
+      continue
+    expr = _metadata_expr(key)
+    conditions = value if isinstance(value, dict) else {"$eq": value}
+    for op, operand in conditions.items():
+      if op in _COMPARISON_OPS:
+        clauses.append(f"{expr} {_COMPARISON_OPS[op]} ?")
+        params.append(operand)
+      elif op in ("$in", "$nin"):
+        operands = list(operand)
+        if not operands:
+          clauses.append("0" if op == "$in" else "1")
+          continue
+        placeholders = ",".join("?" for _ in operands)
+        clauses.append(f"{expr} {'IN' if op == '$in' else 'NOT IN'} ({placeholders})")
+        params.extend(operands)
+      else:
+        raise ValueError(f"unsupported where operator: {op!r}")
+  return " AND ".join(clauses) or "1", params
+
+
+class FlatVectorStore(VectorStoreBase):
+  """Drop-in alternative to AlertVectorStore with no ChromaDB import or server state."""
+
+  def __init__(
+      self,
+      persist_path: Path,
+      embedding_fn: Callable[[list[str]], list[list[float]]] | None = None,
+      *,
+      api_key: str = "",
+      embedding_model: str = "text-embedding-3-small",
+      embedding_cache: EmbeddingCache | None = None,
+      embedding_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+      embedding_concurrency: int = DEFAULT_CONCURRENCY,
+      collection_name: str = COLLECTION_NAME,
+      dtype: str = "int8",
+  ):
+    super().__init__(
+        embedding_fn,
+        api_key=api_key,
+        embedding_model=embedding_model,
+        embedding_cache=embedding_cache,
+        embedding_batch_tokens=embedding_batch_tokens,
+        embedding_concurrency=embedding_concurrency,
+    )
+    if dtype not in FLAT_DTYPES:
+      raise ValueError(f"unknown flat index dtype {dtype!r}; expected one of {', '.join(FLAT_DTYPES)}")
+    self._dir = Path(persist_path) / collection_name
+    self._dir.mkdir(parents=True, exist_ok=True)
+    self._vectors_path = self._dir / "vectors.bin"
+    self._scales_path = self._dir / "scales.bin"
+    self.conn = sqlite3.connect(str(self._dir / "metadata.db"))
+    self._init_schema()
+
+    stored_dtype = self._get_setting("dtype")
+    if stored_dtype is None:
+      self._set_setting("dtype", dtype)
+      stored_dtype = dtype
+    elif stored_dtype != dtype:
+      raise ValueError(f"flat index at {self._dir} was built with dtype {stored_dtype}, not {dtype}")
+    self.dtype = stored_dtype
+    dim = self._get_setting("dim")
+    self.dim = int(dim) if dim is not None else None
+    self.count = int(self.conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0])
+    self._matrix: np.ndarray | None = None
+    self._scales: np.ndarray | None = None
+    self._truncate_to_count()
+
+  def _init_schema(self) -> None:
+    self.conn.execute("""
+      CREATE TABLE IF NOT EXISTS index_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+      )
+    """)
+    self.conn.execute("""
+      CREATE TABLE IF NOT EXISTS rows (
+        row INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        document TEXT NOT NULL,
+        metadata_json TEXT NOT NULL
+      )
+    """)
+    for key in INDEXED_METADATA_KEYS:
+      self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_rows_{key} ON rows({_metadata_expr(key)})")
+    # Rows stored before `day_num` existed get it from their ISO `day`.
+    self.conn.execute("""
+      UPDATE rows SET metadata_json = json_set(
+        metadata_json, '$.day_num',
+        COALESCE(CAST(replace(substr(json_extract(metadata_json, '$.day'), 1, 10), '-', '') AS INTEGER), 0))
+      WHERE json_extract(metadata_json, '$.day_num') IS NULL
+    """)
+    self.conn.commit()
+
+  def _get_setting(self, key: str) -> str | None:
+    row = self.conn.execute("SELECT value FROM index_settings WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+  def _set_setting(self, key: str, value: str) -> None:
+    self.conn.execute(
+        "INSERT INTO index_settings(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value))
+    self.conn.commit()
+
+  def close(self) -> None:
+    self._matrix = None
+    self._scales = None
+    self.conn.close()
+
+  def drop(self) -> None:
+    self.close()
+    shutil.rmtree(self._dir, ignore_errors=True)
+
+  def export_rows(self, page_size: int = EXPORT_PAGE):
+    if self.count == 0:
+      return
+    matrix, scales = self._load()
+    for start in range(0, self.count, page_size):
+      rows = self.conn.execute(
+          "SELECT row, id, document, metadata_json FROM rows WHERE row >= ? AND row < ? ORDER BY row",
+          (start, start + page_size)).fetchall()
+      index = np.asarray([row for row, _, _, _ in rows], dtype=np.int64)
+      vectors = matrix[index].astype(np.float32)
+      if scales is not None:
+        vectors *= scales[index][:, None]
+      yield [
+          {"id": id_val, "document": document, "metadata": json.loads(metadata_json), "embedding": vector.tolist()}
+          for (_, id_val, document, metadata_json), vector in zip(rows, vectors)
+      ]
+
+  @property
+  def _row_dtype(self) -> np.dtype:
+    return np.dtype(np.float16 if self.dtype == "float16" else np.int8)
+
+  def _truncate_to_count(self) -> None:
+    # Vectors are appended before their metadata commits; drop rows a crashed upsert never recorded.
+    if self.dim is None:
+      return
+    for path, row_bytes in self._files():
+      expected = self.count * row_bytes
+      if path.exists() and path.stat().st_size > expected:
+        with path.open("r+b") as fh:
+          fh.truncate(expected)
+
+  def _files(self) -> list[tuple[Path, int]]:
+    files = [(self._vectors_path, self.dim * self._row_dtype.itemsize)]
+    if self.dtype == "int8":
+      files.append((self._scales_path, np.dtype(np.float32).itemsize))
+    return files
+
+  def _load(self) -> tuple[np.ndarray, np.ndarray | None]:
+    if self._matrix is None:
+      self._matrix = np.memmap(self._vectors_path, dtype=self._row_dtype, mode="r", shape=(self.count, self.dim))
+      if self.dtype == "int8":
+        self._scales = np.memmap(self._scales_path, dtype=np.float32, mode="r", shape=(self.count,))
+    return self._matrix, self._scales
+
+  def _encode(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+    if self.dtype == "float16":
+      return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / INT8_MAX
+    scales[scales == 0] = 1.0
+    quantized = np.rint(vectors / scales[:, None]).clip(-INT8_MAX, INT8_MAX).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+  def _existing_rows(self, ids: list[str]) -> dict[str, int]:
+    found: dict[str, int] = {}
+    for start in range(0, len(ids), LOOKUP_CHUNK):
+      chunk = ids[start:start + LOOKUP_CHUNK]
+      placeholders = ",".join("?" for _ in chunk)
+      found.update(self.conn.execute(f"SELECT id, row FROM rows WHERE id IN ({placeholders})", chunk).fetchall())
+    return found
+
+  def _upsert(
+      self,
+      ids: list[str],
+      embeddings: list[list[float]],
+      metadatas: list[dict],
+      documents: list[str],
+  ) -> None:
+    # Last occurrence wins when an id repeats within one call.
+    latest = {id_val: idx for idx, id_val in enumerate(ids)}
+    order = list(latest.values())
+    vectors = np.asarray([embeddings[i] for i in order], dtype=np.float32)
+    if vectors.ndim != 2:
+      raise ValueError("embeddings must be a non-empty list of equal-length vectors")
+    if self.dim is None:
+      self.dim = int(vectors.shape[1])
+      self._set_setting("dim", str(self.dim))
+    elif vectors.shape[1] != self.dim:
+      raise ValueError(f"embedding dimension {vectors.shape[1]} does not match flat index dimension {self.dim}")
+
+    encoded, scales = self._encode(vectors)
+    existing = self._existing_rows([ids[i] for i in order])
+    rows: list[int] = []
+    next_row = self.count
+    for i in order:
+      if ids[i] in existing:
+        rows.append(existing[ids[i]])
+      else:
+        rows.append(next_row)
+        next_row += 1
+    row_arr = np.asarray(rows, dtype=np.int64)
+    is_new = row_arr >= self.count
+
+    self._matrix = None
+    self._scales = None
+    if (~is_new).any():
+      matrix = np.memmap(self._vectors_path, dtype=self._row_dtype, mode="r+", shape=(self.count, self.dim))
+      matrix[row_arr[~is_new]] = encoded[~is_new]
+      matrix.flush()
+      del matrix
+      if scales is not None:
+        scale_map = np.memmap(self._scales_path, dtype=np.float32, mode="r+", shape=(self.count,))
+        scale_map[row_arr[~is_new]] = scales[~is_new]
+        scale_map.flush()
+        del scale_map
+    if is_new.any():
+      # New rows are numbered in order, so appending keeps file offsets equal to row numbers.
+      with self._vectors_path.open("ab") as fh:
+        fh.write(np.ascontiguousarray(encoded[is_new]).tobytes())
+      if scales is not None:
+        with self._scales_path.open("ab") as fh:
+          fh.write(np.ascontiguousarray(scales[is_new]).tobytes())
+
+    self.conn.executemany(
+        """
+        INSERT INTO rows(row, id, document, metadata_json) VALUES (?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET document = excluded.document, metadata_json = excluded.metadata_json
+        """,
+        ((row, ids[i], documents[i], json.dumps(metadatas[i])) for row, i in zip(rows, order)))
+    self.conn.commit()
+    self.count = next_row
+
+  def _candidate_rows(self, where: dict | None) -> np.ndarray | None:
+    if not where:
+      return None
+    sql, params = where_to_sql(where)
+    cur = self.conn.execute(f"SELECT row FROM rows WHERE {sql} ORDER BY row", params)
+    return np.fromiter((r[0] for r in cur), dtype=np.int64)
+
+  def _score(self, queries: np.ndarray, candidates: np.ndarray | None) -> np.ndarray:
+    """Cosine similarities, shape (len(queries), rows scored); rows are decoded once per chunk for all queries."""
+    matrix, scales = self._load()
+    total = self.count if candidates is None else len(candidates)
+    scores = np.empty((len(queries), total), dtype=np.float32)
+    # Decoding into a reused float32 buffer is the hot loop; astype() would allocate per chunk.
+    buf = np.empty((min(SCORE_CHUNK_ROWS, total), self.dim), dtype=np.float32)
+    for start in range(0, total, SCORE_CHUNK_ROWS):
+      end = min(start + SCORE_CHUNK_ROWS, total)
+      rows = slice(start, end) if candidates is None else candidates[start:end]
+      block = buf[:end - start]
+      block[...] = matrix[rows]
+      chunk_scores = queries @ block.T
+      if scales is not None:
+        chunk_scores *= scales[rows]
+      scores[:, start:end] = chunk_scores
+    return scores
+
+  def _search(self, queries: np.ndarray, n_results: int, where: dict | None) -> list[list[dict]]:
+    if self.count == 0 or n_results <= 0:
+      return [[] for _ in queries]
+    if queries.shape[1] != self.dim:
+      raise ValueError(f"query dimension {queries.shape[1]} does not match flat index dimension {self.dim}")
+    norms = np.linalg.norm(queries, axis=1, keepdims=True)
+    queries = np.divide(queries, norms, out=np.zeros_like(queries), where=norms > 0)
+
+    candidates = self._candidate_rows(where)
+    if candidates is not None and len(candidates) == 0:
+      return [[] for _ in queries]
+    scores = self._score(queries, candidates)
+    k = min(n_results, scores.shape[1])
+    hits: list[list[tuple[int, float]]] = []
+    for row_scores in scores:
+      top = np.argpartition(-row_scores, k - 1)[:k]
+      top = top[np.argsort(-row_scores[top], kind="stable")]
+      hits.append([
+          (int(candidates[i]) if candidates is not None else int(i), float(row_scores[i])) for i in top])
+
+    needed = sorted({row for query_hits in hits for row, _ in query_hits})
+    by_row: dict[int, tuple[str, str, str]] = {}
+    for start in range(0, len(needed), LOOKUP_CHUNK):
+      chunk = needed[start:start + LOOKUP_CHUNK]
+      placeholders = ",".join("?" for _ in chunk)
+      for row, id_val, document, metadata_json in self.conn.execute(
+          f"SELECT row, id, document, metadata_json FROM rows WHERE row IN ({placeholders})", chunk):
+        by_row[row] = (id_val, document, metadata_json)
+    return [
+        [
+            {
+                "id": by_row[row][0],
+                "document": by_row[row][1],
+                "metadata": json.loads(by_row[row][2]),
+                "distance": 1.0 - score,
+            }
+            for row, score in query_hits
+        ]
+        for query_hits in hits
+    ]
+
+  def _query_group(
+      self,
+      embeddings: list[list[float]],
+      n_results: int,
+      where: dict | None,
+  ) -> list[list[dict]]:
+    return self._search(np.asarray(embeddings, dtype=np.float32), n_results, where)
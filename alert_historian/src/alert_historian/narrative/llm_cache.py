@@ -0,0 +1,124 @@
+"""Disk-backed memoization for LLM clients, keyed by a hash of (model, system prompt, user prompt)."""
+
+import sqlite3
+import threading
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable
+
+LLMClient = Callable[[str, str | None], str]
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def prompt_key(model: str, system: str | None, user: str) -> str:
+  h = sha256()
+  # Length-prefix each part so ("ab", "c") and ("a", "bc") hash differently; None differs from "".
+  for part in (model, "\x00" if system is None else system, user):
+    encoded = part.encode("utf-8")
+    h.update(len(encoded).to_bytes(8, "big"))
+    h.update(encoded)
+  return h.hexdigest()
+
+
+class LLMResponseCache:
+  """SQLite store of LLM responses; least recently used entries are evicted past `max_bytes`."""
+
+  def __init__(self, path: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+    self.path = Path(path)
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self.max_bytes = max_bytes
+    self._lock = threading.Lock()
+    self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+    self.conn.execute("PRAGMA journal_mode=WAL")
+    self.conn.execute("""
+      CREATE TABLE IF NOT EXISTS llm_responses (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        response TEXT NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        last_used_at TEXT NOT NULL
+      )
+    """)
+    self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses(last_used_at)")
+    self.conn.commit()
+    self.hits = 0
+    self.misses = 0
+
+  def close(self) -> None:
+    with self._lock:
+      self.conn.close()
+
+  def get(self, key: str) -> str | None:
+    with self._lock:
+      row = self.conn.execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+      if row is None:
+        self.misses += 1
+        return None
+      self.hits += 1
+      self.conn.execute(
+          "UPDATE llm_responses SET last_used_at = ? WHERE key = ?", (datetime.utcnow().isoformat(), key))
+      self.conn.commit()
+      return row[0]
+
+  def put(self, key: str, model: str, response: str) -> None:
+    size = len(response.encode("utf-8"))
+    if size > self.max_bytes:
+      return
+    now = datetime.utcnow().isoformat()
+    with self._lock:
+      self.conn.execute(
+          """
+          INSERT INTO llm_responses(key, model, response, size_bytes, created_at, last_used_at)
+          VALUES (?, ?, ?, ?, ?, ?)
+          ON CONFLICT(key) DO UPDATE SET
+            response = excluded.response, size_bytes = excluded.size_bytes, last_used_at = excluded.last_used_at
+          """,
+          (key, model, response, size, now, now))
+      self._evict()
+      self.conn.commit()
+
+  def total_bytes(self) -> int:
+    with self._lock:
+      return int(self.conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM llm_responses").fetchone()[0])
+
+  def _evict(self) -> None:
+    total = int(self.conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM llm_responses").fetchone()[0])
+    if total <= self.max_bytes:
+      return
+    doomed: list[str] = []
+    for key, size in self.conn.execute("SELECT key, size_bytes FROM llm_responses ORDER BY last_used_at, key"):
+      if total <= self.max_bytes:
+        break
+      doomed.append(key)
+      total -= size
+    self.conn.executemany("DELETE FROM llm_responses WHERE key = ?", ((key,) for key in doomed))
+
+
+def cached_llm_client(
+    llm_client: LLMClient,
+    cache: LLMResponseCache,
+    model: str,
+    *,
+    bypass: bool = False,
+) -> LLMClient:
+  """
+  Wrap `llm_client` so identical (model, system, user) prompts are answered from `cache`.
+  With `bypass`, every prompt goes to the LLM and the cached answer is refreshed.
+  Empty responses are not cached.
+  """
+
+  def _call(user: str, system: str | None) -> str:
+    key = prompt_key(model, system, user)
+    if not bypass:
+      cached = cache.get(key)
+      if cached is not None:
+        return cached
+    response = llm_client(user, system)
+    if response:
+      cache.put(key, model, response)
+    return response
+
+  return _call
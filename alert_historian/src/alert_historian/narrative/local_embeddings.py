@@ -0,0 +1,108 @@
+"""CPU-only embedding backends that need no network: hashed character n-grams, or a local sentence-transformers model."""
+
+import numpy as np
+
+DEFAULT_HASHING_DIM = 512
+DEFAULT_NGRAM_SIZES = (3, 4, 5)
+DEFAULT_SENTENCE_TRANSFORMER = "all-MiniLM-L6-v2"
+MAX_DOCUMENT_CHARS = 4000
+# Bounds the n-gram index arrays built per call.
+EMBED_CHUNK_DOCS = 2048
+
+_HASH_BASE = np.uint64(1099511628211)
+_MIX_MULTIPLIER = np.uint64(0xFF51AFD7ED558CCD)
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+  # Murmur3 finalizer step: spreads low-entropy polynomial hashes across all 64 bits.
+  h = h ^ (h >> np.uint64(33))
+  h = h * _MIX_MULTIPLIER
+  return h ^ (h >> np.uint64(33))
+
+
+class HashingEmbedder:
+  """
+  Deterministic hashed character n-gram embeddings (the "hashing trick"), vectorized over a whole batch.
+  Each n-gram is hashed to a signed bucket; counts are log-scaled and rows L2-normalized, so cosine
+  distance tracks shared phrasing. No vocabulary or corpus state, so vectors are stable across runs.
+  """
+
+  def __init__(self, dim: int = DEFAULT_HASHING_DIM, ngram_sizes: tuple[int, ...] = DEFAULT_NGRAM_SIZES):
+    self.dim = dim
+    self.ngram_sizes = tuple(sorted(set(ngram_sizes)))
+    self.model_id = f"hashing-ngram{''.join(str(n) for n in self.ngram_sizes)}-{dim}"
+
+  def __call__(self, texts: list[str]) -> list[list[float]]:
+    return self.embed_array(texts).tolist()
+
+  def embed_array(self, texts: list[str]) -> np.ndarray:
+    if not texts:
+      return np.zeros((0, self.dim), dtype=np.float32)
+    return np.vstack([self._embed_chunk(texts[start:start + EMBED_CHUNK_DOCS])
+                      for start in range(0, len(texts), EMBED_CHUNK_DOCS)])
+
+  def _embed_chunk(self, texts: list[str]) -> np.ndarray:
+    out = np.zeros((len(texts), self.dim), dtype=np.float32)
+    # Pad each document with spaces so word boundaries form n-grams, and join into one byte buffer.
+    encoded = [f" {' '.join(t.lower().split())[:MAX_DOCUMENT_CHARS]} ".encode("utf-8") for t in texts]
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    buf = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    doc_ids = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+
+    rows: list[np.ndarray] = []
+    cols: list[np.ndarray] = []
+    signs: list[np.ndarray] = []
+    for n in self.ngram_sizes:
+      windows = len(buf) - n + 1
+      if windows <= 0:
+        continue
+      h = np.full(windows, np.uint64(n), dtype=np.uint64)
+      for k in range(n):
+        h = h * _HASH_BASE + buf[k:k + windows]
+      # Drop windows that span two documents.
+      valid = doc_ids[:windows] == doc_ids[n - 1:n - 1 + windows]
+      h = _mix(h[valid])
+      rows.append(doc_ids[:windows][valid])
+      cols.append((h % np.uint64(self.dim)).astype(np.int64))
+      signs.append(np.where((h >> np.uint64(63)) == 0, 1.0, -1.0).astype(np.float32))
+
+    if rows:
+      flat = np.concatenate(rows) * self.dim + np.concatenate(cols)
+      counts = np.bincount(flat, weights=np.concatenate(signs), minlength=out.size)
+      out = counts.reshape(out.shape).astype(np.float32)
+      out = np.sign(out) * np.log1p(np.abs(out))
+      norms = np.linalg.norm(out, axis=1, keepdims=True)
+      np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+
+class SentenceTransformerEmbedder:
+  """Embed with a locally installed sentence-transformers model (loaded on first use)."""
+
+  def __init__(self, model_name: str = DEFAULT_SENTENCE_TRANSFORMER, batch_size: int = 64):
+    self.model_name = model_name
+    self.batch_size = batch_size
+    self.model_id = f"sentence-transformers:{model_name}"
+    self._model = None
+
+  def __call__(self, texts: list[str]) -> list[list[float]]:
+    if self._model is None:
+      try:
+        from sentence_transformers import SentenceTransformer
+      except ImportError as e:
+        raise RuntimeError(
+            "embedding backend 'sentence-transformers' requires the sentence-transformers package "
+            "(pip install 'alert-historian[local-embeddings]')"
+        ) from e
+      self._model = SentenceTransformer(self.model_name, device="cpu")
+    vectors = self._model.encode(
+        texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True)
+    return vectors.astype(np.float32).tolist()
+
+
+def sentence_transformers_available() -> bool:
+  try:
+    import sentence_transformers  # noqa: F401
+  except ImportError:
+    return False
+  return True
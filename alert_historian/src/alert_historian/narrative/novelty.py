@@ -0,0 +1,85 @@
+"""
+Novelty gating: classify today's items by cosine distance to their nearest stored neighbour of the
+same topic, and skip the narrative LLM calls for topics where nothing is meaningfully new.
+"""
+
+from dataclasses import dataclass, field
+
+from alert_historian.state.store import PendingSyncItem
+
+NOVELTY_LABELS = ("new", "continuing", "redundant")
+DEFAULT_REDUNDANT_DISTANCE = 0.08
+DEFAULT_NEW_DISTANCE = 0.35
+
+
+def classify_distance(
+    distance: float | None,
+    *,
+    redundant_below: float = DEFAULT_REDUNDANT_DISTANCE,
+    new_above: float = DEFAULT_NEW_DISTANCE,
+) -> str:
+  """`new` without a close neighbour, `redundant` for near-copies, `continuing` in between."""
+  if distance is None or distance >= new_above:
+    return "new"
+  if distance <= redundant_below:
+    return "redundant"
+  return "continuing"
+
+
+@dataclass
+class TopicNovelty:
+  topic: str
+  counts: dict[str, int] = field(default_factory=lambda: dict.fromkeys(NOVELTY_LABELS, 0))
+  max_distance: float | None = None
+
+  @property
+  def skip(self) -> bool:
+    return self.counts["new"] == 0 and self.counts["continuing"] == 0
+
+
+@dataclass
+class NoveltyReport:
+  topics: dict[str, TopicNovelty]
+  item_labels: dict[str, str]
+
+  @property
+  def active_topics(self) -> list[str]:
+    return sorted(t for t, novelty in self.topics.items() if not novelty.skip)
+
+  @property
+  def skipped_topics(self) -> list[str]:
+    return sorted(t for t, novelty in self.topics.items() if novelty.skip)
+
+  def filter_items(self, items: list[PendingSyncItem]) -> list[PendingSyncItem]:
+    """Items of topics that still go to the LLM."""
+    active = set(self.active_topics)
+    return [item for item in items if item.topic in active]
+
+  def markdown(self) -> str:
+    lines = []
+    for topic, novelty in sorted(self.topics.items()):
+      counts = ", ".join(f"{novelty.counts[label]} {label}" for label in NOVELTY_LABELS)
+      decision = "skipped (nothing new)" if novelty.skip else "narrative updated"
+      lines.append(f"- {topic}: {counts}; {decision}")
+    return "\n".join(lines)
+
+
+def score_novelty(
+    items: list[PendingSyncItem],
+    nearest: dict[str, float | None],
+    *,
+    redundant_below: float = DEFAULT_REDUNDANT_DISTANCE,
+    new_above: float = DEFAULT_NEW_DISTANCE,
+) -> NoveltyReport:
+  """Label each item from its nearest-neighbour distance (`VectorStoreBase.nearest_distances`) and roll up per topic."""
+  topics: dict[str, TopicNovelty] = {}
+  labels: dict[str, str] = {}
+  for item in items:
+    distance = nearest.get(item.item_key)
+    label = classify_distance(distance, redundant_below=redundant_below, new_above=new_above)
+    labels[item.item_key] = label
+    novelty = topics.setdefault(item.topic, TopicNovelty(item.topic))
+    novelty.counts[label] += 1
+    effective = 1.0 if distance is None else distance
+    novelty.max_distance = effective if novelty.max_distance is None else max(novelty.max_distance, effective)
+  return NoveltyReport(topics=dict(sorted(topics.items())), item_labels=labels)
@@ -0,0 +1,308 @@
+"""
+Time-partitioned vector store: one collection per month (`<collection>__p2026_02`) behind the
+`VectorStoreBase` interface, so index size and query cost follow the retrieval window, not all history.
+
+Queries fan out only to the partitions overlapping the `day_num` range of their `where` filter and
+results are merged by distance. Partitions older than a horizon are compacted to a few representative
+items per topic (the rollup collection keeps their summaries). A JSON manifest next to the store
+records each month's collection; an existing unpartitioned collection is migrated on first open.
+"""
+
+import json
+import os
+import tempfile
+from collections import OrderedDict, defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from alert_historian.narrative.vector_store import (
+    COLLECTION_NAME,
+    COLLECTION_NAME_MAX_LEN,
+    EXPORT_PAGE,
+    VectorStoreBase,
+    create_vector_store,
+    day_number,
+)
+
+PARTITION_MARKER = "__p"
+UNDATED_PARTITION = "undated"
+MAX_OPEN_PARTITIONS = 16
+DEFAULT_COMPACT_AFTER_MONTHS = 12
+DEFAULT_REPRESENTATIVES_PER_TOPIC = 20
+
+
+def partition_key(metadata: dict) -> str:
+  """`YYYY_MM` of the item's day, or `undated`."""
+  number = metadata.get("day_num") or day_number(metadata.get("day"))
+  return f"{number // 10000:04d}_{number // 100 % 100:02d}" if number else UNDATED_PARTITION
+
+
+def _month_number(key: str) -> int:
+  return 0 if key == UNDATED_PARTITION else int(key.replace("_", ""))
+
+
+def day_bounds(where: dict | None) -> tuple[int | None, int | None]:
+  """Inclusive `day_num` range implied by a `where` filter; None where unbounded (`$or` is not narrowed)."""
+  low: int | None = None
+  high: int | None = None
+  for key, value in (where or {}).items():
+    if key == "$and":
+      for sub in value:
+        sub_low, sub_high = day_bounds(sub)
+        low = sub_low if low is None else max(low, sub_low or low)
+        high = sub_high if high is None else min(high, sub_high or high)
+    elif key == "day_num":
+      conditions = value if isinstance(value, dict) else {"$eq": value}
+      for op, operand in conditions.items():
+        if op in ("$gte", "$gt", "$eq"):
+          low = max(low or 0, int(operand) + (op == "$gt"))
+        if op in ("$lte", "$lt", "$eq"):
+          bound = int(operand) - (op == "$lt")
+          high = bound if high is None else min(high, bound)
+  return low, high
+
+
+def select_representatives(rows: list[dict], per_topic: int) -> list[dict]:
+  """
+  Up to `per_topic` rows per topic by farthest-point sampling, starting from the row nearest the topic
+  centroid, so distinct stories survive. Each kept row's metadata gains `represents`: how many of the
+  topic's rows are closest to it.
+  """
+  by_topic: dict[str, list[dict]] = defaultdict(list)
+  for row in rows:
+    by_topic[row["metadata"].get("topic", "")].append(row)
+  kept: list[dict] = []
+  for _, members in sorted(by_topic.items()):
+    vectors = np.asarray([m["embedding"] for m in members], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+    chosen = [int(np.argmax(vectors @ vectors.mean(axis=0)))]
+    closest = vectors @ vectors[chosen[0]]
+    while len(chosen) < min(per_topic, len(members)):
+      candidate = int(np.argmin(closest))
+      if closest[candidate] >= 1.0 - 1e-6:
+        break  # everything left duplicates a chosen row
+      chosen.append(candidate)
+      closest = np.maximum(closest, vectors @ vectors[candidate])
+    counts = np.bincount(np.argmax(vectors @ vectors[chosen].T, axis=1), minlength=len(chosen))
+    for slot, idx in enumerate(chosen):
+      member = members[idx]
+      kept.append({**member, "metadata": {**member["metadata"], "represents": int(counts[slot])}})
+  return kept
+
+
+class PartitionedVectorStore(VectorStoreBase):
+  """Monthly partitions of one backend's collection, opened lazily (at most `max_open` at a time)."""
+
+  def __init__(
+      self,
+      backend: str,
+      persist_path: Path,
+      embedding_fn: Callable[[list[str]], list[list[float]]] | None = None,
+      *,
+      collection_name: str = COLLECTION_NAME,
+      flat_dtype: str = "int8",
+      max_open: int = MAX_OPEN_PARTITIONS,
+      **kwargs,
+  ):
+    super().__init__(embedding_fn, **kwargs)
+    self._backend = backend
+    self._persist_path = Path(persist_path)
+    self._persist_path.mkdir(parents=True, exist_ok=True)
+    self._collection_name = collection_name
+    self._flat_dtype = flat_dtype
+    self._max_open = max(1, max_open)
+    self._open: OrderedDict[str, VectorStoreBase] = OrderedDict()
+    self._manifest_path = self._persist_path / f"{collection_name}.partitions.json"
+    self._manifest = self._load_manifest()
+    if not self._manifest.get("migrated"):
+      self._migrate_unpartitioned()
+
+  @property
+  def partitions(self) -> dict[str, dict]:
+    """Manifest entries by `YYYY_MM` key: collection name (None once compacted away) and `compacted`."""
+    return dict(sorted(self._manifest["partitions"].items()))
+
+  def _load_manifest(self) -> dict:
+    if self._manifest_path.exists():
+      return json.loads(self._manifest_path.read_text(encoding="utf-8"))
+    return {"migrated": False, "partitions": {}}
+
+  def _save_manifest(self) -> None:
+    fd, tmp_name = tempfile.mkstemp(dir=self._persist_path, prefix=self._manifest_path.name, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+      json.dump(self._manifest, fh, indent=2, sort_keys=True)
+    os.replace(tmp_name, self._manifest_path)
+
+  def _collection_for(self, key: str, generation: str = "") -> str:
+    suffix = f"{PARTITION_MARKER}{key}{generation}"
+    return self._collection_name[:COLLECTION_NAME_MAX_LEN - len(suffix)] + suffix
+
+  def _open_collection(self, name: str) -> VectorStoreBase:
+    return create_vector_store(
+        self._backend,
+        self._persist_path,
+        self._embed,
+        flat_dtype=self._flat_dtype,
+        embedding_model=self._embedding_model,
+        collection_name=name,
+    )
+
+  def _partition(self, key: str, *, create: bool) -> VectorStoreBase | None:
+    entry = self._manifest["partitions"].get(key)
+    if entry is None:
+      if not create:
+        return None
+      entry = self._manifest["partitions"][key] = {"collection": self._collection_for(key), "compacted": False}
+      self._save_manifest()
+    if entry["collection"] is None:
+      if not create:
+        return None
+      entry["collection"] = self._collection_for(key, "_c")
+      self._save_manifest()
+    store = self._open.pop(key, None) or self._open_collection(entry["collection"])
+    self._open[key] = store
+    while len(self._open) > self._max_open:
+      _, evicted = self._open.popitem(last=False)
+      evicted.close()
+    return store
+
+  def _migrate_unpartitioned(self) -> None:
+    """Re-route an existing single collection of the same name into partitions, then drop it."""
+    legacy = self._open_collection(self._collection_name)
+    try:
+      for page in legacy.export_rows():
+        self._upsert(
+            [row["id"] for row in page],
+            [row["embedding"] for row in page],
+            [row["metadata"] for row in page],
+            [row["document"] for row in page],
+        )
+      self._manifest["migrated"] = True
+      self._save_manifest()
+      legacy.drop()
+    finally:
+      legacy.close()
+
+  def _upsert(
+      self,
+      ids: list[str],
+      embeddings: list[list[float]],
+      metadatas: list[dict],
+      documents: list[str],
+  ) -> None:
+    groups: dict[str, list[int]] = defaultdict(list)
+    for idx, metadata in enumerate(metadatas):
+      groups[partition_key(metadata)].append(idx)
+    for key, indices in sorted(groups.items()):
+      self._partition(key, create=True)._upsert(
+          [ids[i] for i in indices],
+          [embeddings[i] for i in indices],
+          [metadatas[i] for i in indices],
+          [documents[i] for i in indices],
+      )
+
+  def _query_groups(
+      self,
+      groups: list[tuple[list[list[float]], dict | None]],
+      n_results: int,
+  ) -> list[list[list[dict]]]:
+    # Partitions on the outside, so each one is opened at most once per call however many filters
+    # (e.g. one per topic) it serves.
+    bounds = [day_bounds(where) for _, where in groups]
+    merged: list[list[list[dict]]] = [[[] for _ in embeddings] for embeddings, _ in groups]
+    for key in self.partitions:
+      month = _month_number(key)
+      wanted = [
+          idx for idx, (low, high) in enumerate(bounds)
+          if not ((low is not None and month < low // 100) or (high is not None and month > high // 100))
+      ]
+      if not wanted:
+        continue
+      store = self._partition(key, create=False)
+      if store is None:
+        continue
+      for idx in wanted:
+        embeddings, where = groups[idx]
+        for out, rows in zip(merged[idx], store._query_group(embeddings, n_results, where)):
+          out.extend(rows)
+    return [
+        [sorted(rows, key=lambda r: 1.0 if r["distance"] is None else r["distance"])[:n_results] for rows in group]
+        for group in merged
+    ]
+
+  def _query_group(
+      self,
+      embeddings: list[list[float]],
+      n_results: int,
+      where: dict | None,
+  ) -> list[list[dict]]:
+    return self._query_groups([(embeddings, where)], n_results)[0]
+
+  def compact(
+      self,
+      *,
+      today: date,
+      keep_months: int = DEFAULT_COMPACT_AFTER_MONTHS,
+      representatives_per_topic: int = DEFAULT_REPRESENTATIVES_PER_TOPIC,
+  ) -> dict[str, tuple[int, int]]:
+    """
+    Reduce each dated partition older than `keep_months` whole months before `today` to
+    `select_representatives` (0 drops its items; rollups then stand in). Each compacted partition is
+    rewritten into a fresh collection before the old one is dropped. Returns {key: (before, after)}.
+    """
+    if keep_months <= 0:
+      return {}
+    cutoff = today.year * 12 + today.month - 1 - keep_months
+    compacted: dict[str, tuple[int, int]] = {}
+    for key, entry in self.partitions.items():
+      month = _month_number(key)
+      if entry["compacted"] or not month or (month // 100) * 12 + month % 100 - 1 >= cutoff:
+        continue
+      old = self._partition(key, create=False)
+      rows = [row for page in old.export_rows() for row in page] if old is not None else []
+      kept = select_representatives(rows, representatives_per_topic) if representatives_per_topic > 0 else []
+      new_name = None
+      if kept:
+        new_name = self._collection_for(key, "_c")
+        new = self._open_collection(new_name)
+        try:
+          new._upsert(
+              [row["id"] for row in kept],
+              [row["embedding"] for row in kept],
+              [row["metadata"] for row in kept],
+              [row["document"] for row in kept],
+          )
+        finally:
+          new.close()
+      self._manifest["partitions"][key] = {"collection": new_name, "compacted": True}
+      self._save_manifest()
+      if old is not None:
+        self._open.pop(key, None)
+        old.drop()
+        old.close()
+      compacted[key] = (len(rows), len(kept))
+    return compacted
+
+  def export_rows(self, page_size: int = EXPORT_PAGE):
+    for key in self.partitions:
+      store = self._partition(key, create=False)
+      if store is not None:
+        yield from store.export_rows(page_size)
+
+  def drop(self) -> None:
+    for key in self.partitions:
+      store = self._partition(key, create=False)
+      if store is not None:
+        self._open.pop(key, None)
+        store.drop()
+        store.close()
+    self._manifest_path.unlink(missing_ok=True)
+
+  def close(self) -> None:
+    while self._open:
+      _, store = self._open.popitem()
+      store.close()
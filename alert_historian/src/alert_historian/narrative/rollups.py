@@ -0,0 +1,222 @@
+"""
+Hierarchical rollups: per-topic daily summaries of items, weekly summaries of daily ones and monthly
+summaries of weekly ones, stored in the state DB.
+
+Rollups are built incrementally: only closed periods (ending before today) without a summary yet are
+sent to the LLM, and only once all of their parts are summarized. A week is an ISO week (Monday-Sunday)
+and belongs to the month of its Thursday, so every week rolls up into exactly one month. Prompts then
+take a fixed-size pyramid of the most recent summaries per level instead of raw history.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable
+
+from alert_historian.narrative.context_packer import ContextPacker, ContextSection
+from alert_historian.narrative.vector_store import day_number
+from alert_historian.state.store import RollupSummary, StateStore
+
+ROLLUP_LEVELS = ("day", "week", "month")
+PYRAMID_SIZES = {"month": 3, "week": 4, "day": 7}
+DEFAULT_ROLLUP_WORKERS = 4
+ROLLUP_COLLECTION_SUFFIX = "__rollups"
+
+ROLLUP_SYSTEM_PROMPT = """You summarize Google Alert activity on one topic for one period.
+Write 2-4 sentences covering the main developments, named organizations and any shift in direction.
+Output ONLY the summary text: no heading, no preamble."""
+
+ROLLUP_USER_TEMPLATE = """Topic: {topic}
+Period: {level} {period} ({start_day} to {end_day})
+
+{source_label}:
+{entries}
+
+Write the {level} summary:"""
+
+_SOURCE_LABELS = {"day": "Items", "week": "Daily summaries", "month": "Weekly summaries"}
+
+
+@dataclass
+class RollupResult:
+  created: list[RollupSummary] = field(default_factory=list)
+  failed: dict[str, str] = field(default_factory=dict)
+
+  def counts(self) -> dict[str, int]:
+    return {level: sum(1 for r in self.created if r.level == level) for level in ROLLUP_LEVELS}
+
+
+def iso_week(day: date) -> tuple[str, date, date]:
+  """ISO week label with its Monday and Sunday."""
+  year, week, _ = day.isocalendar()
+  monday = day - timedelta(days=day.weekday())
+  return f"{year}-W{week:02d}", monday, monday + timedelta(days=6)
+
+
+def month_of_week(monday: date) -> str:
+  thursday = monday + timedelta(days=3)
+  return f"{thursday.year}-{thursday.month:02d}"
+
+
+def month_bounds(period: str) -> tuple[date, date]:
+  """First Monday and last Sunday of the weeks assigned to month `period` (YYYY-MM)."""
+  year, month = (int(part) for part in period.split("-"))
+  first = date(year, month, 1)
+  next_first = date(year + month // 12, month % 12 + 1, 1)
+  first_thursday = first + timedelta(days=(3 - first.weekday()) % 7)
+  last_thursday = next_first - timedelta(days=1)
+  last_thursday -= timedelta(days=(last_thursday.weekday() - 3) % 7)
+  return first_thursday - timedelta(days=3), last_thursday + timedelta(days=3)
+
+
+def rollup_collection_name(collection_name: str, max_len: int = 63) -> str:
+  return collection_name[:max_len - len(ROLLUP_COLLECTION_SUFFIX)] + ROLLUP_COLLECTION_SUFFIX
+
+
+def rollup_id(rollup: RollupSummary) -> str:
+  return f"rollup:{rollup.level}:{rollup.period}:{rollup.topic}"
+
+
+def _pending_weeks(
+    store: StateStore,
+    today: date,
+    blocked: set[tuple[str, str]] = frozenset(),
+) -> list[tuple[str, str, date, date, list[RollupSummary]]]:
+  done = {(r.topic, r.period) for r in store.get_rollups("week")}
+  grouped: dict[tuple[str, str], list[RollupSummary]] = defaultdict(list)
+  bounds: dict[str, tuple[date, date]] = {}
+  for daily in store.get_rollups("day"):
+    label, monday, sunday = iso_week(date.fromisoformat(daily.period))
+    if sunday < today and (daily.topic, label) not in done and (daily.topic, label) not in blocked:
+      grouped[(daily.topic, label)].append(daily)
+      bounds[label] = (monday, sunday)
+  return [(topic, label, *bounds[label], sources) for (topic, label), sources in sorted(grouped.items())]
+
+
+def _pending_months(
+    store: StateStore,
+    today: date,
+    blocked: set[tuple[str, str]] = frozenset(),
+) -> list[tuple[str, str, date, date, list[RollupSummary]]]:
+  done = {(r.topic, r.period) for r in store.get_rollups("month")}
+  grouped: dict[tuple[str, str], list[RollupSummary]] = defaultdict(list)
+  for weekly in store.get_rollups("week"):
+    label = month_of_week(date.fromisoformat(weekly.start_day))
+    if (weekly.topic, label) not in done and (weekly.topic, label) not in blocked:
+      grouped[(weekly.topic, label)].append(weekly)
+  pending = []
+  for (topic, label), sources in sorted(grouped.items()):
+    start, end = month_bounds(label)
+    if end < today:
+      pending.append((topic, label, start, end, sources))
+  return pending
+
+
+def _unfinished_weeks(store: StateStore, today: date) -> dict[tuple[str, str], date]:
+  """(topic, week) -> Monday for weeks with a closed day whose daily summary is still missing (capped or failed)."""
+  weeks: dict[tuple[str, str], date] = {}
+  for topic, day in store.unsummarized_topic_days(today.isoformat()):
+    label, monday, _ = iso_week(date.fromisoformat(day))
+    weeks[(topic, label)] = monday
+  return weeks
+
+
+def build_rollups(
+    store: StateStore,
+    llm_client: Callable[[str, str | None], str],
+    *,
+    today: date,
+    packer: ContextPacker | None = None,
+    max_workers: int = DEFAULT_ROLLUP_WORKERS,
+    max_periods: int | None = None,
+) -> RollupResult:
+  """
+  Summarize closed, not yet summarized periods bottom-up (days, then weeks, then months), up to
+  `max_periods` LLM calls per level. Failed or empty summaries are retried on the next run, and a week
+  (month) waits until every day (week) in it with items has its summary.
+  """
+  packer = packer or ContextPacker()
+  result = RollupResult()
+
+  def summarize(level: str, topic: str, period: str, start: str, end: str, entries: list[str]) -> RollupSummary:
+    header = {"topic": topic, "level": level, "period": period, "start_day": start, "end_day": end,
+              "source_label": _SOURCE_LABELS[level]}
+    fixed = ROLLUP_SYSTEM_PROMPT + ROLLUP_USER_TEMPLATE.format(**header, entries="")
+    packed = packer.pack(fixed, [ContextSection("entries", entries)])
+    user = ROLLUP_USER_TEMPLATE.format(**header, entries=packed.sections["entries"])
+    summary = packer.call(llm_client, f"rollup:{level}:{topic}", user, ROLLUP_SYSTEM_PROMPT, packed).strip()
+    if not summary:
+      raise ValueError("empty LLM response")
+    return RollupSummary(topic, level, period, start, end, summary, len(entries))
+
+  def run_level(level: str, jobs: list[tuple]) -> None:
+    jobs = jobs[:max_periods] if max_periods is not None else jobs
+    if not jobs:
+      return
+    created: list[RollupSummary] = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+      futures = {(level, job[0], job[1]): pool.submit(summarize, level, *job) for job in jobs}
+      for (lvl, topic, period), future in futures.items():
+        try:
+          created.append(future.result())
+        except Exception as e:
+          result.failed[f"{lvl}:{period}:{topic}"] = str(e)
+    store.save_rollups(created)
+    result.created.extend(created)
+
+  day_jobs = []
+  for topic, day in store.unsummarized_topic_days(today.isoformat()):
+    items = store.items_for_topic_day(topic, day)
+    day_jobs.append((topic, day, day, day, [f"- {i.title}: {i.snippet}" if i.snippet else f"- {i.title}" for i in items]))
+  run_level("day", day_jobs)
+
+  # A period is only summarized once all of its parts are, since it is never rebuilt afterwards.
+  unfinished = _unfinished_weeks(store, today)
+  run_level("week", [
+      (topic, label, start.isoformat(), end.isoformat(), [f"- {s.period}: {s.summary}" for s in sources])
+      for topic, label, start, end, sources in _pending_weeks(store, today, set(unfinished))
+  ])
+  unfinished.update(
+      ((topic, label), monday) for topic, label, monday, _, _ in _pending_weeks(store, today, set(unfinished)))
+  run_level("month", [
+      (topic, label, start.isoformat(), end.isoformat(), [f"- {s.period}: {s.summary}" for s in sources])
+      for topic, label, start, end, sources in _pending_months(
+          store, today, {(topic, month_of_week(monday)) for (topic, _), monday in unfinished.items()})
+  ])
+  return result
+
+
+def summary_pyramid(
+    store: StateStore,
+    topic: str,
+    *,
+    today: date,
+    sizes: dict[str, int] = PYRAMID_SIZES,
+) -> list[str]:
+  """
+  The most recent `sizes[level]` summaries of each level for `topic`, coarse to fine and oldest first,
+  so packing with `newest_last` keeps the most recent, finest entries when the budget is tight.
+  """
+  entries: list[str] = []
+  for level in ("month", "week", "day"):
+    size = sizes.get(level, 0)
+    if size > 0:
+      recent = store.get_rollups(level, topic=topic, end_before=today.isoformat())[-size:]
+      entries.extend(f"- [{level} {r.period}] {r.summary}" for r in recent)
+  return entries
+
+
+def upsert_rollups(vector_store, rollups: list[RollupSummary]) -> int:
+  """Embed rollups into a vector store (a separate collection from items) for semantic retrieval."""
+  if not rollups:
+    return 0
+  return vector_store.upsert_documents(
+      [rollup_id(r) for r in rollups],
+      [r.summary for r in rollups],
+      [
+          {"topic": r.topic, "level": r.level, "period": r.period, "day": r.start_day,
+           "day_num": day_number(r.start_day), "title": r.summary[:200]}
+          for r in rollups
+      ],
+  )
@@ -0,0 +1,62 @@
+"""
+Search over the alert history: BM25 full-text search in the state DB, optionally fused with vector
+nearest neighbours by reciprocal rank fusion (each list contributes 1 / (k + rank) per item).
+"""
+
+from dataclasses import dataclass, field
+
+from alert_historian.narrative.vector_store import VectorStoreBase, window_where
+from alert_historian.state.store import PendingSyncItem, StateStore
+
+RRF_K = 60
+DEFAULT_SEARCH_LIMIT = 20
+CANDIDATES_PER_LIST = 3
+
+
+@dataclass
+class SearchHit:
+  item: PendingSyncItem
+  score: float
+  ranks: dict[str, int] = field(default_factory=dict)
+
+
+def reciprocal_rank_fusion(rankings: dict[str, list[str]], *, k: int = RRF_K) -> list[tuple[str, float, dict[str, int]]]:
+  """Fuse ranked id lists into (id, score, {list name: 1-based rank}), best first; ties keep first-seen order."""
+  scores: dict[str, float] = {}
+  ranks: dict[str, dict[str, int]] = {}
+  for name, ids in rankings.items():
+    for rank, id_val in enumerate(ids, start=1):
+      scores[id_val] = scores.get(id_val, 0.0) + 1.0 / (k + rank)
+      ranks.setdefault(id_val, {})[name] = rank
+  return [(id_val, scores[id_val], ranks[id_val]) for id_val in sorted(scores, key=lambda i: -scores[i])]
+
+
+def search_history(
+    store: StateStore,
+    text: str,
+    *,
+    vector_store: VectorStoreBase | None = None,
+    topic: str | None = None,
+    start_day: str | None = None,
+    end_day: str | None = None,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+) -> list[SearchHit]:
+  """
+  Full-text hits for `text`, best first. With `vector_store`, its nearest neighbours under the same
+  topic and day filters are fused in; each list contributes `CANDIDATES_PER_LIST * limit` candidates.
+  """
+  if vector_store is None:
+    return [SearchHit(item, score, {"bm25": rank}) for rank, (item, score) in enumerate(
+        store.search_items(text, topic=topic, start_day=start_day, end_day=end_day, limit=limit), start=1)]
+
+  depth = CANDIDATES_PER_LIST * limit
+  lexical = store.search_items(text, topic=topic, start_day=start_day, end_day=end_day, limit=depth)
+  semantic = vector_store.query(text, n_results=depth, where=window_where(topic, start_day, end_day))
+  items = {item.item_key: item for item, _ in lexical}
+  items.update(store.items_by_keys(r["id"] for r in semantic if r["id"] not in items))
+  fused = reciprocal_rank_fusion({
+      "bm25": [item.item_key for item, _ in lexical],
+      # Ids the state DB does not know (e.g. rollups) are not items.
+      "vector": [r["id"] for r in semantic if r["id"] in items],
+  })
+  return [SearchHit(items[id_val], score, ranks) for id_val, score, ranks in fused[:limit]]
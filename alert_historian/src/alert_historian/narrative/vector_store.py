@@ -1,87 +1,206 @@
-"""ChromaDB-backed vector store for alert items."""
+"""Vector stores for alert items: ChromaDB-backed by default, or the NumPy flat index in `flat_index`."""
 
+import json
+import re
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import date
 from pathlib import Path
 from typing import Callable
 
+from alert_historian.narrative.embedding_cache import EmbeddingCache
+from alert_historian.narrative.embeddings import DEFAULT_BATCH_TOKENS, DEFAULT_CONCURRENCY, create_openai_embedding_fn
 from alert_historian.state.store import PendingSyncItem
 
 COLLECTION_NAME = "alert_items"
+COLLECTION_NAME_MAX_LEN = 63
+VECTOR_BACKENDS = ("chroma", "flat")
+VECTOR_PARTITIONINGS = ("none", "month")
+TOPIC_QUERY_ITEMS = 5
+TOPIC_QUERY_MAX_CHARS = 1000
+RECENCY_OVERFETCH = 4
+DAY_BACKFILL_PAGE = 5000
+# Collection metadata flag set once every stored item has `day_num`.
+DAY_BACKFILL_FLAG = "day_num_backfilled"
+EXPORT_PAGE = 2000
 
 
-def _default_embedding_fn(
-    texts: list[str],
-    *,
-    api_key: str,
-    model: str = "text-embedding-3-small",
-) -> list[list[float]]:
-  """Embed texts using OpenAI API."""
-  from openai import OpenAI
+def collection_name_for_model(model_id: str) -> str:
+  """OpenAI models keep the original collection; other backends get their own, since dimensions differ."""
+  if not model_id or model_id.startswith("text-embedding-"):
+    return COLLECTION_NAME
+  slug = re.sub(r"[^a-zA-Z0-9._-]+", "-", model_id).strip("-._")
+  return f"{COLLECTION_NAME}__{slug}"[:COLLECTION_NAME_MAX_LEN].rstrip("-._")
 
-  client = OpenAI(api_key=api_key)
-  resp = client.embeddings.create(input=texts, model=model)
-  return [e.embedding for e in resp.data]
 
+def item_document(item: PendingSyncItem) -> str:
+  return f"{item.title}\n{item.snippet}".strip() or item.url
+
+
+def day_number(day: str | None) -> int:
+  """YYYY-MM-DD as the sortable integer YYYYMMDD, so `where` filters can range over days; 0 if unparseable."""
+  try:
+    parsed = date.fromisoformat(str(day)[:10])
+  except ValueError:
+    return 0
+  return parsed.year * 10000 + parsed.month * 100 + parsed.day
+
+
+def _day_from_number(value) -> date | None:
+  try:
+    number = int(value)
+    return date(number // 10000, number // 100 % 100, number % 100)
+  except (TypeError, ValueError):
+    return None
+
+
+def window_where(topic: str | None = None, start_day: str | None = None, end_day: str | None = None) -> dict | None:
+  """`where` filter for one topic and an inclusive day window; any part may be omitted."""
+  clauses: list[dict] = []
+  if topic is not None:
+    clauses.append({"topic": topic})
+  if start_day:
+    clauses.append({"day_num": {"$gte": day_number(start_day)}})
+  if end_day:
+    clauses.append({"day_num": {"$lte": day_number(end_day)}})
+  if not clauses:
+    return None
+  return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def rerank_by_recency(rows: list[dict], *, today: date, half_life_days: float) -> list[dict]:
+  """
+  Order results by similarity times an exponential recency decay (weight halves every `half_life_days`).
+  Each row gains `score`; rows without a usable day get the weight of a `4 * half_life_days` old item.
+  """
+  ranked = []
+  for row in rows:
+    meta = row.get("metadata") or {}
+    day = _day_from_number(meta.get("day_num")) or _day_from_number(day_number(meta.get("day")))
+    age = max(0, (today - day).days) if day else 4 * half_life_days
+    similarity = 1.0 - (row.get("distance") if row.get("distance") is not None else 1.0)
+    ranked.append({**row, "score": similarity * 0.5 ** (age / half_life_days)})
+  return sorted(ranked, key=lambda r: -r["score"])
+
+
+def item_metadata(item: PendingSyncItem) -> dict:
+  return {
+      "topic": item.topic,
+      "day": item.day,
+      "day_num": day_number(item.day),
+      "url": item.url,
+      "title": item.title,
+      "snippet": item.snippet[:500] if item.snippet else "",
+  }
 
-class AlertVectorStore:
-  """Thin wrapper around ChromaDB for storing and querying alert items."""
+
+def build_topic_queries(
+    items: list[PendingSyncItem],
+    *,
+    per_topic: int = TOPIC_QUERY_ITEMS,
+    max_chars: int = TOPIC_QUERY_MAX_CHARS,
+) -> dict[str, str]:
+  """One bounded query string per topic, from the titles of up to `per_topic` of its items."""
+  titles: dict[str, list[str]] = defaultdict(list)
+  for item in items:
+    bucket = titles[item.topic]
+    title = (item.title or item.snippet or "").strip()
+    if title and title not in bucket and len(bucket) < per_topic:
+      bucket.append(title)
+  return {topic: "; ".join([topic, *ts])[:max_chars] for topic, ts in sorted(titles.items())}
+
+
+class VectorStoreBase(ABC):
+  """Embedding (through the optional cache) and queries shared by the vector store backends."""
 
   def __init__(
       self,
-      persist_path: Path,
       embedding_fn: Callable[[list[str]], list[list[float]]] | None = None,
       *,
       api_key: str = "",
       embedding_model: str = "text-embedding-3-small",
+      embedding_cache: EmbeddingCache | None = None,
+      embedding_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+      embedding_concurrency: int = DEFAULT_CONCURRENCY,
   ):
-    self._persist_path = Path(persist_path)
-    self._persist_path.mkdir(parents=True, exist_ok=True)
     self._api_key = api_key
     self._embedding_model = embedding_model
+    self._cache = embedding_cache
+    self.cache_hits = 0
+    self.cache_misses = 0
 
     if embedding_fn is not None:
       self._embed = embedding_fn
     else:
-      self._embed = lambda texts: _default_embedding_fn(
-          texts, api_key=api_key, model=embedding_model
+      self._embed = create_openai_embedding_fn(
+          api_key=api_key,
+          model=embedding_model,
+          max_batch_tokens=embedding_batch_tokens,
+          concurrency=embedding_concurrency,
       )
 
-    import chromadb
+  def _embed_documents(self, documents: list[str]) -> list[list[float]]:
+    """Embed documents, consulting the embedding cache first when one is configured."""
+    if self._cache is None:
+      return self._embed(documents)
 
-    self._client = chromadb.PersistentClient(path=str(self._persist_path))
-    self._collection = self._client.get_or_create_collection(
-        name=COLLECTION_NAME,
-        metadata={"hnsw:space": "cosine"},
-    )
+    embeddings = self._cache.get_many(self._embedding_model, documents)
+    missing = list(dict.fromkeys(doc for doc, emb in zip(documents, embeddings) if emb is None))
+    hits = sum(1 for emb in embeddings if emb is not None)
+    self.cache_hits += hits
+    self.cache_misses += len(documents) - hits
+    if missing:
+      fresh = self._embed(missing)
+      self._cache.put_many(self._embedding_model, missing, fresh)
+      by_doc = dict(zip(missing, fresh))
+      embeddings = [emb if emb is not None else by_doc[doc] for doc, emb in zip(documents, embeddings)]
+    return embeddings
+
+  def embed_items(self, items: list[PendingSyncItem]) -> list[list[float]]:
+    """Item embeddings through the cache, so items already upserted are not embedded again."""
+    return self._embed_documents([item_document(item) for item in items])
 
   def upsert_items(self, items: list[PendingSyncItem]) -> int:
     """Embed and store items. Returns count of items upserted."""
     if not items:
       return 0
 
-    ids = [item.item_key for item in items]
-    documents = [
-        f"{item.title}\n{item.snippet}".strip() or item.url
-        for item in items
-    ]
-    metadatas = [
-        {
-            "topic": item.topic,
-            "day": item.day,
-            "url": item.url,
-            "title": item.title,
-            "snippet": item.snippet[:500] if item.snippet else "",
-        }
-        for item in items
-    ]
-
-    embeddings = self._embed(documents)
-    self._collection.upsert(
-        ids=ids,
-        embeddings=embeddings,
-        metadatas=metadatas,
-        documents=documents,
+    return self.upsert_documents(
+        [item.item_key for item in items],
+        [item_document(item) for item in items],
+        [item_metadata(item) for item in items],
     )
-    return len(items)
+
+  def upsert_documents(self, ids: list[str], documents: list[str], metadatas: list[dict]) -> int:
+    """Embed and store arbitrary documents (e.g. rollup summaries). Returns count upserted."""
+    if not ids:
+      return 0
+    self._upsert(ids, self._embed_documents(documents), metadatas, documents)
+    return len(ids)
+
+  def nearest_distances(
+      self,
+      items: list[PendingSyncItem],
+      *,
+      filter_by_topic: bool = True,
+      start_day: str | None = None,
+      end_day: str | None = None,
+  ) -> dict[str, float | None]:
+    """
+    Distance from each item to its nearest stored neighbour (of the same topic, within the inclusive
+    `start_day`/`end_day` window), ignoring the item's own id; None when there is none. Embeddings go
+    through the cache, so a following upsert reuses them.
+    """
+    if not items:
+      return {}
+    embeddings = self.embed_items(items)
+    wheres = [window_where(item.topic if filter_by_topic else None, start_day, end_day) for item in items]
+    results = self.query_embeddings(embeddings, n_results=2, wheres=wheres)
+    nearest: dict[str, float | None] = {}
+    for item, rows in zip(items, results):
+      distances = [r["distance"] for r in rows if r["id"] != item.item_key and r["distance"] is not None]
+      nearest[item.item_key] = min(distances) if distances else None
+    return nearest
 
   def query(
       self,
@@ -93,25 +212,267 @@ class AlertVectorStore:
     Semantic search. Returns list of dicts with keys:
     id, document, metadata, distance.
     """
-    query_embedding = self._embed([text])[0]
+    return self.query_embedding(self._embed([text])[0], n_results=n_results, where=where)
+
+  def query_many(
+      self,
+      queries: dict[str, str],
+      n_results: int = 5,
+      *,
+      filter_by_topic: bool = True,
+      exclude_ids: set[str] | None = None,
+      start_day: str | None = None,
+      end_day: str | None = None,
+      recency_half_life_days: float | None = None,
+      today: date | None = None,
+      overfetch: int = RECENCY_OVERFETCH,
+  ) -> dict[str, list[dict]]:
+    """
+    Run one query per key (a topic) with a single embedding call and batched lookups.
+    With `filter_by_topic`, each key's results are restricted to items of that topic; `start_day` /
+    `end_day` restrict them to an inclusive day window, so only those vectors are searched.
+    `exclude_ids` (e.g. today's items) are dropped from the results: each query first fetches at most
+    twice what it needs, and only queries that lost too many rows to the exclusion are asked again for
+    more. With `recency_half_life_days`, `overfetch` times more candidates are fetched and re-ranked by
+    `rerank_by_recency`.
+    """
+    if not queries:
+      return {}
+    keys = list(queries)
+    embeddings = self._embed([queries[key] for key in keys])
+    exclude = exclude_ids or set()
+    wheres = [window_where(key if filter_by_topic else None, start_day, end_day) for key in keys]
+    wanted = n_results * (max(1, overfetch) if recency_half_life_days else 1)
+    most = wanted + len(exclude)
+    fetch = min(most, 2 * wanted)
+    results: dict[int, list[dict]] = {}
+    todo = list(range(len(keys)))
+    while todo:
+      retry: list[int] = []
+      found = self.query_embeddings([embeddings[i] for i in todo], n_results=fetch, wheres=[wheres[i] for i in todo])
+      for idx, rows in zip(todo, found):
+        kept = [r for r in rows if r["id"] not in exclude]
+        # A full page that still came up short may have more rows past the excluded ones.
+        if len(kept) < wanted and len(rows) == fetch and fetch < most:
+          retry.append(idx)
+        else:
+          results[idx] = kept
+      todo = retry
+      fetch = min(most, 2 * fetch)
+    out: dict[str, list[dict]] = {}
+    for idx, key in enumerate(keys):
+      rows = results[idx]
+      if recency_half_life_days:
+        rows = rerank_by_recency(rows, today=today or date.today(), half_life_days=recency_half_life_days)
+      out[key] = rows[:n_results]
+    return out
+
+  def query_embeddings(
+      self,
+      embeddings: list[list[float]],
+      n_results: int = 5,
+      wheres: list[dict | None] | None = None,
+  ) -> list[list[dict]]:
+    """Results per embedding; embeddings sharing a filter are looked up together."""
+    wheres = wheres or [None] * len(embeddings)
+    groups: dict[str, list[int]] = defaultdict(list)
+    for idx, where in enumerate(wheres):
+      groups[json.dumps(where, sort_keys=True)].append(idx)
+    out: list[list[dict]] = [[] for _ in embeddings]
+    results = self._query_groups(
+        [([embeddings[i] for i in indices], wheres[indices[0]]) for indices in groups.values()], n_results)
+    for indices, rows in zip(groups.values(), results):
+      for idx, result in zip(indices, rows):
+        out[idx] = result
+    return out
+
+  def _query_groups(
+      self,
+      groups: list[tuple[list[list[float]], dict | None]],
+      n_results: int,
+  ) -> list[list[list[dict]]]:
+    """`_query_group` for each (embeddings, where) pair; stores that can share work across filters override it."""
+    return [self._query_group(embeddings, n_results, where) for embeddings, where in groups]
+
+  def query_embedding(
+      self,
+      embedding: list[float],
+      n_results: int = 5,
+      where: dict | None = None,
+  ) -> list[dict]:
+    return self._query_group([embedding], n_results, where)[0]
+
+  def close(self) -> None:
+    return
+
+  @abstractmethod
+  def drop(self) -> None:
+    """Delete the collection and its files, then close."""
+
+  @abstractmethod
+  def export_rows(self, page_size: int = EXPORT_PAGE):
+    """Yield pages of stored rows as dicts with keys id, document, metadata, embedding."""
+
+  @abstractmethod
+  def _upsert(
+      self,
+      ids: list[str],
+      embeddings: list[list[float]],
+      metadatas: list[dict],
+      documents: list[str],
+  ) -> None:
+    """Insert or replace rows with precomputed embeddings."""
+
+  @abstractmethod
+  def _query_group(
+      self,
+      embeddings: list[list[float]],
+      n_results: int,
+      where: dict | None,
+  ) -> list[list[dict]]:
+    """Nearest `n_results` rows matching `where` for each embedding, closest first."""
+
+
+class AlertVectorStore(VectorStoreBase):
+  """Thin wrapper around ChromaDB for storing and querying alert items."""
+
+  def __init__(
+      self,
+      persist_path: Path,
+      embedding_fn: Callable[[list[str]], list[list[float]]] | None = None,
+      *,
+      api_key: str = "",
+      embedding_model: str = "text-embedding-3-small",
+      embedding_cache: EmbeddingCache | None = None,
+      embedding_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+      embedding_concurrency: int = DEFAULT_CONCURRENCY,
+      collection_name: str = COLLECTION_NAME,
+  ):
+    super().__init__(
+        embedding_fn,
+        api_key=api_key,
+        embedding_model=embedding_model,
+        embedding_cache=embedding_cache,
+        embedding_batch_tokens=embedding_batch_tokens,
+        embedding_concurrency=embedding_concurrency,
+    )
+    self._persist_path = Path(persist_path)
+    self._persist_path.mkdir(parents=True, exist_ok=True)
+
+    import chromadb
+
+    self._client = chromadb.PersistentClient(path=str(self._persist_path))
+    self._collection_name = collection_name
+    self._collection = self._client.get_or_create_collection(
+        name=collection_name,
+        metadata={"hnsw:space": "cosine"},
+    )
+    self._backfill_day_numbers()
+
+  def _backfill_day_numbers(self) -> None:
+    """
+    Add `day_num` to items stored before it existed. Runs once per collection: completion is recorded in
+    the collection metadata, so later opens skip the scan.
+    """
+    metadata = self._collection.metadata or {}
+    if metadata.get(DAY_BACKFILL_FLAG):
+      return
+    total = self._collection.count()
+    for offset in range(0, total, DAY_BACKFILL_PAGE):
+      page = self._collection.get(include=["metadatas"], limit=DAY_BACKFILL_PAGE, offset=offset)
+      stale = [(id_val, meta or {}) for id_val, meta in zip(page["ids"], page["metadatas"]) if "day_num" not in (meta or {})]
+      if stale:
+        self._collection.update(
+            ids=[id_val for id_val, _ in stale],
+            metadatas=[{**meta, "day_num": day_number(meta.get("day"))} for _, meta in stale],
+        )
+    # Chroma rejects `hnsw:*` keys in modify and keeps the collection's index settings without them.
+    kept = {key: value for key, value in metadata.items() if not key.startswith("hnsw:")}
+    self._collection.modify(metadata={**kept, DAY_BACKFILL_FLAG: True})
+
+  def drop(self) -> None:
+    self._client.delete_collection(self._collection_name)
+
+  def export_rows(self, page_size: int = EXPORT_PAGE):
+    total = self._collection.count()
+    for offset in range(0, total, page_size):
+      page = self._collection.get(
+          include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+      yield [
+          {"id": id_val, "document": doc or "", "metadata": meta or {}, "embedding": [float(x) for x in emb]}
+          for id_val, doc, meta, emb in zip(page["ids"], page["documents"], page["metadatas"], page["embeddings"])
+      ]
+
+  def _upsert(
+      self,
+      ids: list[str],
+      embeddings: list[list[float]],
+      metadatas: list[dict],
+      documents: list[str],
+  ) -> None:
+    # Chroma rejects upserts larger than its max batch size.
+    step = self._client.get_max_batch_size()
+    for start in range(0, len(ids), step):
+      end = start + step
+      self._collection.upsert(
+          ids=ids[start:end],
+          embeddings=embeddings[start:end],
+          metadatas=metadatas[start:end],
+          documents=documents[start:end],
+      )
+
+  def _query_group(
+      self,
+      embeddings: list[list[float]],
+      n_results: int,
+      where: dict | None,
+  ) -> list[list[dict]]:
+    # Chroma applies one `where` per call, so each distinct filter is its own batched query.
     result = self._collection.query(
-        query_embeddings=[query_embedding],
+        query_embeddings=embeddings,
         n_results=n_results,
         where=where,
         include=["documents", "metadatas", "distances"],
     )
 
-    out: list[dict] = []
-    ids = result["ids"][0] if result["ids"] else []
-    docs = result["documents"][0] if result["documents"] else []
-    metas = result["metadatas"][0] if result["metadatas"] else []
-    dists = result["distances"][0] if result["distances"] else []
-
-    for i, id_val in enumerate(ids):
-      out.append({
-          "id": id_val,
-          "document": docs[i] if i < len(docs) else "",
-          "metadata": metas[i] if i < len(metas) else {},
-          "distance": dists[i] if i < len(dists) else None,
-      })
-    return out
+    grouped: list[list[dict]] = []
+    for q in range(len(embeddings)):
+      ids = result["ids"][q] if result["ids"] else []
+      docs = result["documents"][q] if result["documents"] else []
+      metas = result["metadatas"][q] if result["metadatas"] else []
+      dists = result["distances"][q] if result["distances"] else []
+      out: list[dict] = []
+      for i, id_val in enumerate(ids):
+        out.append({
+            "id": id_val,
+            "document": docs[i] if i < len(docs) else "",
+            "metadata": metas[i] if i < len(metas) else {},
+            "distance": dists[i] if i < len(dists) else None,
+        })
+      grouped.append(out)
+    return grouped
+
+
+def create_vector_store(
+    backend: str,
+    persist_path: Path,
+    embedding_fn: Callable[[list[str]], list[list[float]]] | None = None,
+    *,
+    flat_dtype: str = "int8",
+    partitioning: str = "none",
+    **kwargs,
+) -> VectorStoreBase:
+  """Open the `backend` vector store ("chroma" or "flat") at `persist_path`, optionally split by month."""
+  if partitioning not in VECTOR_PARTITIONINGS:
+    raise ValueError(f"unknown vector partitioning {partitioning!r}; expected one of {', '.join(VECTOR_PARTITIONINGS)}")
+  if partitioning == "month":
+    from alert_historian.narrative.partitions import PartitionedVectorStore
+
+    return PartitionedVectorStore(backend, persist_path, embedding_fn, flat_dtype=flat_dtype, **kwargs)
+  if backend == "chroma":
+    return AlertVectorStore(persist_path, embedding_fn, **kwargs)
+  if backend == "flat":
+    from alert_historian.narrative.flat_index import FlatVectorStore
+
+    return FlatVectorStore(persist_path, embedding_fn, dtype=flat_dtype, **kwargs)
+  raise ValueError(f"unknown vector backend {backend!r}; expected one of {', '.join(VECTOR_BACKENDS)}")
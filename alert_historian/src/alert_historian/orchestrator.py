@@ -0,0 +1,259 @@
+"""
+Pipelined run: fetch, store, sync and embedding run as concurrent stages joined by bounded queues,
+so FindFirst sync starts on the first stored message instead of after the whole mailbox, and
+embedding overlaps sync. A full queue blocks its producer, which bounds memory to `queue_size`
+entries per queue, and the run takes about as long as its slowest stage.
+
+- fetch: reads the IMAP mailbox (after the stored checkpoint) or the JSON export, one payload at a time.
+- store: saves each payload, appends it to the run artifact and forwards the items it created.
+- sync: syncs forwarded items in bulk batches, then drains whatever else is pending (e.g. earlier
+  runs' retryable failures) and advances the checkpoint, like `sync_pending_items`.
+- embed (optional): fills the embedding cache for created items, so the narrative step that follows
+  reads their vectors instead of calling the embedding API.
+
+Each stage owns its own SQLite connections. When a stage fails, the others stop and the error is
+raised; payloads stored so far stay stored, and the next run picks up from there.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterator
+
+from alert_historian.config.settings import Settings
+from alert_historian.ingestion.pipeline import ArtifactWriter, iter_payloads, payloads_to_pending_items
+from alert_historian.narrative.embedding_cache import EmbeddingCache
+from alert_historian.narrative.vector_store import item_document
+from alert_historian.state.store import StateStore
+from alert_historian.sync.engine import SyncSession
+from alert_historian.sync.findfirst_client import FindFirstClient
+
+DEFAULT_QUEUE_SIZE = 64
+EMBED_BATCH_ITEMS = 256
+POLL_SECONDS = 0.1
+
+_END = object()
+
+
+class PipelineStopped(Exception):
+  """Raised inside a stage once another stage has failed."""
+
+
+class _Channel:
+  """Bounded queue between two stages; `put` blocks while full and gives up once the pipeline stops."""
+
+  def __init__(self, maxsize: int, stop: threading.Event):
+    self._queue: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+    self._stop = stop
+    self.peak = 0
+
+  def put(self, obj) -> None:
+    while True:
+      if self._stop.is_set():
+        raise PipelineStopped
+      try:
+        self._queue.put(obj, timeout=POLL_SECONDS)
+        self.peak = max(self.peak, self._queue.qsize())
+        return
+      except queue.Full:
+        continue
+
+  def close(self) -> None:
+    try:
+      self.put(_END)
+    except PipelineStopped:
+      pass
+
+  def _get(self):
+    while True:
+      try:
+        return self._queue.get(timeout=POLL_SECONDS)
+      except queue.Empty:
+        if self._stop.is_set():
+          raise PipelineStopped
+
+  def batches(self, max_items: int) -> Iterator[list]:
+    """
+    Lists of up to about `max_items` entries (each put is a list): waits for the first, then takes
+    what is already queued, so batches are small when the stage keeps up and grow when it falls behind.
+    """
+    while True:
+      first = self._get()
+      if first is _END:
+        return
+      batch = list(first)
+      while len(batch) < max_items:
+        try:
+          more = self._queue.get_nowait()
+        except queue.Empty:
+          break
+        if more is _END:
+          yield batch
+          return
+        batch.extend(more)
+      yield batch
+
+
+@dataclass
+class StageStats:
+  name: str
+  processed: int = 0
+  busy_seconds: float = 0.0
+  note: str = ""
+
+
+@dataclass
+class PipelineResult:
+  run_id: str
+  inserted: int
+  sync_stats: dict[str, int]
+  seconds: float
+  stages: list[StageStats] = field(default_factory=list)
+  queue_peaks: dict[str, int] = field(default_factory=dict)
+
+
+def run_pipeline(
+    settings: Settings,
+    run_id: str | None = None,
+    *,
+    embedding_fn: Callable[[list[str]], list[list[float]]] | None = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    client: FindFirstClient | None = None,
+    worker_id: str | None = None,
+) -> PipelineResult:
+  """
+  Ingest and sync one run with all stages running at once. With `embedding_fn`, created items are
+  also embedded into the embedding cache under `embedding_fn.model_id`.
+  """
+  run = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+  stop = threading.Event()
+  errors: list[BaseException] = []
+  payloads = _Channel(queue_size, stop)
+  to_sync = _Channel(queue_size, stop)
+  to_embed = _Channel(queue_size, stop) if embedding_fn is not None else None
+  stats = {name: StageStats(name) for name in ("fetch", "store", "sync", "embed") if name != "embed" or to_embed is not None}
+  sync_stats: dict[str, int] = {}
+
+  def fetch() -> None:
+    store = StateStore(settings.state_db)
+    try:
+      source = iter_payloads(settings, store)
+    finally:
+      store.close()
+    started = time.perf_counter()
+    for payload in source:
+      stats["fetch"].busy_seconds += time.perf_counter() - started
+      stats["fetch"].processed += 1
+      payloads.put([payload])
+      started = time.perf_counter()
+    stats["fetch"].busy_seconds += time.perf_counter() - started
+
+  def save() -> None:
+    store = StateStore(settings.state_db)
+    artifact = ArtifactWriter(settings.artifacts_dir, run)
+    try:
+      for batch in payloads.batches(1):
+        started = time.perf_counter()
+        created: list[str] = []
+        for payload in batch:
+          created.extend(store.save_new_payloads([payload], run))
+          artifact.write(payload)
+        stats["store"].busy_seconds += time.perf_counter() - started
+        if not created:
+          continue
+        stats["store"].processed += len(created)
+        to_sync.put(created)
+        if to_embed is not None:
+          keys = set(created)
+          to_embed.put([item for item in payloads_to_pending_items(batch) if item.item_key in keys])
+      artifact.close()
+    except BaseException:
+      artifact.abort()
+      raise
+    finally:
+      store.close()
+
+  def sync() -> None:
+    store = StateStore(settings.state_db)
+    try:
+      session = SyncSession(settings, store, run, client=client, worker_id=worker_id)
+      for keys in to_sync.batches(session.claim_size):
+        started = time.perf_counter()
+        session.sync_items(keys)
+        stats["sync"].processed += len(keys)
+        stats["sync"].busy_seconds += time.perf_counter() - started
+      started = time.perf_counter()
+      session.drain()
+      sync_stats.update(session.finish())
+      stats["sync"].busy_seconds += time.perf_counter() - started
+    finally:
+      store.close()
+
+  def embed() -> None:
+    cache = EmbeddingCache(settings.embedding_cache_path)
+    model = getattr(embedding_fn, "model_id", "")
+    failed = False
+    try:
+      for items in to_embed.batches(EMBED_BATCH_ITEMS):
+        if failed:
+          continue
+        started = time.perf_counter()
+        try:
+          stats["embed"].processed += cache.fill(model, [item_document(item) for item in items], embedding_fn)
+        except Exception as e:
+          # Not fatal: the narrative step embeds whatever is missing from the cache itself.
+          failed = True
+          stats["embed"].note = f"stopped: {e}"
+        stats["embed"].busy_seconds += time.perf_counter() - started
+    finally:
+      cache.close()
+
+  def stage(target: Callable[[], None], outputs: list[_Channel]) -> Callable[[], None]:
+    def run_stage() -> None:
+      try:
+        target()
+      except PipelineStopped:
+        pass
+      except BaseException as e:
+        errors.append(e)
+        stop.set()
+      finally:
+        for channel in outputs:
+          channel.close()
+    return run_stage
+
+  threads = [
+      threading.Thread(target=stage(fetch, [payloads]), name="pipeline-fetch"),
+      threading.Thread(target=stage(save, [to_sync] + ([to_embed] if to_embed else [])), name="pipeline-store"),
+      threading.Thread(target=stage(sync, []), name="pipeline-sync"),
+  ]
+  if to_embed is not None:
+    threads.append(threading.Thread(target=stage(embed, []), name="pipeline-embed"))
+
+  started = time.perf_counter()
+  for thread in threads:
+    thread.start()
+  try:
+    for thread in threads:
+      thread.join()
+  except BaseException:
+    stop.set()
+    for thread in threads:
+      thread.join()
+    raise
+  if errors:
+    raise errors[0]
+
+  peaks = {"payloads": payloads.peak, "sync": to_sync.peak}
+  if to_embed is not None:
+    peaks["embed"] = to_embed.peak
+  return PipelineResult(
+      run_id=run,
+      inserted=stats["store"].processed,
+      sync_stats=sync_stats,
+      seconds=time.perf_counter() - started,
+      stages=list(stats.values()),
+      queue_peaks=peaks,
+  )
@@ -1,8 +1,64 @@
-from datetime import datetime
+"""
+Reports rendered from the state DB's per-day rollups (`topic_day_rollups`, `sync_day_rollups`), so a
+report for any day or range costs a few indexed reads and never scans `items`. Output formats and
+streaming are handled by `reporting.render`.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from pathlib import Path
+from typing import Iterable
 
+from alert_historian.reporting.render import ReportSummary, TopicEntry, write_report
 from alert_historian.state.store import StateStore
 
+DEFAULT_REPORT_WORKERS = 4
+NOVELTY_SECTION = "novelty"
+DELTA_SECTION = "narrative_delta"
+
+
+def _sync_totals(runs: dict[str, dict[str, int]]) -> dict[str, int]:
+  totals: dict[str, int] = {}
+  for statuses in runs.values():
+    for status, count in statuses.items():
+      totals[status] = totals.get(status, 0) + count
+  totals["total"] = sum(count for status, count in totals.items() if status != "total")
+  return totals
+
+
+def _runs_between(store: StateStore, start: str, end: str) -> dict[str, dict[str, int]]:
+  runs: dict[str, dict[str, int]] = {}
+  for day_runs in store.sync_day_rollups(start, end).values():
+    for run_id, statuses in day_runs.items():
+      merged = runs.setdefault(run_id, {})
+      for status, count in statuses.items():
+        merged[status] = merged.get(status, 0) + count
+  return runs
+
+
+def _joined_section(runs: list[tuple[str, str]]) -> str | None:
+  """One report section from several runs' stored copies, each under its run id when there is more than one."""
+  if len(runs) <= 1:
+    return runs[0][1] if runs else None
+  return "\n\n".join(f"_Run {run_id}_\n\n{markdown}" for run_id, markdown in runs)
+
+
+def _day_summary(
+    day: str,
+    topics: dict[str, tuple[int, list[str]]],
+    runs: dict[str, dict[str, int]],
+    sections: dict[str, list[tuple[str, str]]],
+) -> ReportSummary:
+  return ReportSummary(
+      start_day=day,
+      end_day=day,
+      inserted=sum(count for count, _ in topics.values()),
+      sync_stats=_sync_totals(runs),
+      runs=runs,
+      novelty_summary=_joined_section(sections.get(NOVELTY_SECTION, [])),
+      narrative_delta=_joined_section(sections.get(DELTA_SECTION, [])),
+  )
+
 
 def build_daily_report(
     store: StateStore,
@@ -11,35 +67,92 @@ def build_daily_report(
     inserted_count: int,
     sync_stats: dict[str, int],
     narrative_delta: str | None = None,
+    novelty_summary: str | None = None,
+    *,
+    day: str | None = None,
+    formats: Iterable[str] = ("md",),
 ) -> Path:
-  report_dir.mkdir(parents=True, exist_ok=True)
-  today = datetime.utcnow().date().isoformat()
-  out_path = report_dir / f"{today}.md"
-
-  by_topic = store.topic_links()
-
-  lines = [
-      f"# Alert Historian Daily Report ({today})",
-      "",
-      "## Ingest Summary",
-      f"- Canonical items inserted: {inserted_count}",
-      "",
-      "## Sync Summary",
-  ]
-  for key in ["synced", "duplicate", "retryable_failed", "permanent_failed", "total"]:
-    lines.append(f"- {key}: {sync_stats.get(key, 0)}")
-
-  if narrative_delta and narrative_delta.strip():
-    lines.extend(["", "## Narrative Delta", "", narrative_delta.strip(), ""])
-
-  lines.extend(["", "## Topic Timeline"])
-  if by_topic:
-    for topic, links in sorted(by_topic.items()):
-      lines.append(f"- {topic}")
-      for link in links[:10]:
-        lines.append(f"  - {link}")
-  else:
-    lines.append("- No pending timeline links; all current items are terminal.")
-
-  out_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-  return out_path
+  """
+  Write the report of `day` (default today, UTC) for the current run in each of `formats`; the
+  timeline comes from the day's rollups. Returns the path of the first format.
+  """
+  day = day or datetime.utcnow().date().isoformat()
+  summary = ReportSummary(
+      start_day=day,
+      end_day=day,
+      inserted=inserted_count,
+      sync_stats=sync_stats,
+      runs=store.sync_day_rollups(day, day).get(day, {}),
+      novelty_summary=novelty_summary,
+      narrative_delta=narrative_delta,
+  )
+  topics = (TopicEntry(*row) for row in store.iter_topic_day_rollups(day, day))
+  return write_report(summary, topics, report_dir / day, formats)[0]
+
+
+def build_day_report(
+    store: StateStore,
+    report_dir: Path,
+    day: str | None = None,
+    *,
+    formats: Iterable[str] = ("md",),
+) -> Path:
+  """
+  Write the report of `day` (default today, UTC) from its rollups and every run's stored narrative
+  sections (`StateStore.save_report_sections`), so several runs a day (e.g. `serve` cycles) add up
+  instead of replacing each other's report. Returns the path of the first format.
+  """
+  day = day or datetime.utcnow().date().isoformat()
+  topics = store.topic_day_rollups(day, day).get(day, {})
+  summary = _day_summary(
+      day, topics, store.sync_day_rollups(day, day).get(day, {}), store.report_sections(day, day).get(day, {}))
+  entries = (TopicEntry(day, topic, count, links) for topic, (count, links) in sorted(topics.items()))
+  return write_report(summary, entries, report_dir / day, formats)[0]
+
+
+def build_range_report(
+    store: StateStore,
+    report_dir: Path,
+    start_day: date,
+    end_day: date,
+    *,
+    formats: Iterable[str] = ("md",),
+) -> list[Path]:
+  """One report over an inclusive day range (`<start>_<end>.<ext>`), streamed from the rollups."""
+  start, end = start_day.isoformat(), end_day.isoformat()
+  runs = _runs_between(store, start, end)
+  summary = ReportSummary(
+      start_day=start, end_day=end, inserted=store.new_items_between(start, end), sync_stats=_sync_totals(runs),
+      runs=runs)
+  topics = (TopicEntry(*row) for row in store.iter_topic_day_rollups(start, end))
+  return write_report(summary, topics, report_dir / f"{start}_{end}", formats)
+
+
+def build_reports(
+    store: StateStore,
+    report_dir: Path,
+    start_day: date,
+    end_day: date,
+    *,
+    max_workers: int = DEFAULT_REPORT_WORKERS,
+    formats: Iterable[str] = ("md",),
+) -> list[Path]:
+  """
+  (Re)write the report of every day in an inclusive range from range reads of the rollups and stored
+  narrative sections; rendering and writing run in parallel.
+  """
+  formats = tuple(formats)
+  start, end = start_day.isoformat(), end_day.isoformat()
+  topics = store.topic_day_rollups(start, end)
+  runs = store.sync_day_rollups(start, end)
+  sections = store.report_sections(start, end)
+  days = [(start_day + timedelta(days=offset)).isoformat() for offset in range((end_day - start_day).days + 1)]
+
+  def write(day: str) -> list[Path]:
+    day_topics = topics.get(day, {})
+    summary = _day_summary(day, day_topics, runs.get(day, {}), sections.get(day, {}))
+    entries = (TopicEntry(day, topic, count, links) for topic, (count, links) in sorted(day_topics.items()))
+    return write_report(summary, entries, report_dir / day, formats)
+
+  with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(days) or 1))) as pool:
+    return [path for paths in pool.map(write, days) for path in paths]
@@ -0,0 +1,214 @@
+"""
+Report rendering: one data model (`ReportSummary` plus a stream of `TopicEntry` rows) written as
+Markdown, JSON or a self-contained HTML page.
+
+Writers stream: the summary is written first, then each topic row as it is read, so a report over a
+month or a year of topics is rendered in constant memory. All requested formats are written in one
+pass over the rows, each to a temporary file that replaces the report only once complete.
+"""
+
+import html
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, Iterable
+
+REPORT_FORMATS = {"md": ".md", "json": ".json", "html": ".html"}
+SYNC_STATUSES = ["synced", "duplicate", "retryable_failed", "permanent_failed", "total"]
+JSON_REPORT_VERSION = 1
+
+HTML_STYLE = """body{font-family:system-ui,sans-serif;max-width:60rem;margin:2rem auto;padding:0 1rem;color:#222}
+table{border-collapse:collapse;width:100%}th,td{text-align:left;padding:.3rem .5rem;border-bottom:1px solid #ddd;vertical-align:top}
+pre{white-space:pre-wrap;background:#f6f6f6;padding:.75rem}ul{margin:0;padding-left:1.2rem}"""
+
+
+@dataclass
+class ReportSummary:
+  start_day: str
+  end_day: str
+  inserted: int
+  sync_stats: dict[str, int]
+  runs: dict[str, dict[str, int]] = field(default_factory=dict)
+  novelty_summary: str | None = None
+  narrative_delta: str | None = None
+
+  @property
+  def title(self) -> str:
+    if self.start_day == self.end_day:
+      return f"Alert Historian Daily Report ({self.start_day})"
+    return f"Alert Historian Report ({self.start_day} to {self.end_day})"
+
+  @property
+  def period(self) -> str:
+    return "day" if self.start_day == self.end_day else "period"
+
+
+@dataclass
+class TopicEntry:
+  day: str
+  topic: str
+  new_items: int
+  links: list[str]
+
+
+def _text(value: str | None) -> str | None:
+  return value.strip() if value and value.strip() else None
+
+
+class ReportWriter:
+  """Receives the summary once, then topic rows in (day, topic) order, then `end`."""
+
+  def __init__(self, fh: IO[str]):
+    self.fh = fh
+    self.topics = 0
+
+  def begin(self, summary: ReportSummary) -> None:
+    self.summary = summary
+
+  def topic(self, entry: TopicEntry) -> None:
+    self.topics += 1
+
+  def end(self) -> None:
+    return
+
+
+class MarkdownWriter(ReportWriter):
+  def begin(self, summary: ReportSummary) -> None:
+    super().begin(summary)
+    self._day: str | None = None
+    lines = [f"# {summary.title}", "", "## Ingest Summary", f"- Canonical items inserted: {summary.inserted}", "",
+             "## Sync Summary"]
+    lines.extend(f"- {key}: {summary.sync_stats.get(key, 0)}" for key in SYNC_STATUSES)
+    if summary.runs:
+      lines.extend(["", "### Sync Runs"])
+      lines.extend(
+          f"- {run_id}: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items()))
+          for run_id, statuses in sorted(summary.runs.items()))
+    if novelty := _text(summary.novelty_summary):
+      lines.extend(["", "## Novelty", "", novelty])
+    if delta := _text(summary.narrative_delta):
+      lines.extend(["", "## Narrative Delta", "", delta, ""])
+    lines.extend(["", "## Topic Timeline"])
+    self.fh.write("\n".join(lines) + "\n")
+
+  def topic(self, entry: TopicEntry) -> None:
+    super().topic(entry)
+    if self.summary.period != "day" and entry.day != self._day:
+      self._day = entry.day
+      self.fh.write(f"\n### {entry.day}\n\n")
+    self.fh.write(f"- {entry.topic} ({entry.new_items} new)\n")
+    self.fh.writelines(f"  - {link}\n" for link in entry.links)
+
+  def end(self) -> None:
+    if not self.topics:
+      self.fh.write(f"- No new items for this {self.summary.period}.\n")
+
+
+class JsonWriter(ReportWriter):
+  def begin(self, summary: ReportSummary) -> None:
+    super().begin(summary)
+    header = {
+        "version": JSON_REPORT_VERSION,
+        "title": summary.title,
+        "start_day": summary.start_day,
+        "end_day": summary.end_day,
+        "ingest": {"inserted": summary.inserted},
+        "sync": {"totals": {key: summary.sync_stats.get(key, 0) for key in SYNC_STATUSES}, "runs": summary.runs},
+        "novelty": _text(summary.novelty_summary),
+        "narrative_delta": _text(summary.narrative_delta),
+    }
+    # The header object stays open so topic rows can follow without holding them in memory.
+    self.fh.write(json.dumps(header, sort_keys=False)[:-1] + ', "topics": [')
+
+  def topic(self, entry: TopicEntry) -> None:
+    self.fh.write(("\n" if not self.topics else ",\n") + json.dumps(asdict(entry)))
+    super().topic(entry)
+
+  def end(self) -> None:
+    self.fh.write("\n]}\n")
+
+
+class HtmlWriter(ReportWriter):
+  def begin(self, summary: ReportSummary) -> None:
+    super().begin(summary)
+    esc = html.escape
+    parts = [
+        "<!DOCTYPE html>", '<html lang="en"><head><meta charset="utf-8">', f"<title>{esc(summary.title)}</title>",
+        f"<style>{HTML_STYLE}</style></head><body>", f"<h1>{esc(summary.title)}</h1>",
+        "<h2>Ingest Summary</h2>", f"<p>Canonical items inserted: {summary.inserted}</p>",
+        "<h2>Sync Summary</h2>", "<table><tr>" + "".join(f"<th>{key}</th>" for key in SYNC_STATUSES) + "</tr><tr>"
+        + "".join(f"<td>{summary.sync_stats.get(key, 0)}</td>" for key in SYNC_STATUSES) + "</tr></table>",
+    ]
+    if summary.runs:
+      parts.append("<h3>Sync Runs</h3><ul>")
+      parts.extend(
+          f"<li>{esc(run_id)}: " + esc(", ".join(f"{status}={count}" for status, count in sorted(statuses.items())))
+          + "</li>" for run_id, statuses in sorted(summary.runs.items()))
+      parts.append("</ul>")
+    if novelty := _text(summary.novelty_summary):
+      parts.append(f"<h2>Novelty</h2><pre>{esc(novelty)}</pre>")
+    if delta := _text(summary.narrative_delta):
+      parts.append(f"<h2>Narrative Delta</h2><pre>{esc(delta)}</pre>")
+    parts.append("<h2>Topic Timeline</h2><table><tr><th>Day</th><th>Topic</th><th>New</th><th>Links</th></tr>")
+    self.fh.write("\n".join(parts) + "\n")
+
+  def topic(self, entry: TopicEntry) -> None:
+    super().topic(entry)
+    esc = html.escape
+    links = "".join(f'<li><a href="{esc(link)}">{esc(link)}</a></li>' for link in entry.links)
+    self.fh.write(f"<tr><td>{esc(entry.day)}</td><td>{esc(entry.topic)}</td><td>{entry.new_items}</td>"
+                  f"<td><ul>{links}</ul></td></tr>\n")
+
+  def end(self) -> None:
+    if not self.topics:
+      self.fh.write(f'<tr><td colspan="4">No new items for this {self.summary.period}.</td></tr>\n')
+    self.fh.write("</table></body></html>\n")
+
+
+WRITERS: dict[str, type[ReportWriter]] = {"md": MarkdownWriter, "json": JsonWriter, "html": HtmlWriter}
+
+
+def parse_formats(value: str | Iterable[str]) -> tuple[str, ...]:
+  """Formats from "md,json" or a list, validated and de-duplicated in order."""
+  names = value.split(",") if isinstance(value, str) else list(value)
+  formats = tuple(dict.fromkeys(name.strip().lower() for name in names if name.strip()))
+  unknown = [name for name in formats if name not in REPORT_FORMATS]
+  if unknown or not formats:
+    raise ValueError(f"unknown report format(s) {unknown or value!r}; expected some of {', '.join(REPORT_FORMATS)}")
+  return formats
+
+
+def write_report(
+    summary: ReportSummary,
+    topics: Iterable[TopicEntry],
+    stem: Path,
+    formats: Iterable[str] = ("md",),
+) -> list[Path]:
+  """Stream one report to `<stem>.<ext>` for each format, reading `topics` once. Returns the paths."""
+  formats = parse_formats(formats)
+  stem.parent.mkdir(parents=True, exist_ok=True)
+  targets = [stem.with_name(stem.name + REPORT_FORMATS[fmt]) for fmt in formats]
+  handles: list[tuple[IO[str], str]] = []
+  try:
+    for target in targets:
+      fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", dir=str(target.parent))
+      handles.append((os.fdopen(fd, "w", encoding="utf-8"), tmp_name))
+    writers = [WRITERS[fmt](fh) for fmt, (fh, _) in zip(formats, handles)]
+    for writer in writers:
+      writer.begin(summary)
+    for entry in topics:
+      for writer in writers:
+        writer.topic(entry)
+    for writer in writers:
+      writer.end()
+    for (fh, tmp_name), target in zip(handles, targets):
+      fh.close()
+      os.replace(tmp_name, target)
+  finally:
+    for fh, tmp_name in handles:
+      fh.close()
+      if os.path.exists(tmp_name):
+        os.unlink(tmp_name)
+  return targets
@@ -1,16 +1,46 @@
 import json
 import sqlite3
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from hashlib import sha256
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
 from alert_historian.ingestion.normalize import topic_slug
 from alert_historian.ingestion.schema import CanonicalAlertPayload
+from alert_historian.sync.retry import retry_not_before
 
 
 TERMINAL_STATUSES = {"synced", "duplicate", "permanent_failed"}
+URL_LOOKUP_CHUNK = 500
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+# Links kept per (day, topic) in topic_day_rollups for reports.
+REPORT_LINKS_PER_TOPIC = 10
+# bm25() column weights for items_fts(title, snippet, source_domain).
+FTS_COLUMN_WEIGHTS = (3.0, 1.0, 0.5)
+
+# Items whose latest sync attempt (if any) is not terminal. The latest attempt is
+# looked up per item through idx_sync_attempts_item, so this stays linear in items.
+PENDING_ITEMS_SQL = """
+  SELECT i.item_key, i.message_key, i.topic, i.day, i.payload_json
+  FROM items i
+  LEFT JOIN sync_attempts sa
+    ON sa.id = (SELECT MAX(id) FROM sync_attempts WHERE item_key = i.item_key)
+  WHERE (sa.status IS NULL OR sa.status NOT IN ('synced', 'duplicate', 'permanent_failed'))
+"""
+
+# Distinct normalized URLs we believe exist in FindFirst: items whose latest
+# attempt synced them or found them already there.
+# Items we posted ourselves and FindFirst acknowledged with a bookmark id. Duplicates are left out: their
+# URL may belong to an untagged bookmark, which the export omits, so they would look missing forever.
+SYNCED_REMOTE_FILTER_SQL = "sa.status = 'synced' AND sa.findfirst_bookmark_id IS NOT NULL"
+
+RESOLVED_REMOTE_URLS_SQL = f"""
+  SELECT json_extract(i.payload_json, '$.url_normalized') AS url_normalized
+  FROM items i
+  JOIN sync_attempts sa ON sa.id = (SELECT MAX(id) FROM sync_attempts WHERE item_key = i.item_key)
+  WHERE {SYNCED_REMOTE_FILTER_SQL}
+"""
 
 
 @dataclass
@@ -27,6 +57,17 @@ class PendingSyncItem:
   source_message_id: str
 
 
+@dataclass
+class RollupSummary:
+  topic: str
+  level: str
+  period: str
+  start_day: str
+  end_day: str
+  summary: str
+  source_count: int
+
+
 def make_message_key(source_account: str, source_message_id: str) -> str:
   return sha256(f"{source_account}|{source_message_id}".encode("utf-8")).hexdigest()
 
@@ -35,13 +76,53 @@ def make_item_key(url_normalized: str, topic: str) -> str:
   return sha256(f"{url_normalized}|{topic_slug(topic)}".encode("utf-8")).hexdigest()
 
 
+def fts_query(text: str) -> str:
+  """Plain search text as an FTS5 query: every word must match; a trailing `*` keeps prefix matching."""
+  terms = []
+  for word in text.split():
+    prefix = word.endswith("*")
+    word = word.rstrip("*")
+    if word:
+      terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+  return " ".join(terms)
+
+
+def _retry_after(status: str, attempts: int, now: datetime) -> str | None:
+  return retry_not_before(attempts, now).isoformat() if status == "retryable_failed" else None
+
+
+def _row_to_pending(row: sqlite3.Row) -> PendingSyncItem:
+  payload = json.loads(row["payload_json"])
+  return PendingSyncItem(
+      item_key=row["item_key"],
+      message_key=row["message_key"],
+      topic=row["topic"],
+      day=row["day"],
+      url=payload["url"],
+      url_normalized=payload["url_normalized"],
+      title=payload["title"],
+      snippet=payload["snippet"],
+      source_domain=payload["source_domain"],
+      source_message_id=payload["source_message_id"],
+  )
+
+
 class StateStore:
   def __init__(self, db_path: Path):
     self.db_path = db_path
     self.db_path.parent.mkdir(parents=True, exist_ok=True)
-    self.conn = sqlite3.connect(str(self.db_path))
+    self.conn = sqlite3.connect(str(self.db_path), timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
     self.conn.row_factory = sqlite3.Row
-    self._init_schema()
+    # WAL lets several sync workers read while one of them holds the write lock.
+    self.conn.execute("PRAGMA journal_mode=WAL")
+    # Under the write lock, so connections opened together (e.g. pipeline stages) migrate and fill new
+    # tables from history exactly once.
+    self.conn.execute("BEGIN IMMEDIATE")
+    try:
+      self._init_schema()
+    except BaseException:
+      self.conn.rollback()
+      raise
 
   def close(self) -> None:
     self.conn.close()
@@ -84,11 +165,182 @@ class StateStore:
         attempts INTEGER NOT NULL,
         last_error TEXT,
         findfirst_bookmark_id INTEGER,
+        updated_at TEXT NOT NULL,
+        retry_after TEXT
+      )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sync_attempts_item ON sync_attempts(item_key, id)")
+    # retry_after (not-before time of a retryable failure) was added later; older rows keep NULL (retry at once).
+    if "retry_after" not in {row["name"] for row in cur.execute("PRAGMA table_info(sync_attempts)")}:
+      cur.execute("ALTER TABLE sync_attempts ADD COLUMN retry_after TEXT")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_items_first_seen ON items(first_seen_at)")
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS sync_leases (
+        item_key TEXT PRIMARY KEY,
+        worker_id TEXT NOT NULL,
+        lease_expires_at TEXT NOT NULL
+      )
+    """)
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS findfirst_urls (
+        url_normalized TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
         updated_at TEXT NOT NULL
       )
     """)
+    # When each source last seeded the whole index; kept apart from the URL rows so an empty export counts too.
+    has_seeds = cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'url_index_seeds'").fetchone()
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS url_index_seeds (
+        source TEXT PRIMARY KEY,
+        seeded_at TEXT NOT NULL
+      )
+    """)
+    if not has_seeds:
+      cur.execute("""
+        INSERT INTO url_index_seeds(source, seeded_at)
+        SELECT source, MAX(updated_at) FROM findfirst_urls GROUP BY source
+      """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_items_topic_day ON items(topic, day)")
+    # Added after the items table shipped; rows from older databases keep NULL.
+    if "first_seen_run" not in {row["name"] for row in cur.execute("PRAGMA table_info(items)")}:
+      cur.execute("ALTER TABLE items ADD COLUMN first_seen_run TEXT")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_items_first_seen_run ON items(first_seen_run)")
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS rollup_summaries (
+        topic TEXT NOT NULL,
+        level TEXT NOT NULL,
+        period TEXT NOT NULL,
+        start_day TEXT NOT NULL,
+        end_day TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        source_count INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (topic, level, period)
+      )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_rollup_summaries_level_end ON rollup_summaries(level, end_day)")
+    self._init_report_rollups(cur)
+    self.fts_enabled = self._init_fts(cur)
     self.conn.commit()
 
+  def _init_report_rollups(self, cur: sqlite3.Cursor) -> None:
+    """
+    Per-day report rollups maintained by triggers: new items and their first links per (day, topic),
+    and sync attempt outcomes per (day, run, topic, status). Filled from history when first created.
+    Each run's narrative report sections are kept per (day, run, section) next to them.
+    """
+    existing = {row["name"] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS topic_day_rollups (
+        day TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        new_items INTEGER NOT NULL,
+        links_json TEXT NOT NULL,
+        PRIMARY KEY (day, topic)
+      )
+    """)
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS sync_day_rollups (
+        day TEXT NOT NULL,
+        run_id TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL,
+        PRIMARY KEY (day, run_id, topic, status)
+      )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sync_day_rollups_run ON sync_day_rollups(run_id)")
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS report_day_sections (
+        day TEXT NOT NULL,
+        run_id TEXT NOT NULL,
+        section TEXT NOT NULL,
+        markdown TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (day, run_id, section)
+      )
+    """)
+    cur.execute(f"""
+      CREATE TRIGGER IF NOT EXISTS topic_day_rollups_insert AFTER INSERT ON items BEGIN
+        INSERT INTO topic_day_rollups(day, topic, new_items, links_json)
+        VALUES (new.day, new.topic, 1, json_array(json_extract(new.payload_json, '$.url')))
+        ON CONFLICT(day, topic) DO UPDATE SET
+          new_items = new_items + 1,
+          links_json = CASE WHEN json_array_length(links_json) < {REPORT_LINKS_PER_TOPIC}
+            THEN json_insert(links_json, '$[#]', json_extract(new.payload_json, '$.url')) ELSE links_json END;
+      END
+    """)
+    cur.execute("""
+      CREATE TRIGGER IF NOT EXISTS sync_day_rollups_insert AFTER INSERT ON sync_attempts BEGIN
+        INSERT INTO sync_day_rollups(day, run_id, topic, status, attempts)
+        VALUES (
+          substr(new.updated_at, 1, 10), new.run_id,
+          COALESCE((SELECT topic FROM items WHERE item_key = new.item_key), ''), new.status, 1)
+        ON CONFLICT(day, run_id, topic, status) DO UPDATE SET attempts = attempts + 1;
+      END
+    """)
+    if "topic_day_rollups" not in existing:
+      cur.execute(f"""
+        INSERT INTO topic_day_rollups(day, topic, new_items, links_json)
+        SELECT i.day, i.topic, COUNT(*), (
+          SELECT json_group_array(url) FROM (
+            SELECT json_extract(l.payload_json, '$.url') AS url FROM items l
+            WHERE l.topic = i.topic AND l.day = i.day ORDER BY l.first_seen_at, l.rowid
+            LIMIT {REPORT_LINKS_PER_TOPIC}))
+        FROM items i GROUP BY i.day, i.topic
+      """)
+    if "sync_day_rollups" not in existing:
+      cur.execute("""
+        INSERT INTO sync_day_rollups(day, run_id, topic, status, attempts)
+        SELECT substr(sa.updated_at, 1, 10), sa.run_id, COALESCE(i.topic, ''), sa.status, COUNT(*)
+        FROM sync_attempts sa LEFT JOIN items i ON i.item_key = sa.item_key
+        GROUP BY 1, 2, 3, 4
+      """)
+
+  def _init_fts(self, cur: sqlite3.Cursor) -> bool:
+    """
+    Full-text index over item title, snippet and domain (rowid = items.rowid), kept in sync by triggers
+    so every insert path is covered. Filled from existing items when first created. False without FTS5.
+    """
+    exists = cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'").fetchone()
+    try:
+      cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+          title, snippet, source_domain, tokenize = 'porter unicode61 remove_diacritics 2'
+        )
+      """)
+    except sqlite3.OperationalError:
+      return False
+    columns = """
+      json_extract(new.payload_json, '$.title'), json_extract(new.payload_json, '$.snippet'),
+      json_extract(new.payload_json, '$.source_domain')
+    """
+    cur.execute(f"""
+      CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, title, snippet, source_domain) VALUES (new.rowid, {columns});
+      END
+    """)
+    cur.execute(f"""
+      CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF payload_json ON items BEGIN
+        DELETE FROM items_fts WHERE rowid = old.rowid;
+        INSERT INTO items_fts(rowid, title, snippet, source_domain) VALUES (new.rowid, {columns});
+      END
+    """)
+    cur.execute("""
+      CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+        DELETE FROM items_fts WHERE rowid = old.rowid;
+      END
+    """)
+    if not exists:
+      cur.execute("""
+        INSERT INTO items_fts(rowid, title, snippet, source_domain)
+        SELECT rowid, json_extract(payload_json, '$.title'), json_extract(payload_json, '$.snippet'),
+               json_extract(payload_json, '$.source_domain')
+        FROM items
+      """)
+    return True
+
   def get_checkpoint(self, mailbox: str) -> int:
     cur = self.conn.execute("SELECT last_uid FROM sync_checkpoint WHERE mailbox = ?", (mailbox,))
     row = cur.fetchone()
@@ -118,8 +370,12 @@ class StateStore:
         (msg_key, source_message_id, source_account, datetime.utcnow().isoformat(), max_uid))
     self.conn.commit()
 
-  def save_payloads(self, payloads: Iterable[CanonicalAlertPayload]) -> int:
-    created = 0
+  def save_payloads(self, payloads: Iterable[CanonicalAlertPayload], run_id: str | None = None) -> int:
+    return len(self.save_new_payloads(payloads, run_id))
+
+  def save_new_payloads(self, payloads: Iterable[CanonicalAlertPayload], run_id: str | None = None) -> list[str]:
+    """Store payloads from unseen messages; returns the keys of items created, tagged with `run_id`."""
+    created: list[str] = []
     for payload in payloads:
       msg_key = make_message_key(payload.source_account, payload.source_message_id)
       if self.is_message_seen(msg_key):
@@ -142,72 +398,284 @@ class StateStore:
         })
         cur = self.conn.execute(
             """
-            INSERT OR IGNORE INTO items(item_key, message_key, topic, day, payload_json, first_seen_at, last_seen_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT OR IGNORE INTO items(
+              item_key, message_key, topic, day, payload_json, first_seen_at, last_seen_at, first_seen_run)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (item_key, msg_key, payload.alert_topic, day, payload_json, now, now))
+            (item_key, msg_key, payload.alert_topic, day, payload_json, now, now, run_id))
         if cur.rowcount:
-          created += 1
+          created.append(item_key)
         else:
           self.conn.execute("UPDATE items SET last_seen_at=? WHERE item_key=?", (now, item_key))
       self.conn.commit()
     return created
 
   def get_pending_items(self, run_id: str) -> list[PendingSyncItem]:
-    cur = self.conn.execute("""
-      SELECT i.item_key, i.message_key, i.topic, i.day, i.payload_json
-      FROM items i
-      LEFT JOIN (
-        SELECT item_key, status
-        FROM sync_attempts
-        WHERE id IN (SELECT MAX(id) FROM sync_attempts GROUP BY item_key)
-      ) sa ON sa.item_key = i.item_key
-      WHERE sa.status IS NULL OR sa.status NOT IN ('synced', 'duplicate', 'permanent_failed')
-      ORDER BY i.first_seen_at ASC
-    """)
+    cur = self.conn.execute(PENDING_ITEMS_SQL + " ORDER BY i.first_seen_at ASC")
+    return [_row_to_pending(row) for row in cur.fetchall()]
+
+  def claim_pending_items(self, worker_id: str, run_id: str, limit: int, lease_seconds: int) -> list[PendingSyncItem]:
+    """
+    Atomically lease up to `limit` pending items to `worker_id`. Items leased by
+    another worker are skipped until that lease expires, items this run has
+    already attempted are not handed out again, and retryable failures wait out
+    their backoff whichever run claims them.
+    """
+    now = datetime.utcnow()
+    expires_at = (now + timedelta(seconds=lease_seconds)).isoformat()
+    self.conn.execute("BEGIN IMMEDIATE")
+    try:
+      cur = self.conn.execute(
+          PENDING_ITEMS_SQL + """
+            AND NOT EXISTS (
+              SELECT 1 FROM sync_leases l
+              WHERE l.item_key = i.item_key AND l.worker_id != ? AND l.lease_expires_at > ?
+            )
+            AND NOT EXISTS (SELECT 1 FROM sync_attempts a WHERE a.item_key = i.item_key AND a.run_id = ?)
+            AND (sa.retry_after IS NULL OR sa.retry_after <= ?)
+            ORDER BY i.first_seen_at ASC
+            LIMIT ?
+          """,
+          (worker_id, now.isoformat(), run_id, now.isoformat(), limit))
+      items = [_row_to_pending(row) for row in cur.fetchall()]
+      self.conn.executemany(
+          """
+          INSERT INTO sync_leases(item_key, worker_id, lease_expires_at) VALUES (?, ?, ?)
+          ON CONFLICT(item_key) DO UPDATE SET worker_id=excluded.worker_id, lease_expires_at=excluded.lease_expires_at
+          """,
+          ((item.item_key, worker_id, expires_at) for item in items))
+      self.conn.commit()
+    except BaseException:
+      self.conn.rollback()
+      raise
+    return items
+
+  def claim_items(self, worker_id: str, run_id: str, item_keys: list[str], lease_seconds: int) -> list[PendingSyncItem]:
+    """
+    Lease the given items to `worker_id`, like `claim_pending_items` but for known keys (e.g. items just
+    stored by a pipelined run). Items that are no longer pending or are leased elsewhere are skipped.
+    """
+    now = datetime.utcnow()
+    expires_at = (now + timedelta(seconds=lease_seconds)).isoformat()
     items: list[PendingSyncItem] = []
-    for row in cur.fetchall():
-      payload = json.loads(row["payload_json"])
-      items.append(PendingSyncItem(
-          item_key=row["item_key"],
-          message_key=row["message_key"],
-          topic=row["topic"],
-          day=row["day"],
-          url=payload["url"],
-          url_normalized=payload["url_normalized"],
-          title=payload["title"],
-          snippet=payload["snippet"],
-          source_domain=payload["source_domain"],
-          source_message_id=payload["source_message_id"],
-      ))
+    self.conn.execute("BEGIN IMMEDIATE")
+    try:
+      for start in range(0, len(item_keys), URL_LOOKUP_CHUNK):
+        chunk = item_keys[start:start + URL_LOOKUP_CHUNK]
+        placeholders = ",".join("?" for _ in chunk)
+        cur = self.conn.execute(
+            PENDING_ITEMS_SQL + f"""
+              AND i.item_key IN ({placeholders})
+              AND NOT EXISTS (
+                SELECT 1 FROM sync_leases l
+                WHERE l.item_key = i.item_key AND l.worker_id != ? AND l.lease_expires_at > ?
+              )
+              AND NOT EXISTS (SELECT 1 FROM sync_attempts a WHERE a.item_key = i.item_key AND a.run_id = ?)
+              AND (sa.retry_after IS NULL OR sa.retry_after <= ?)
+              ORDER BY i.first_seen_at ASC
+            """,
+            (*chunk, worker_id, now.isoformat(), run_id, now.isoformat()))
+        items.extend(_row_to_pending(row) for row in cur.fetchall())
+      self.conn.executemany(
+          """
+          INSERT INTO sync_leases(item_key, worker_id, lease_expires_at) VALUES (?, ?, ?)
+          ON CONFLICT(item_key) DO UPDATE SET worker_id=excluded.worker_id, lease_expires_at=excluded.lease_expires_at
+          """,
+          ((item.item_key, worker_id, expires_at) for item in items))
+      self.conn.commit()
+    except BaseException:
+      self.conn.rollback()
+      raise
     return items
 
+  def renew_leases(self, worker_id: str, item_keys: list[str], lease_seconds: int) -> set[str]:
+    """Extend this worker's leases. Returns the keys it still holds; expired ones may have been reclaimed."""
+    now = datetime.utcnow()
+    expires_at = (now + timedelta(seconds=lease_seconds)).isoformat()
+    held: set[str] = set()
+    for start in range(0, len(item_keys), URL_LOOKUP_CHUNK):
+      chunk = item_keys[start:start + URL_LOOKUP_CHUNK]
+      placeholders = ",".join("?" for _ in chunk)
+      self.conn.execute(
+          f"""
+          UPDATE sync_leases SET lease_expires_at = ?
+          WHERE worker_id = ? AND item_key IN ({placeholders})
+          """,
+          (expires_at, worker_id, *chunk))
+      cur = self.conn.execute(
+          f"SELECT item_key FROM sync_leases WHERE worker_id = ? AND item_key IN ({placeholders})",
+          (worker_id, *chunk))
+      held.update(row["item_key"] for row in cur.fetchall())
+    self.conn.commit()
+    return held
+
+  def release_leases(self, worker_id: str, item_keys: list[str]) -> None:
+    self.conn.executemany(
+        "DELETE FROM sync_leases WHERE worker_id = ? AND item_key = ?",
+        ((worker_id, key) for key in item_keys))
+    self.conn.commit()
+
   def record_sync_attempt(self, item_key: str, run_id: str, status: str, attempts: int, last_error: str | None = None,
       bookmark_id: int | None = None) -> None:
+    now = datetime.utcnow()
     self.conn.execute(
         """
-        INSERT INTO sync_attempts(item_key, run_id, status, attempts, last_error, findfirst_bookmark_id, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO sync_attempts(item_key, run_id, status, attempts, last_error, findfirst_bookmark_id, updated_at, retry_after)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (item_key, run_id, status, attempts, last_error, bookmark_id, now.isoformat(), _retry_after(status, attempts, now)))
+    self.conn.commit()
+
+  def record_sync_attempts(self, attempts: Iterable[tuple[str, str, str, int, str | None, int | None]]) -> None:
+    """
+    Write many (item_key, run_id, status, attempts, last_error, bookmark_id) rows in one transaction.
+    Retryable failures get a not-before time from the backoff schedule, which claims respect.
+    """
+    now = datetime.utcnow()
+    self.conn.executemany(
+        """
+        INSERT INTO sync_attempts(item_key, run_id, status, attempts, last_error, findfirst_bookmark_id, updated_at, retry_after)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """,
-        (item_key, run_id, status, attempts, last_error, bookmark_id, datetime.utcnow().isoformat()))
+        ((*row, now.isoformat(), _retry_after(row[2], row[3], now)) for row in attempts))
     self.conn.commit()
 
+  def get_attempt_counts(self, item_keys: list[str]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for start in range(0, len(item_keys), URL_LOOKUP_CHUNK):
+      chunk = item_keys[start:start + URL_LOOKUP_CHUNK]
+      placeholders = ",".join("?" for _ in chunk)
+      cur = self.conn.execute(
+          f"""
+          SELECT item_key, MAX(attempts) AS attempts FROM sync_attempts
+          WHERE item_key IN ({placeholders}) GROUP BY item_key
+          """, chunk)
+      counts.update({row["item_key"]: int(row["attempts"]) for row in cur.fetchall()})
+    return {key: counts.get(key, 0) for key in item_keys}
+
   def get_attempt_count(self, item_key: str) -> int:
     cur = self.conn.execute("SELECT MAX(attempts) as attempts FROM sync_attempts WHERE item_key = ?", (item_key,))
     row = cur.fetchone()
     return int(row["attempts"]) if row and row["attempts"] is not None else 0
 
-  def checkpoint_if_terminal(self, mailbox: str) -> bool:
+  def add_known_urls(self, urls: Iterable[str], source: str) -> int:
+    """Record normalized URLs that already exist in FindFirst. Returns rows written."""
+    now = datetime.utcnow().isoformat()
+    before = self.conn.total_changes
+    self.conn.executemany(
+        """
+        INSERT INTO findfirst_urls(url_normalized, source, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(url_normalized) DO UPDATE SET source=excluded.source, updated_at=excluded.updated_at
+        """,
+        ((url, source, now) for url in urls))
+    self.conn.commit()
+    return self.conn.total_changes - before
+
+  def known_urls(self, urls: Iterable[str]) -> set[str]:
+    """Return the subset of normalized URLs present in the local FindFirst URL index."""
+    candidates = list(dict.fromkeys(urls))
+    found: set[str] = set()
+    for start in range(0, len(candidates), URL_LOOKUP_CHUNK):
+      chunk = candidates[start:start + URL_LOOKUP_CHUNK]
+      placeholders = ",".join("?" for _ in chunk)
+      cur = self.conn.execute(
+          f"SELECT url_normalized FROM findfirst_urls WHERE url_normalized IN ({placeholders})", chunk)
+      found.update(row["url_normalized"] for row in cur.fetchall())
+    return found
+
+  def mark_url_index_seeded(self, source: str) -> None:
+    """Record that `source` has just seeded the index in full, even if it had no URLs."""
+    self._mark_url_index_seeded(source, datetime.utcnow().isoformat())
+    self.conn.commit()
+
+  def _mark_url_index_seeded(self, source: str, now: str) -> None:
+    self.conn.execute(
+        """
+        INSERT INTO url_index_seeds(source, seeded_at) VALUES (?, ?)
+        ON CONFLICT(source) DO UPDATE SET seeded_at=excluded.seeded_at
+        """,
+        (source, now))
+
+  def url_index_updated_at(self, source: str) -> datetime | None:
+    """When `source` last seeded the index (`mark_url_index_seeded`), or None if it never has."""
+    cur = self.conn.execute("SELECT seeded_at FROM url_index_seeds WHERE source = ?", (source,))
+    row = cur.fetchone()
+    return datetime.fromisoformat(row["seeded_at"]) if row else None
+
+  def load_remote_snapshot(self, urls: Iterable[str]) -> int:
+    """
+    Stage normalized FindFirst URLs, and the URLs we believe are there, in
+    connection-local temp tables for the reconcile joins below. Rows stream
+    straight into SQLite, so memory does not grow with the size of the export.
+    Returns distinct remote URLs staged.
+    """
+    self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS remote_urls (url_normalized TEXT PRIMARY KEY)")
+    self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS tracked_urls (url_normalized TEXT PRIMARY KEY)")
+    self.conn.execute("DELETE FROM temp.remote_urls")
+    self.conn.execute("DELETE FROM temp.tracked_urls")
+    self.conn.executemany(
+        "INSERT OR IGNORE INTO temp.remote_urls(url_normalized) VALUES (?)", ((url,) for url in urls))
+    self.conn.execute(f"INSERT OR IGNORE INTO temp.tracked_urls(url_normalized) {RESOLVED_REMOTE_URLS_SQL}")
+    self.conn.commit()
+    return int(self.conn.execute("SELECT COUNT(*) AS cnt FROM temp.remote_urls").fetchone()["cnt"])
+
+  def reconcile_counts(self) -> dict[str, int]:
+    cur = self.conn.execute("""
+      SELECT
+        (SELECT COUNT(*) FROM temp.tracked_urls) AS tracked,
+        (SELECT COUNT(*) FROM temp.tracked_urls t
+          WHERE t.url_normalized NOT IN (SELECT url_normalized FROM temp.remote_urls)) AS missing_remote,
+        (SELECT COUNT(*) FROM temp.remote_urls r
+          WHERE r.url_normalized NOT IN (SELECT url_normalized FROM temp.tracked_urls)) AS untracked_remote
+    """)
+    row = cur.fetchone()
+    return {key: int(row[key]) for key in ("tracked", "missing_remote", "untracked_remote")}
+
+  def missing_remote_urls(self, limit: int) -> list[str]:
     cur = self.conn.execute("""
-      SELECT COUNT(*) AS pending_cnt
+      SELECT url_normalized FROM temp.tracked_urls
+      WHERE url_normalized NOT IN (SELECT url_normalized FROM temp.remote_urls)
+      ORDER BY url_normalized
+      LIMIT ?
+    """, (limit,))
+    return [row["url_normalized"] for row in cur.fetchall()]
+
+  def requeue_missing_remote(self, run_id: str, reason: str) -> int:
+    """Mark synced items (with a bookmark id) whose URL is absent from the snapshot as pending again."""
+    now = datetime.utcnow().isoformat()
+    cur = self.conn.execute(f"""
+      INSERT INTO sync_attempts(item_key, run_id, status, attempts, last_error, findfirst_bookmark_id, updated_at)
+      SELECT i.item_key, ?, 'requeued', sa.attempts, ?, NULL, ?
       FROM items i
-      LEFT JOIN (
-        SELECT item_key, status
-        FROM sync_attempts
-        WHERE id IN (SELECT MAX(id) FROM sync_attempts GROUP BY item_key)
-      ) sa ON sa.item_key = i.item_key
-      WHERE sa.status IS NULL OR sa.status NOT IN ('synced', 'duplicate', 'permanent_failed')
+      JOIN sync_attempts sa ON sa.id = (SELECT MAX(id) FROM sync_attempts WHERE item_key = i.item_key)
+      WHERE {SYNCED_REMOTE_FILTER_SQL}
+        AND NOT EXISTS (
+          SELECT 1 FROM temp.remote_urls r WHERE r.url_normalized = json_extract(i.payload_json, '$.url_normalized')
+        )
+    """, (run_id, reason, now))
+    self.conn.commit()
+    return cur.rowcount
+
+  def replace_url_index_with_snapshot(self, source: str) -> int:
+    """Drop index entries FindFirst no longer has and record the snapshot. Returns entries pruned."""
+    now = datetime.utcnow().isoformat()
+    cur = self.conn.execute("""
+      DELETE FROM findfirst_urls
+      WHERE url_normalized NOT IN (SELECT url_normalized FROM temp.remote_urls)
     """)
+    pruned = cur.rowcount
+    self.conn.execute("""
+      INSERT INTO findfirst_urls(url_normalized, source, updated_at)
+      SELECT url_normalized, ?, ? FROM temp.remote_urls WHERE true
+      ON CONFLICT(url_normalized) DO UPDATE SET source=excluded.source, updated_at=excluded.updated_at
+    """, (source, now))
+    self._mark_url_index_seeded(source, now)
+    self.conn.commit()
+    return pruned
+
+  def checkpoint_if_terminal(self, mailbox: str) -> bool:
+    cur = self.conn.execute(f"SELECT COUNT(*) AS pending_cnt FROM ({PENDING_ITEMS_SQL})")
     if int(cur.fetchone()["pending_cnt"]) > 0:
       return False
     cur = self.conn.execute("SELECT COALESCE(MAX(max_uid), 0) as max_uid FROM seen_messages")
@@ -217,8 +685,8 @@ class StateStore:
 
   def run_stats(self, run_id: str) -> dict[str, int]:
     cur = self.conn.execute("""
-      SELECT status, COUNT(*) AS cnt
-      FROM sync_attempts
+      SELECT status, SUM(attempts) AS cnt
+      FROM sync_day_rollups
       WHERE run_id = ?
       GROUP BY status
     """, (run_id,))
@@ -237,3 +705,168 @@ class StateStore:
         out[topic] = []
       out[topic].append(payload["url"])
     return out
+
+  def iter_topic_day_rollups(self, start_day: str, end_day: str) -> Iterator[tuple[str, str, int, list[str]]]:
+    """(day, topic, new items, first links) for an inclusive day range in (day, topic) order, read lazily."""
+    cur = self.conn.execute(
+        "SELECT day, topic, new_items, links_json FROM topic_day_rollups WHERE day BETWEEN ? AND ? ORDER BY day, topic",
+        (start_day, end_day))
+    for row in cur:
+      yield row["day"], row["topic"], int(row["new_items"]), json.loads(row["links_json"])
+
+  def topic_day_rollups(self, start_day: str, end_day: str) -> dict[str, dict[str, tuple[int, list[str]]]]:
+    """{day: {topic: (new items, first links)}} for an inclusive day range."""
+    out: dict[str, dict[str, tuple[int, list[str]]]] = {}
+    for day, topic, count, links in self.iter_topic_day_rollups(start_day, end_day):
+      out.setdefault(day, {})[topic] = (count, links)
+    return out
+
+  def new_items_between(self, start_day: str, end_day: str) -> int:
+    cur = self.conn.execute(
+        "SELECT COALESCE(SUM(new_items), 0) FROM topic_day_rollups WHERE day BETWEEN ? AND ?", (start_day, end_day))
+    return int(cur.fetchone()[0])
+
+  def sync_day_rollups(self, start_day: str, end_day: str) -> dict[str, dict[str, dict[str, int]]]:
+    """{day: {run_id: {status: attempts}}} for sync attempts recorded in an inclusive day range."""
+    cur = self.conn.execute(
+        """
+        SELECT day, run_id, status, SUM(attempts) AS attempts FROM sync_day_rollups
+        WHERE day BETWEEN ? AND ? GROUP BY day, run_id, status ORDER BY day, run_id, status
+        """,
+        (start_day, end_day))
+    out: dict[str, dict[str, dict[str, int]]] = {}
+    for row in cur.fetchall():
+      out.setdefault(row["day"], {}).setdefault(row["run_id"], {})[row["status"]] = int(row["attempts"])
+    return out
+
+  def save_report_sections(self, day: str, run_id: str, sections: dict[str, str | None]) -> None:
+    """Keep a run's narrative sections (e.g. `novelty`, `narrative_delta`) for the day's report; empty ones are skipped."""
+    now = datetime.utcnow().isoformat()
+    self.conn.executemany(
+        """
+        INSERT INTO report_day_sections(day, run_id, section, markdown, created_at) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(day, run_id, section) DO UPDATE SET markdown=excluded.markdown, created_at=excluded.created_at
+        """,
+        ((day, run_id, section, text.strip(), now) for section, text in sections.items() if text and text.strip()))
+    self.conn.commit()
+
+  def report_sections(self, start_day: str, end_day: str) -> dict[str, dict[str, list[tuple[str, str]]]]:
+    """{day: {section: [(run_id, markdown)]}} for an inclusive day range, runs in the order they were stored."""
+    cur = self.conn.execute(
+        """
+        SELECT day, run_id, section, markdown FROM report_day_sections
+        WHERE day BETWEEN ? AND ? ORDER BY day, created_at, run_id
+        """,
+        (start_day, end_day))
+    out: dict[str, dict[str, list[tuple[str, str]]]] = {}
+    for row in cur.fetchall():
+      out.setdefault(row["day"], {}).setdefault(row["section"], []).append((row["run_id"], row["markdown"]))
+    return out
+
+  def items_first_seen_in_run(self, run_id: str) -> list[PendingSyncItem]:
+    """Items created by `save_new_payloads` for `run_id`, in insertion order."""
+    cur = self.conn.execute(
+        """
+        SELECT item_key, message_key, topic, day, payload_json FROM items
+        WHERE first_seen_run = ? ORDER BY first_seen_at, rowid
+        """,
+        (run_id,))
+    return [_row_to_pending(row) for row in cur.fetchall()]
+
+  def search_items(
+      self,
+      text: str,
+      *,
+      topic: str | None = None,
+      start_day: str | None = None,
+      end_day: str | None = None,
+      limit: int = 20,
+  ) -> list[tuple[PendingSyncItem, float]]:
+    """
+    BM25 full-text search (title weighted over snippet over domain), best first, optionally within one
+    topic and an inclusive day window. Scores are negated bm25(), so higher is better.
+    """
+    query = fts_query(text)
+    if not self.fts_enabled:
+      raise RuntimeError("full-text search needs an SQLite build with FTS5")
+    if not query:
+      return []
+    clauses = ["items_fts MATCH ?"]
+    params: list = [query]
+    for clause, value in (("i.topic = ?", topic), ("i.day >= ?", start_day), ("i.day <= ?", end_day)):
+      if value:
+        clauses.append(clause)
+        params.append(value)
+    weights = ", ".join(str(w) for w in FTS_COLUMN_WEIGHTS)
+    cur = self.conn.execute(
+        f"""
+        SELECT i.item_key, i.message_key, i.topic, i.day, i.payload_json, -bm25(items_fts, {weights}) AS score
+        FROM items_fts JOIN items i ON i.rowid = items_fts.rowid
+        WHERE {" AND ".join(clauses)}
+        ORDER BY bm25(items_fts, {weights})
+        LIMIT ?
+        """,
+        (*params, limit))
+    return [(_row_to_pending(row), float(row["score"])) for row in cur.fetchall()]
+
+  def items_by_keys(self, item_keys: Iterable[str]) -> dict[str, PendingSyncItem]:
+    keys = list(dict.fromkeys(item_keys))
+    found: dict[str, PendingSyncItem] = {}
+    for start in range(0, len(keys), URL_LOOKUP_CHUNK):
+      chunk = keys[start:start + URL_LOOKUP_CHUNK]
+      placeholders = ",".join("?" for _ in chunk)
+      cur = self.conn.execute(
+          f"SELECT item_key, message_key, topic, day, payload_json FROM items WHERE item_key IN ({placeholders})", chunk)
+      found.update((row["item_key"], _row_to_pending(row)) for row in cur.fetchall())
+    return found
+
+  def unsummarized_topic_days(self, before_day: str) -> list[tuple[str, str]]:
+    """(topic, day) pairs with items before `before_day` that have no daily rollup yet."""
+    cur = self.conn.execute("""
+      SELECT DISTINCT i.topic, i.day
+      FROM items i
+      WHERE i.day < ?
+        AND NOT EXISTS (
+          SELECT 1 FROM rollup_summaries r WHERE r.level = 'day' AND r.topic = i.topic AND r.period = i.day
+        )
+      ORDER BY i.day, i.topic
+    """, (before_day,))
+    return [(row["topic"], row["day"]) for row in cur.fetchall()]
+
+  def items_for_topic_day(self, topic: str, day: str) -> list[PendingSyncItem]:
+    cur = self.conn.execute(
+        "SELECT item_key, message_key, topic, day, payload_json FROM items WHERE topic = ? AND day = ? ORDER BY first_seen_at",
+        (topic, day))
+    return [_row_to_pending(row) for row in cur.fetchall()]
+
+  def save_rollups(self, rollups: Iterable[RollupSummary]) -> None:
+    now = datetime.utcnow().isoformat()
+    self.conn.executemany(
+        """
+        INSERT INTO rollup_summaries(topic, level, period, start_day, end_day, summary, source_count, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(topic, level, period) DO UPDATE SET
+          start_day = excluded.start_day, end_day = excluded.end_day, summary = excluded.summary,
+          source_count = excluded.source_count, created_at = excluded.created_at
+        """,
+        [(r.topic, r.level, r.period, r.start_day, r.end_day, r.summary, r.source_count, now) for r in rollups])
+    self.conn.commit()
+
+  def get_rollups(
+      self,
+      level: str,
+      *,
+      topic: str | None = None,
+      end_before: str | None = None,
+  ) -> list[RollupSummary]:
+    """Rollups of `level`, optionally for one topic and ending before a day, ordered by period."""
+    sql = "SELECT topic, level, period, start_day, end_day, summary, source_count FROM rollup_summaries WHERE level = ?"
+    params: list[str] = [level]
+    if topic is not None:
+      sql += " AND topic = ?"
+      params.append(topic)
+    if end_before is not None:
+      sql += " AND end_day < ?"
+      params.append(end_before)
+    cur = self.conn.execute(sql + " ORDER BY start_day, topic", params)
+    return [RollupSummary(**dict(row)) for row in cur.fetchall()]
@@ -1,3 +1,5 @@
+import os
+import socket
 from collections import defaultdict
 from itertools import islice
 
@@ -6,6 +8,7 @@ from alert_historian.state.store import PendingSyncItem, StateStore
 from alert_historian.sync.findfirst_client import FindFirstClient
 from alert_historian.sync.mappers import tag_titles_for_item, to_add_bkmk_req
 from alert_historian.sync.retry import MAX_ATTEMPTS_PER_RUN, backoff_sleep, classify_http_status
+from alert_historian.sync.url_index import SYNC_SOURCE, refresh_url_index, split_known_duplicates, url_index_is_stale
 
 
 def chunked(seq: list[PendingSyncItem], size: int):
@@ -28,7 +31,9 @@ def _tag_id_map(client: FindFirstClient) -> dict[str, int]:
   return out
 
 
-def _ensure_tags(client: FindFirstClient, titles: list[str]) -> dict[str, int]:
+def _ensure_tags(client: FindFirstClient, titles: list[str], known: dict[str, int] | None = None) -> dict[str, int]:
+  if known is not None and all(t in known for t in titles):
+    return known
   tag_map = _tag_id_map(client)
   missing = [t for t in titles if t not in tag_map]
   if missing:
@@ -37,60 +42,180 @@ def _ensure_tags(client: FindFirstClient, titles: list[str]) -> dict[str, int]:
   return tag_map
 
 
-def sync_pending_items(settings: Settings, store: StateStore, run_id: str) -> dict[str, int]:
-  client = FindFirstClient(settings)
-  signin_resp = client.signin()
-  if signin_resp.status_code != 200:
-    raise RuntimeError(f"FindFirst signin failed ({signin_resp.status_code})")
-
-  pending = store.get_pending_items(run_id)
-  if not pending:
-    return {"synced": 0, "duplicate": 0, "retryable_failed": 0, "permanent_failed": 0, "total": 0}
-
-  all_tag_titles: set[str] = set()
-  for item in pending:
-    all_tag_titles.update(tag_titles_for_item(item, settings.use_domain_tags))
-  tag_map = _ensure_tags(client, sorted(all_tag_titles))
-
-  counters = defaultdict(int)
-  batch_size = max(1, min(100, settings.sync_batch_size))
-  for batch in chunked(pending, batch_size):
-    payload: list[dict[str, object]] = []
-    for item in batch:
-      tag_titles = tag_titles_for_item(item, settings.use_domain_tags)
-      tag_ids = [tag_map[t] for t in tag_titles if t in tag_map]
-      payload.append(to_add_bkmk_req(item, tag_ids))
-
-    resp = client.bulk_add_bookmarks(payload)
-    decision = classify_http_status(resp.status_code, resp.text)
-
-    if resp.status_code == 200 and isinstance(resp.data, list):
-      # Bulk endpoint can return null entries for failures; resolve per item.
-      for idx, item in enumerate(batch):
-        result_obj = resp.data[idx] if idx < len(resp.data) else None
-        attempt = store.get_attempt_count(item.item_key) + 1
-        if isinstance(result_obj, dict) and result_obj.get("id"):
-          store.record_sync_attempt(item.item_key, run_id, "synced", attempt, bookmark_id=int(result_obj["id"]))
-          counters["synced"] += 1
-        elif attempt >= MAX_ATTEMPTS_PER_RUN:
-          store.record_sync_attempt(item.item_key, run_id, "permanent_failed", attempt, "bulk-item-null-max-attempts")
-          counters["permanent_failed"] += 1
-        else:
-          store.record_sync_attempt(item.item_key, run_id, "retryable_failed", attempt, "bulk-item-null")
-          counters["retryable_failed"] += 1
-      continue
-
-    # Non-200 on bulk call affects all items in the batch.
-    for item in batch:
-      attempt = store.get_attempt_count(item.item_key) + 1
-      status = decision.status
-      if status == "retryable_failed" and attempt < MAX_ATTEMPTS_PER_RUN:
-        backoff_sleep(attempt)
-      elif status == "retryable_failed" and attempt >= MAX_ATTEMPTS_PER_RUN:
-        status = "permanent_failed"
-      store.record_sync_attempt(item.item_key, run_id, status, attempt, decision.reason)
-      counters[status] += 1
-
-  store.checkpoint_if_terminal(settings.imap_folder)
-  counters["total"] = sum(v for k, v in counters.items() if k != "total")
-  return dict(counters)
+def default_worker_id() -> str:
+  return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _record_index_duplicates(
+    store: StateStore,
+    run_id: str,
+    items: list[PendingSyncItem],
+    counters: dict[str, int],
+) -> None:
+  # Already in FindFirst; resolve locally instead of spending a bulk request on them.
+  if not items:
+    return
+  attempts = store.get_attempt_counts([item.item_key for item in items])
+  store.record_sync_attempts(
+      (item.item_key, run_id, "duplicate", attempts[item.item_key] + 1, "url-index", None) for item in items)
+  counters["duplicate"] += len(items)
+
+
+def _sync_batch(
+    client: FindFirstClient,
+    store: StateStore,
+    settings: Settings,
+    run_id: str,
+    batch: list[PendingSyncItem],
+    tag_map: dict[str, int],
+    counters: dict[str, int],
+) -> None:
+  payload: list[dict[str, object]] = []
+  for item in batch:
+    tag_titles = tag_titles_for_item(item, settings.use_domain_tags)
+    tag_ids = [tag_map[t] for t in tag_titles if t in tag_map]
+    payload.append(to_add_bkmk_req(item, tag_ids))
+
+  resp = client.bulk_add_bookmarks(payload)
+  if resp.status_code == 401:
+    # The client already re-authenticated once; don't burn item attempts on bad credentials.
+    raise RuntimeError("FindFirst rejected the session after re-authentication (401)")
+  decision = classify_http_status(resp.status_code, resp.text)
+  prior_attempts = store.get_attempt_counts([item.item_key for item in batch])
+  rows: list[tuple[str, str, str, int, str | None, int | None]] = []
+
+  if resp.status_code == 200 and isinstance(resp.data, list):
+    # Bulk endpoint can return null entries for failures; resolve per item.
+    synced_urls: list[str] = []
+    for idx, item in enumerate(batch):
+      result_obj = resp.data[idx] if idx < len(resp.data) else None
+      attempt = prior_attempts[item.item_key] + 1
+      if isinstance(result_obj, dict) and result_obj.get("id"):
+        rows.append((item.item_key, run_id, "synced", attempt, None, int(result_obj["id"])))
+        synced_urls.append(item.url_normalized)
+      elif attempt >= MAX_ATTEMPTS_PER_RUN:
+        rows.append((item.item_key, run_id, "permanent_failed", attempt, "bulk-item-null-max-attempts", None))
+      else:
+        rows.append((item.item_key, run_id, "retryable_failed", attempt, "bulk-item-null", None))
+    store.record_sync_attempts(rows)
+    store.add_known_urls(synced_urls, SYNC_SOURCE)
+    for row in rows:
+      counters[row[2]] += 1
+    return
+
+  # Non-200 on bulk call affects all items in the batch.
+  max_attempt = 0
+  for item in batch:
+    attempt = prior_attempts[item.item_key] + 1
+    status = decision.status
+    if status == "retryable_failed" and attempt >= MAX_ATTEMPTS_PER_RUN:
+      status = "permanent_failed"
+    elif status == "retryable_failed":
+      max_attempt = max(max_attempt, attempt)
+    rows.append((item.item_key, run_id, status, attempt, decision.reason, None))
+    counters[status] += 1
+  store.record_sync_attempts(rows)
+  if decision.status == "duplicate":
+    store.add_known_urls((item.url_normalized for item in batch), SYNC_SOURCE)
+  if max_attempt:
+    # One backoff per failed bulk call, not one per item in it.
+    backoff_sleep(max_attempt)
+
+
+class SyncSession:
+  """
+  A signed-in client plus the state one sync run keeps across claims: tag ids, whether the URL
+  index was checked, and status counters. `sync_pending_items` drains the pending pool through
+  one; a pipelined run also feeds it the items it has just stored.
+  """
+
+  def __init__(
+      self,
+      settings: Settings,
+      store: StateStore,
+      run_id: str,
+      client: FindFirstClient | None = None,
+      worker_id: str | None = None,
+  ):
+    self.settings = settings
+    self.store = store
+    self.run_id = run_id
+    self.client = client or FindFirstClient(settings)
+    signin_resp = self.client.ensure_session()
+    if signin_resp.status_code != 200:
+      raise RuntimeError(f"FindFirst signin failed ({signin_resp.status_code})")
+
+    self.worker = worker_id or settings.sync_worker_id or default_worker_id()
+    self.lease_seconds = settings.sync_lease_seconds
+    self.batch_size = max(1, min(100, settings.sync_batch_size))
+    self.claim_size = self.batch_size * max(1, settings.sync_claim_batches)
+    self.counters: dict[str, int] = defaultdict(int)
+    self._tag_map: dict[str, int] | None = None
+    self._index_checked = False
+
+  def sync_claimed(self, claimed: list[PendingSyncItem]) -> None:
+    """Sync items leased to this session's worker in bulk batches, then release their leases."""
+    store, settings = self.store, self.settings
+    try:
+      if not self._index_checked:
+        if url_index_is_stale(store, settings.url_index_max_age_hours):
+          refresh_url_index(self.client, store)
+        self._index_checked = True
+      pending, known_duplicates = split_known_duplicates(store, claimed)
+      _record_index_duplicates(store, self.run_id, known_duplicates, self.counters)
+
+      all_tag_titles: set[str] = set()
+      for item in pending:
+        all_tag_titles.update(tag_titles_for_item(item, settings.use_domain_tags))
+      if pending:
+        self._tag_map = _ensure_tags(self.client, sorted(all_tag_titles), self._tag_map)
+
+      for batch in chunked(pending, self.batch_size):
+        held = store.renew_leases(self.worker, [item.item_key for item in batch], self.lease_seconds)
+        # URLs synced by earlier batches are in the index now.
+        batch, known_duplicates = split_known_duplicates(store, [item for item in batch if item.item_key in held])
+        _record_index_duplicates(store, self.run_id, known_duplicates, self.counters)
+        if batch:
+          _sync_batch(self.client, store, settings, self.run_id, batch, self._tag_map or {}, self.counters)
+    finally:
+      store.release_leases(self.worker, [item.item_key for item in claimed])
+
+  def sync_items(self, item_keys: list[str]) -> None:
+    """Lease and sync specific items, e.g. ones a pipelined ingest has just stored."""
+    claimed = self.store.claim_items(self.worker, self.run_id, item_keys, self.lease_seconds)
+    if claimed:
+      self.sync_claimed(claimed)
+
+  def drain(self) -> None:
+    """Claim and sync pending items until none are left for this run."""
+    while True:
+      claimed = self.store.claim_pending_items(self.worker, self.run_id, self.claim_size, self.lease_seconds)
+      if not claimed:
+        return
+      self.sync_claimed(claimed)
+
+  def finish(self) -> dict[str, int]:
+    """Status counts of the run; advances the IMAP checkpoint once nothing is pending."""
+    if not self.counters:
+      return {"synced": 0, "duplicate": 0, "retryable_failed": 0, "permanent_failed": 0, "total": 0}
+    self.store.checkpoint_if_terminal(self.settings.imap_folder)
+    counters = dict(self.counters)
+    counters["total"] = sum(v for k, v in counters.items() if k != "total")
+    return counters
+
+
+def sync_pending_items(
+    settings: Settings,
+    store: StateStore,
+    run_id: str,
+    client: FindFirstClient | None = None,
+    worker_id: str | None = None,
+) -> dict[str, int]:
+  """
+  Drain pending items in leased claims so several workers can share one state DB.
+  Each claim covers a few bulk batches; the lease is renewed before every batch
+  and released once the claim is done.
+  """
+  session = SyncSession(settings, store, run_id, client=client, worker_id=worker_id)
+  session.drain()
+  return session.finish()
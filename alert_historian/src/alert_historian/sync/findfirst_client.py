@@ -1,12 +1,23 @@
 import base64
+import json
+import os
+import re
+import tempfile
+import time
 from dataclasses import dataclass
-from typing import Any
+from pathlib import Path
+from typing import Any, Iterator
 
 import requests
 
 from alert_historian.config.settings import Settings
 
 
+EXPORT_HREF_RE = re.compile(r'<A HREF="(?P<url>[^"]+)"', re.IGNORECASE)
+AUTH_COOKIE = "findfirst"
+# Treat a saved JWT as expired slightly early so it cannot lapse mid-run.
+TOKEN_EXPIRY_SKEW_SECONDS = 60
+
 @dataclass
 class ClientResponse:
   status_code: int
@@ -14,16 +25,132 @@ class ClientResponse:
   text: str
 
 
+def _iter_export_urls(resp: requests.Response) -> Iterator[str]:
+  # The export is a Netscape bookmark file with one <A HREF> per line; read it
+  # line by line so large accounts never have to fit in memory.
+  try:
+    # The export is served as application/octet-stream, so decode lines ourselves.
+    for raw_line in resp.iter_lines():
+      line = raw_line.decode("utf-8", errors="replace")
+      for match in EXPORT_HREF_RE.finditer(line):
+        yield match.group("url")
+  finally:
+    resp.close()
+
+
+def _jwt_expiry(token: str) -> float | None:
+  parts = token.split(".")
+  if len(parts) != 3:
+    return None
+  padded = parts[1] + "=" * (-len(parts[1]) % 4)
+  try:
+    claims = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+  except (ValueError, UnicodeDecodeError):
+    return None
+  exp = claims.get("exp") if isinstance(claims, dict) else None
+  return float(exp) if isinstance(exp, (int, float)) else None
+
+
+def _json_or(resp: requests.Response, default: Any) -> Any:
+  try:
+    return resp.json()
+  except ValueError:
+    return default
+
+
+def _saved_cookies(cookies: Any) -> list[dict[str, str]] | None:
+  """Cookies as written by `save_session`, or None when any entry is malformed."""
+  if not isinstance(cookies, list):
+    return None
+  for cookie in cookies:
+    if not isinstance(cookie, dict) or not all(isinstance(cookie.get(key), str) for key in ("name", "value")):
+      return None
+    if not all(isinstance(cookie.get(key, ""), str) for key in ("domain", "path")):
+      return None
+  return cookies
+
+
 class FindFirstClient:
   def __init__(self, settings: Settings):
     self.base_url = settings.findfirst_base_url.rstrip("/")
     self.username = settings.findfirst_username
     self.password = settings.findfirst_password
+    self.session_path: Path | None = settings.findfirst_session_path
     self.session = requests.Session()
 
   def _url(self, path: str) -> str:
     return f"{self.base_url}{path}"
 
+  def load_session(self) -> bool:
+    """
+    Restore cookies saved by a previous run for the same server and user. A file that cannot be read or
+    does not have the shape `save_session` writes is ignored (False), so the run signs in afresh.
+    """
+    if self.session_path is None or not self.session_path.exists():
+      return False
+    try:
+      saved = json.loads(self.session_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+      return False
+    if not isinstance(saved, dict) or saved.get("base_url") != self.base_url or saved.get("username") != self.username:
+      return False
+    cookies = _saved_cookies(saved.get("cookies", []))
+    if cookies is None:
+      return False
+    for cookie in cookies:
+      self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""),
+          path=cookie.get("path", "/"))
+    return True
+
+  def save_session(self) -> None:
+    if self.session_path is None:
+      return
+    cookies = [
+        {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path}
+        for c in self.session.cookies
+    ]
+    data = json.dumps({"base_url": self.base_url, "username": self.username, "cookies": cookies})
+    self.session_path.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temp file per writer: parallel sync workers may save the session at the same time.
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{self.session_path.name}.", dir=str(self.session_path.parent))
+    try:
+      with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(data)
+      os.replace(tmp_path, self.session_path)
+    except BaseException:
+      Path(tmp_path).unlink(missing_ok=True)
+      raise
+
+  def has_valid_session(self) -> bool:
+    token = self.session.cookies.get(AUTH_COOKIE)
+    if not token:
+      return False
+    expires_at = _jwt_expiry(token)
+    return expires_at is not None and expires_at - TOKEN_EXPIRY_SKEW_SECONDS > time.time()
+
+  def ensure_session(self) -> ClientResponse:
+    """Reuse the saved session when its JWT is still valid, otherwise sign in and save it."""
+    if self.load_session() and self.has_valid_session():
+      return ClientResponse(200, {"reused": True}, "")
+    self.session.cookies.clear()
+    resp = self.signin()
+    if resp.status_code == 200:
+      self.save_session()
+    return resp
+
+  def _request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+    # An expired JWT surfaces as 401; re-authenticate once and replay so callers
+    # never see (or spend item attempts on) a stale session.
+    resp = self.session.request(method, self._url(path), **kwargs)
+    if resp.status_code != 401:
+      return resp
+    self.session.cookies.clear()
+    if self.signin().status_code != 200:
+      return resp
+    resp.close()
+    self.save_session()
+    return self.session.request(method, self._url(path), **kwargs)
+
   def signin(self) -> ClientResponse:
     creds = f"{self.username}:{self.password}"
     token = base64.b64encode(creds.encode("utf-8")).decode("ascii")
@@ -32,36 +159,23 @@ class FindFirstClient:
         headers={"Authorization": f"Basic {token}"},
         timeout=15,
     )
-    data = None
-    try:
-      data = resp.json()
-    except ValueError:
-      data = None
-    return ClientResponse(resp.status_code, data, resp.text)
+    return ClientResponse(resp.status_code, _json_or(resp, None), resp.text)
 
   def list_tags(self) -> ClientResponse:
-    resp = self.session.get(self._url("/api/tags"), timeout=15)
-    data = []
-    try:
-      data = resp.json()
-    except ValueError:
-      data = []
-    return ClientResponse(resp.status_code, data, resp.text)
+    resp = self._request("GET", "/api/tags", timeout=15)
+    return ClientResponse(resp.status_code, _json_or(resp, []), resp.text)
 
   def create_tags(self, tags: list[str]) -> ClientResponse:
-    resp = self.session.post(self._url("/api/tags"), json=tags, timeout=20)
-    data = []
-    try:
-      data = resp.json()
-    except ValueError:
-      data = []
-    return ClientResponse(resp.status_code, data, resp.text)
+    resp = self._request("POST", "/api/tags", json=tags, timeout=20)
+    return ClientResponse(resp.status_code, _json_or(resp, []), resp.text)
 
   def bulk_add_bookmarks(self, payload: list[dict[str, Any]]) -> ClientResponse:
-    resp = self.session.post(self._url("/api/bookmark/addBookmarks"), json=payload, timeout=45)
-    data = []
-    try:
-      data = resp.json()
-    except ValueError:
-      data = []
-    return ClientResponse(resp.status_code, data, resp.text)
+    resp = self._request("POST", "/api/bookmark/addBookmarks", json=payload, timeout=45)
+    return ClientResponse(resp.status_code, _json_or(resp, []), resp.text)
+
+  def export_bookmarks(self) -> ClientResponse:
+    """Stream `/api/bookmarks/export`; on 200, `data` lazily yields bookmark URLs."""
+    resp = self._request("GET", "/api/bookmarks/export", stream=True, timeout=60)
+    if resp.status_code != 200:
+      return ClientResponse(resp.status_code, [], resp.text)
+    return ClientResponse(resp.status_code, _iter_export_urls(resp), "")
@@ -0,0 +1,61 @@
+"""Reconcile the state DB against FindFirst in one pass over the bookmark export."""
+
+from dataclasses import dataclass, field
+
+from alert_historian.ingestion.normalize import normalize_url
+from alert_historian.state.store import StateStore
+from alert_historian.sync.findfirst_client import FindFirstClient
+from alert_historian.sync.url_index import EXPORT_SOURCE
+
+
+REQUEUE_REASON = "reconcile-missing-remote"
+
+
+@dataclass
+class ReconcileReport:
+  remote_urls: int
+  tracked_urls: int
+  missing_remote: int
+  untracked_remote: int
+  requeued: int = 0
+  index_pruned: int = 0
+  missing_sample: list[str] = field(default_factory=list)
+
+
+def reconcile(
+    client: FindFirstClient,
+    store: StateStore,
+    run_id: str,
+    *,
+    requeue: bool = False,
+    sample_size: int = 20,
+) -> ReconcileReport:
+  """
+  Stream `/api/bookmarks/export` into the state DB and diff it against items we
+  synced and got a bookmark id for. Items whose URL is gone from FindFirst are
+  reported and, with `requeue`, returned to the pending pool. Duplicates are not
+  tracked: the export lists only tagged bookmarks, and a duplicate may match an
+  untagged one. The local URL index is replaced by the snapshot in the same pass.
+  """
+  resp = client.export_bookmarks()
+  if resp.status_code != 200:
+    raise RuntimeError(f"FindFirst export failed ({resp.status_code})")
+  remote_urls = store.load_remote_snapshot(normalize_url(url) for url in resp.data)
+
+  counts = store.reconcile_counts()
+  report = ReconcileReport(
+      remote_urls=remote_urls,
+      tracked_urls=counts["tracked"],
+      missing_remote=counts["missing_remote"],
+      untracked_remote=counts["untracked_remote"],
+      missing_sample=store.missing_remote_urls(sample_size),
+  )
+  if remote_urls == 0 and report.tracked_urls > 0:
+    # An empty export for an account we've synced into is far more likely a
+    # server or permissions problem than a mass deletion; don't act on it.
+    return report
+
+  report.index_pruned = store.replace_url_index_with_snapshot(EXPORT_SOURCE)
+  if requeue and report.missing_remote:
+    report.requeued = store.requeue_missing_remote(run_id, REQUEUE_REASON)
+  return report
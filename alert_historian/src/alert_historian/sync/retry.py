@@ -1,6 +1,7 @@
 import random
 import time
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 
 
 BACKOFF_SECONDS = [1, 4, 10, 30, 120]
@@ -27,7 +28,15 @@ def classify_http_status(status_code: int, response_text: str = "") -> RetryDeci
   return RetryDecision(status="retryable_failed", retryable=True, reason=f"http-{status_code}")
 
 
+def backoff_seconds(attempt_number: int) -> int:
+  return BACKOFF_SECONDS[min(max(attempt_number - 1, 0), len(BACKOFF_SECONDS) - 1)]
+
+
 def backoff_sleep(attempt_number: int) -> None:
-  index = min(max(attempt_number - 1, 0), len(BACKOFF_SECONDS) - 1)
-  base = BACKOFF_SECONDS[index]
+  base = backoff_seconds(attempt_number)
   time.sleep(base + random.uniform(0, 0.25 * base))
+
+
+def retry_not_before(attempt_number: int, now: datetime) -> datetime:
+  """Earliest time any worker may retry an item after its `attempt_number`-th retryable failure."""
+  return now + timedelta(seconds=backoff_seconds(attempt_number))
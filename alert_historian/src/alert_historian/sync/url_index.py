@@ -0,0 +1,42 @@
+"""Local index of URLs already present in FindFirst, used to skip known duplicates."""
+
+from datetime import datetime, timedelta
+
+from alert_historian.ingestion.normalize import normalize_url
+from alert_historian.state.store import PendingSyncItem, StateStore
+from alert_historian.sync.findfirst_client import FindFirstClient
+
+
+EXPORT_SOURCE = "export"
+SYNC_SOURCE = "sync"
+
+
+def url_index_is_stale(store: StateStore, max_age_hours: int) -> bool:
+  if max_age_hours <= 0:
+    return False
+  seeded_at = store.url_index_updated_at(EXPORT_SOURCE)
+  return seeded_at is None or datetime.utcnow() - seeded_at >= timedelta(hours=max_age_hours)
+
+
+def refresh_url_index(client: FindFirstClient, store: StateStore) -> int:
+  """
+  Seed the index from the FindFirst export stream. Returns URLs written, or 0 on failure. A complete
+  export is recorded as a seed even when empty, so it is not downloaded again until it goes stale.
+  """
+  resp = client.export_bookmarks()
+  if resp.status_code != 200:
+    return 0
+  written = store.add_known_urls((normalize_url(url) for url in resp.data), EXPORT_SOURCE)
+  store.mark_url_index_seeded(EXPORT_SOURCE)
+  return written
+
+
+def split_known_duplicates(
+    store: StateStore,
+    items: list[PendingSyncItem],
+) -> tuple[list[PendingSyncItem], list[PendingSyncItem]]:
+  """Partition items into (to_post, known_duplicates) using the local URL index."""
+  known = store.known_urls(item.url_normalized for item in items)
+  to_post = [item for item in items if item.url_normalized not in known]
+  duplicates = [item for item in items if item.url_normalized in known]
+  return to_post, duplicates
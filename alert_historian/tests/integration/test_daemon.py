@@ -0,0 +1,94 @@
+import imaplib
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from alert_historian import daemon
+from alert_historian.bench.findfirst_standin import FindFirstStandin
+from alert_historian.bench.sync_bench import bench_settings
+from alert_historian.daemon import AlertDaemon
+from alert_historian.ingestion.normalize import normalize_item
+from alert_historian.ingestion.schema import CanonicalAlertPayload, RawRef
+from alert_historian.state.store import StateStore
+
+
+def _message(uid: int) -> CanonicalAlertPayload:
+  return CanonicalAlertPayload(
+      source="google_alerts_imap",
+      source_account="alerts@example.com",
+      source_message_id=f"<m{uid}>",
+      source_uid=f"INBOX:{uid}",
+      received_at=datetime(2026, 3, 2, 9),
+      alert_topic="robotics",
+      items=[normalize_item(url=f"https://news.example.com/{uid}/{i}", title=f"Story {uid}-{i}", snippet="")
+             for i in range(3)],
+      raw_ref=RawRef(store="imap", folder="INBOX", uid=uid),
+  )
+
+
+class FakeMailbox:
+  """Scripted mailbox: each IDLE delivers the next step (new message, dropped connection, shutdown)."""
+
+  supports_idle = True
+
+  def __init__(self, inbox: dict[int, CanonicalAlertPayload], script: list, stop: threading.Event):
+    self.inbox, self.script, self.stop = inbox, script, stop
+    self.last_uid = 0
+    self.closed = False
+
+  def fetch_since(self, since_uid: int):
+    for uid in sorted(self.inbox):
+      if uid > max(since_uid, self.last_uid):
+        self.last_uid = uid
+        yield self.inbox[uid]
+
+  def idle(self, timeout: float, stop: threading.Event) -> bool:
+    step = self.script.pop(0)
+    if step == "drop":
+      raise imaplib.IMAP4.abort("connection reset")
+    if step == "stop":
+      self.stop.set()
+      return False
+    self.inbox[step] = _message(step)
+    return True
+
+  def close(self) -> None:
+    self.closed = True
+
+
+def test_serve_processes_each_new_message_and_reconnects(tmp_path: Path, monkeypatch) -> None:
+  monkeypatch.setattr(daemon, "RECONNECT_BASE_SECONDS", 0)
+  stop = threading.Event()
+  inbox = {1: _message(1)}
+  script = [2, "drop", 3, "stop"]
+  mailboxes: list[FakeMailbox] = []
+
+  def connect(_settings) -> FakeMailbox:
+    mailboxes.append(FakeMailbox(inbox, script, stop))
+    return mailboxes[-1]
+
+  narrated: list[int] = []
+
+  def narrate(_run_id: str, items: list) -> tuple[str, None]:
+    narrated.append(len(items))
+    return f"Robotics moved on ({len(narrated)}).", None
+
+  with FindFirstStandin() as standin:
+    settings = bench_settings(standin.base_url, tmp_path, batch_size=10).model_copy(update={
+        "input_mode": "imap", "artifacts_dir": tmp_path / "artifacts", "reports_dir": tmp_path / "reports"})
+    serve = AlertDaemon(
+        settings, narrative=narrate, stop=stop, mailbox_factory=connect)
+    serve.run()
+
+    assert len(standin.bookmarks) == 9
+  assert narrated == [3, 3, 3]
+  assert [m.closed for m in mailboxes] == [True, True]
+  assert serve.last_uid == 3 and serve.last_cycle.inserted == 3
+  assert len(list((tmp_path / "artifacts").glob("canonical-*.json"))) == 3
+  # The day's report keeps every cycle, not just the last one.
+  report = Path(serve.last_cycle.report).read_text(encoding="utf-8")
+  assert all(f"Robotics moved on ({n})." in report for n in (1, 2, 3))
+  assert "- synced: 9" in report
+  store = StateStore(settings.state_db)
+  assert store.get_checkpoint("INBOX") == 3
+  store.close()
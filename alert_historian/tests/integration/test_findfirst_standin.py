@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from alert_historian.bench.findfirst_standin import FindFirstStandin, StandinConfig
+from alert_historian.bench.sync_bench import bench_settings, percentile, run_sync_benchmark, synthetic_payloads
+from alert_historian.state.store import StateStore
+from alert_historian.sync.engine import sync_pending_items
+from alert_historian.sync.findfirst_client import FindFirstClient
+
+
+def test_sync_against_standin_reauthenticates_and_indexes(tmp_path: Path) -> None:
+  with FindFirstStandin() as standin:
+    settings = bench_settings(standin.base_url, tmp_path, batch_size=10)
+    store = StateStore(settings.state_db)
+    try:
+      store.save_payloads(synthetic_payloads(25))
+      stats = sync_pending_items(settings, store, "run-1")
+      assert stats["synced"] == 25
+      assert len(standin.bookmarks) == 25
+
+      # A fresh client reuses the saved session; after the server drops it,
+      # the client signs in again instead of failing the request.
+      standin.expire_tokens()
+      client = FindFirstClient(settings)
+      assert client.ensure_session().data == {"reused": True}
+      resp = client.export_bookmarks()
+      assert resp.status_code == 200
+      assert len(list(resp.data)) == 25
+      assert standin.request_counts["/user/signin"] == 2
+    finally:
+      store.close()
+
+
+def test_sync_benchmark_reports_batch_latency(tmp_path: Path) -> None:
+  result = run_sync_benchmark(120, StandinConfig(null_rate=0.1, seed=7), batch_size=50, workdir=tmp_path)
+  assert result.batch_count == 3
+  assert result.stats["total"] == 120
+  assert 0 < result.stats["synced"] < 120
+  assert result.batch_p99_ms >= result.batch_p50_ms > 0
+  assert result.db_write_seconds > 0
+
+
+def test_sync_benchmark_parallel_workers_drain_once(tmp_path: Path) -> None:
+  result = run_sync_benchmark(300, StandinConfig(latency_ms=1), batch_size=20, workers=3, workdir=tmp_path)
+  assert result.workers == 3
+  assert result.stats["synced"] == 300
+  assert result.stats["total"] == 300
+
+
+def test_percentile_nearest_rank() -> None:
+  assert percentile([], 50) == 0.0
+  assert percentile([3.0, 1.0, 2.0, 4.0], 50) == 2.0
+  assert percentile([float(i) for i in range(1, 101)], 99) == 99.0
@@ -5,9 +5,13 @@ from pathlib import Path
 
 from alert_historian.ingestion.schema import CanonicalAlertItem, CanonicalAlertPayload, RawRef
 from alert_historian.ingestion.pipeline import payloads_to_pending_items
-from alert_historian.narrative.chronicle import load_chronicle, update_chronicle
+from alert_historian.narrative.chronicle_sections import (
+    build_topic_contexts,
+    load_chronicle_sections,
+    update_chronicle_sections,
+)
 from alert_historian.narrative.delta import generate_delta
-from alert_historian.narrative.vector_store import AlertVectorStore
+from alert_historian.narrative.vector_store import AlertVectorStore, build_topic_queries
 from alert_historian.reporting.daily_report import build_daily_report
 from alert_historian.state.store import StateStore
 
@@ -60,14 +64,13 @@ def test_narrative_pipeline_enriched_report(tmp_path: Path) -> None:
 
   vector_store = AlertVectorStore(chroma_path, embedding_fn=mock_embed)
   vector_store.upsert_items(today_items)
-  past_context = vector_store.query("vector databases funding", n_results=5)
+  past_context = vector_store.query_many(build_topic_queries(today_items), n_results=5)
+  assert set(past_context) == {"vector databases", "AI agents"}
 
-  new_context = "\n\n".join(
-      f"[{i.day}] {i.topic}: {i.title}\n{i.snippet[:100]}"
-      for i in today_items
-  )
-  update_chronicle(chronicle_path, new_context, mock_llm)
-  chronicle_content = load_chronicle(chronicle_path)
+  topic_contexts = build_topic_contexts(today_items)
+  update = update_chronicle_sections(chronicle_path, topic_contexts, mock_llm)
+  assert update.updated_topics == ["AI agents", "vector databases"]
+  chronicle_content = load_chronicle_sections(chronicle_path, list(topic_contexts))
 
   delta = generate_delta(today_items, past_context, chronicle_content, mock_llm)
   assert "vector databases" in delta or "AI agents" in delta
@@ -0,0 +1,76 @@
+import json
+from itertools import islice
+from pathlib import Path
+
+import pytest
+
+from alert_historian.bench.findfirst_standin import FindFirstStandin, StandinConfig
+from alert_historian.bench.sync_bench import bench_settings
+from alert_historian.ingestion.json_export_adapter import iter_json_export
+from alert_historian.ingestion.pipeline import load_canonical_from_artifact
+from alert_historian.narrative.embedding_cache import EmbeddingCache
+from alert_historian.narrative.local_embeddings import HashingEmbedder
+from alert_historian.narrative.vector_store import item_document
+from alert_historian.orchestrator import run_pipeline
+from alert_historian.state.store import StateStore
+
+
+def _export(path: Path, n_messages: int, per_message: int) -> Path:
+  entries = [
+      {
+          "source_message_id": f"<m{m}>",
+          "alert_topic": ["robotics", "AI agents"][m % 2],
+          "items": [{"url": f"https://news.example.com/{m}/{i}", "title": f"Story {m}-{i}"} for i in range(per_message)],
+      }
+      for m in range(n_messages)
+  ]
+  path.write_text(json.dumps(entries), encoding="utf-8")
+  return path
+
+
+def _settings(base_url: str, tmp_path: Path, **overrides):
+  settings = bench_settings(base_url, tmp_path, batch_size=7)
+  return settings.model_copy(update={
+      "json_input": _export(tmp_path / "alerts.json", 30, 5),
+      "artifacts_dir": tmp_path / "artifacts",
+      "embedding_cache_path": tmp_path / "embedding_cache.db",
+      **overrides,
+  })
+
+
+def test_pipeline_stores_syncs_and_embeds_concurrently(tmp_path: Path) -> None:
+  with FindFirstStandin(StandinConfig(latency_ms=1)) as standin:
+    settings = _settings(standin.base_url, tmp_path)
+    store = StateStore(settings.state_db)
+    store.save_payloads(islice(iter_json_export(settings.json_input), 1))
+    store.close()
+    embedder = HashingEmbedder(dim=64)
+
+    result = run_pipeline(settings, "run-1", embedding_fn=embedder, queue_size=2)
+
+    assert result.inserted == 145
+    # Items stored before the run are still pending, and the final drain syncs them too.
+    assert result.sync_stats["synced"] == 150 and result.sync_stats["total"] == 150
+    assert len(standin.bookmarks) == 150
+    assert {stage.name: stage.processed for stage in result.stages} == {
+        "fetch": 30, "store": 145, "sync": 145, "embed": 145}
+    assert max(result.queue_peaks.values()) <= 2
+    assert len(load_canonical_from_artifact(settings.artifacts_dir / "canonical-run-1.json")) == 30
+
+  cache = EmbeddingCache(settings.embedding_cache_path)
+  store = StateStore(settings.state_db)
+  try:
+    documents = [item_document(item) for item in store.items_first_seen_in_run("run-1")]
+    assert None not in cache.get_many(embedder.model_id, documents)
+  finally:
+    cache.close()
+    store.close()
+
+
+def test_failed_stage_stops_the_pipeline(tmp_path: Path) -> None:
+  with FindFirstStandin() as standin:
+    settings = _settings(standin.base_url, tmp_path, findfirst_password="wrong")
+    with pytest.raises(RuntimeError, match="signin failed"):
+      run_pipeline(settings, "run-1", queue_size=1)
+  # The store stage stopped too and removed its half-written artifact.
+  assert not list((tmp_path / "artifacts").glob("*"))
@@ -0,0 +1,90 @@
+from pathlib import Path
+
+from alert_historian.bench.findfirst_standin import FindFirstStandin
+from alert_historian.bench.sync_bench import bench_settings, synthetic_payloads
+from alert_historian.state.store import StateStore
+from alert_historian.sync.engine import sync_pending_items
+from alert_historian.sync.findfirst_client import FindFirstClient
+from alert_historian.sync.reconcile import reconcile
+
+
+def test_reconcile_requeues_bookmarks_deleted_in_findfirst(tmp_path: Path) -> None:
+  with FindFirstStandin() as standin:
+    settings = bench_settings(standin.base_url, tmp_path, batch_size=20)
+    store = StateStore(settings.state_db)
+    try:
+      store.save_payloads(synthetic_payloads(40))
+      assert sync_pending_items(settings, store, "run-1")["synced"] == 40
+
+      deleted = sorted(standin.bookmarks)[:3]
+      for url in deleted:
+        del standin.bookmarks[url]
+      standin.bookmarks["https://elsewhere.example.com/x"] = {
+          "url": "https://elsewhere.example.com/x", "title": "x", "tags": [{"id": 1}]}
+
+      client = FindFirstClient(settings)
+      client.ensure_session()
+      report = reconcile(client, store, "reconcile-1")
+      assert report.remote_urls == 38
+      assert report.tracked_urls == 40
+      assert report.missing_remote == 3
+      assert report.untracked_remote == 1
+      assert report.requeued == 0
+      assert report.index_pruned == 3
+      assert store.get_pending_items("next") == []
+
+      report = reconcile(client, store, "reconcile-2", requeue=True)
+      assert report.requeued == 3
+      assert sorted(item.url for item in store.get_pending_items("next")) == deleted
+
+      stats = sync_pending_items(settings, store, "run-2")
+      assert stats["synced"] == 3
+      assert all(url in standin.bookmarks for url in deleted)
+    finally:
+      store.close()
+
+
+def test_reconcile_ignores_empty_export_when_items_are_synced(tmp_path: Path) -> None:
+  with FindFirstStandin() as standin:
+    settings = bench_settings(standin.base_url, tmp_path, batch_size=20)
+    store = StateStore(settings.state_db)
+    try:
+      store.save_payloads(synthetic_payloads(5))
+      sync_pending_items(settings, store, "run-1")
+      standin.bookmarks.clear()
+
+      client = FindFirstClient(settings)
+      client.ensure_session()
+      report = reconcile(client, store, "reconcile-1", requeue=True)
+      assert report.missing_remote == 5
+      assert report.requeued == 0
+      assert store.known_urls(["https://bench-0.example.com/story/0"]) == {"https://bench-0.example.com/story/0"}
+      assert store.get_pending_items("next") == []
+    finally:
+      store.close()
+
+
+def test_reconcile_leaves_duplicates_of_untagged_bookmarks_alone(tmp_path: Path) -> None:
+  with FindFirstStandin() as standin:
+    settings = bench_settings(standin.base_url, tmp_path, batch_size=20)
+    store = StateStore(settings.state_db)
+    try:
+      payloads = list(synthetic_payloads(5))
+      url = payloads[0].items[0].url
+      standin.bookmarks[url] = {"id": 999, "url": url, "title": "saved by hand", "tags": [{"id": 1}]}
+      store.save_payloads(payloads)
+      stats = sync_pending_items(settings, store, "run-1")
+      assert stats["synced"] == 4 and stats["duplicate"] == 1
+
+      # The user untags the bookmark: it still exists in FindFirst but drops out of the export.
+      standin.bookmarks[url]["tags"] = []
+      client = FindFirstClient(settings)
+      client.ensure_session()
+      for run in ("reconcile-1", "reconcile-2"):
+        report = reconcile(client, store, run, requeue=True)
+        assert report.tracked_urls == 4
+        assert report.missing_remote == 0
+        assert report.requeued == 0
+      assert store.get_pending_items("next") == []
+    finally:
+      store.close()
@@ -1,7 +1,10 @@
+import threading
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
+from types import SimpleNamespace
 
+from alert_historian.ingestion.pipeline import ingest
 from alert_historian.ingestion.schema import CanonicalAlertItem, CanonicalAlertPayload, RawRef
 from alert_historian.state.store import StateStore
 from alert_historian.sync import engine
@@ -15,6 +18,10 @@ class FakeSettings:
   sync_batch_size: int = 100
   use_domain_tags: bool = True
   imap_folder: str = "INBOX"
+  url_index_max_age_hours: int = 24
+  sync_worker_id: str = ""
+  sync_lease_seconds: int = 300
+  sync_claim_batches: int = 5
 
 
 class FakeResp:
@@ -25,12 +32,18 @@ class FakeResp:
 
 
 class FakeClient:
+  exported_urls: list[str] = []
+
   def __init__(self, _settings):
     self.tags = {"source/google-alerts": 1}
+    self.bulk_calls = 0
 
   def signin(self):
     return FakeResp(200, {"ok": True})
 
+  def ensure_session(self):
+    return self.signin()
+
   def list_tags(self):
     rows = [{"id": v, "title": k, "bookmarks": []} for k, v in self.tags.items()]
     return FakeResp(200, rows)
@@ -44,34 +57,43 @@ class FakeClient:
     return FakeResp(200, [])
 
   def bulk_add_bookmarks(self, payload):
+    self.bulk_calls += 1
     return FakeResp(200, [{"id": i + 1000} for i, _ in enumerate(payload)])
 
+  def export_bookmarks(self):
+    return FakeResp(200, iter(self.exported_urls))
+
+
+def _payload(message_id: str = "<m1>", topic: str = "vector databases",
+    url: str = "https://example.com/a") -> CanonicalAlertPayload:
+  return CanonicalAlertPayload(
+      source="google_alerts_export",
+      source_account="json-export",
+      source_message_id=message_id,
+      source_uid=None,
+      received_at=datetime.utcnow(),
+      alert_topic=topic,
+      alert_query_raw=topic,
+      items=[
+          CanonicalAlertItem(
+              item_id="i1",
+              url=url,
+              url_normalized=url,
+              title="A",
+              snippet="S",
+              source_domain="example.com",
+          )
+      ],
+      raw_ref=RawRef(store="json_export", path="sample.json"),
+  )
+
 
 def test_sync_engine_success(tmp_path: Path, monkeypatch) -> None:
   monkeypatch.setattr(engine, "FindFirstClient", FakeClient)
   db_path = tmp_path / "state.db"
   store = StateStore(db_path)
   try:
-    payload = CanonicalAlertPayload(
-        source="google_alerts_export",
-        source_account="json-export",
-        source_message_id="<m1>",
-        source_uid=None,
-        received_at=datetime.utcnow(),
-        alert_topic="vector databases",
-        alert_query_raw="vector databases",
-        items=[
-            CanonicalAlertItem(
-                item_id="i1",
-                url="https://example.com/a",
-                url_normalized="https://example.com/a",
-                title="A",
-                snippet="S",
-                source_domain="example.com",
-            )
-        ],
-        raw_ref=RawRef(store="json_export", path="sample.json"),
-    )
+    payload = _payload()
     inserted = store.save_payloads([payload])
     assert inserted == 1
     stats = engine.sync_pending_items(FakeSettings(), store, "run-1")
@@ -79,3 +101,168 @@ def test_sync_engine_success(tmp_path: Path, monkeypatch) -> None:
     assert stats["total"] == 1
   finally:
     store.close()
+
+
+def test_sync_engine_skips_urls_in_local_index(tmp_path: Path, monkeypatch) -> None:
+  clients: list[FakeClient] = []
+
+  class ExportingClient(FakeClient):
+    exported_urls = ["https://EXAMPLE.com/a"]
+
+    def __init__(self, settings):
+      super().__init__(settings)
+      clients.append(self)
+
+  monkeypatch.setattr(engine, "FindFirstClient", ExportingClient)
+  store = StateStore(tmp_path / "state.db")
+  try:
+    store.save_payloads([_payload()])
+    stats = engine.sync_pending_items(FakeSettings(), store, "run-1")
+    assert stats["duplicate"] == 1
+    assert stats["total"] == 1
+    assert clients[0].bulk_calls == 0
+    assert store.url_index_updated_at("export") is not None
+  finally:
+    store.close()
+
+
+def test_empty_export_still_counts_as_a_fresh_seed(tmp_path: Path, monkeypatch) -> None:
+  exports: list[int] = []
+
+  class CountingClient(FakeClient):
+    def export_bookmarks(self):
+      exports.append(1)
+      return super().export_bookmarks()
+
+  monkeypatch.setattr(engine, "FindFirstClient", CountingClient)
+  store = StateStore(tmp_path / "state.db")
+  try:
+    store.save_payloads([_payload()])
+    engine.sync_pending_items(FakeSettings(), store, "run-1")
+    store.save_payloads([_payload(message_id="<m2>", url="https://example.com/b")])
+    engine.sync_pending_items(FakeSettings(), store, "run-2")
+    # The first export was empty, yet the second run trusts it instead of downloading again.
+    assert exports == [1]
+    assert store.url_index_updated_at("export") is not None
+  finally:
+    store.close()
+
+
+def test_sync_engine_records_synced_urls_in_index(tmp_path: Path, monkeypatch) -> None:
+  monkeypatch.setattr(engine, "FindFirstClient", FakeClient)
+  store = StateStore(tmp_path / "state.db")
+  try:
+    store.save_payloads([_payload()])
+    engine.sync_pending_items(FakeSettings(), store, "run-1")
+    assert store.known_urls(["https://example.com/a", "https://example.com/b"]) == {"https://example.com/a"}
+
+    # Same URL under another topic is resolved locally on the next run.
+    store.save_payloads([_payload(message_id="<m2>", topic="AI agents")])
+    stats = engine.sync_pending_items(FakeSettings(), store, "run-2")
+    assert stats["duplicate"] == 1
+    assert stats.get("synced", 0) == 0
+  finally:
+    store.close()
+
+
+def test_parallel_workers_never_post_the_same_item(tmp_path: Path, monkeypatch) -> None:
+  posted: list[str] = []
+  lock = threading.Lock()
+
+  class RecordingClient(FakeClient):
+    def bulk_add_bookmarks(self, payload):
+      with lock:
+        posted.extend(p["url"] for p in payload)
+      return super().bulk_add_bookmarks(payload)
+
+  monkeypatch.setattr(engine, "FindFirstClient", RecordingClient)
+  db_path = tmp_path / "state.db"
+  seed = StateStore(db_path)
+  seed.save_payloads([_payload(message_id=f"<m{i}>", url=f"https://example.com/{i}") for i in range(60)])
+  seed.close()
+
+  settings = FakeSettings(sync_batch_size=5, sync_claim_batches=2)
+  results: list[dict[str, int]] = []
+
+  def worker(name: str) -> None:
+    store = StateStore(db_path)
+    try:
+      results.append(engine.sync_pending_items(settings, store, "run-1", worker_id=name))
+    finally:
+      store.close()
+
+  threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(3)]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+
+  assert sorted(posted) == sorted(set(posted))
+  assert len(posted) == 60
+  assert sum(r["synced"] for r in results if "synced" in r) == 60
+
+
+def test_expired_lease_returns_item_to_pool(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  try:
+    store.save_payloads([_payload()])
+    claimed = store.claim_pending_items("w1", "run-1", 10, lease_seconds=300)
+    assert len(claimed) == 1
+    assert store.claim_pending_items("w2", "run-2", 10, lease_seconds=300) == []
+
+    # w1's lease lapses (negative duration), so w2 can take over and w1 loses it.
+    store.renew_leases("w1", [claimed[0].item_key], lease_seconds=-1)
+    assert len(store.claim_pending_items("w2", "run-2", 10, lease_seconds=300)) == 1
+    assert store.renew_leases("w1", [claimed[0].item_key], lease_seconds=300) == set()
+  finally:
+    store.close()
+
+
+def test_retryable_failure_waits_out_its_backoff_in_every_run(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  try:
+    store.save_payloads([_payload()])
+    key = store.claim_pending_items("w1", "run-1", 10, lease_seconds=300)[0].item_key
+    store.record_sync_attempts([(key, "run-1", "retryable_failed", 3, "http-503", None)])
+    store.release_leases("w1", [key])
+
+    # Released, but a worker of another run must not retry it before the third backoff step.
+    assert store.claim_pending_items("w2", "run-2", 10, lease_seconds=300) == []
+    assert store.claim_items("w2", "run-2", [key], lease_seconds=300) == []
+    # It is still pending, so the checkpoint does not move past it.
+    assert not store.checkpoint_if_terminal("INBOX")
+
+    store.conn.execute("UPDATE sync_attempts SET retry_after = ?", ((datetime.utcnow() - timedelta(seconds=1)).isoformat(),))
+    store.conn.commit()
+    assert [item.item_key for item in store.claim_pending_items("w2", "run-2", 10, lease_seconds=300)] == [key]
+  finally:
+    store.close()
+
+
+def test_ingest_returns_created_keys_and_run_items(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  try:
+    first = store.save_new_payloads([_payload()], "run-1")
+    assert len(first) == 1
+    # A seen message and a new URL from an unseen message: only the latter is new in run-2.
+    second = store.save_new_payloads(
+        [_payload(), _payload(message_id="<m2>", url="https://example.com/b")], "run-2")
+    assert len(second) == 1 and second != first
+
+    items = store.items_first_seen_in_run("run-2")
+    assert [item.item_key for item in items] == second
+    assert items[0].url == "https://example.com/b"
+    assert store.items_first_seen_in_run("run-3") == []
+  finally:
+    store.close()
+
+  settings = SimpleNamespace(
+      input_mode="json", json_input=Path(__file__).parents[2] / "sample" / "alerts.json",
+      artifacts_dir=tmp_path / "artifacts")
+  store = StateStore(tmp_path / "ingest.db")
+  try:
+    run_id, created = ingest(settings, store, run_id="run-a")
+    assert created and [i.item_key for i in store.items_first_seen_in_run(run_id)] == created
+    assert ingest(settings, store, run_id="run-b")[1] == []
+  finally:
+    store.close()
@@ -0,0 +1,13 @@
+from pathlib import Path
+
+from alert_historian.bench.vector_bench import run_vector_benchmark
+
+
+def test_vector_benchmark_probes_flat_backend(tmp_path: Path) -> None:
+  (result,) = run_vector_benchmark(300, backends=("flat",), n_queries=5, dim=32, workdir=tmp_path)
+  assert result.backend == "flat-int8"
+  assert result.items == 300
+  assert result.startup_ms > 0
+  assert result.query_p99_ms >= result.query_p50_ms > 0
+  assert result.peak_rss_mb > 0
+  assert (tmp_path / "flat" / "alert_items" / "vectors.bin").stat().st_size == 300 * 32
@@ -0,0 +1,137 @@
+import threading
+import time
+from pathlib import Path
+
+from alert_historian.narrative.chronicle_sections import (
+    ChronicleSections,
+    load_chronicle_sections,
+    split_chronicle,
+    update_chronicle_sections,
+)
+from alert_historian.narrative.context_packer import ContextPacker
+
+EXISTING = """# Alert Chronicle
+
+A living timeline of topics from Google Alerts. Entries are organized by topic and date.
+
+## robotics
+
+- 2026-02-01: Laundry-folding robots demoed.
+
+## vector databases
+
+- 2026-02-10: Pinecone raised a round.
+"""
+
+
+def test_only_changed_topics_are_sent_and_merged(tmp_path: Path) -> None:
+  path = tmp_path / "chronicle.md"
+  path.write_text(EXISTING, encoding="utf-8")
+  prompts: list[str] = []
+
+  def mock_llm(user: str, system: str | None) -> str:
+    prompts.append(user)
+    assert "output only the new entry" in (system or "").lower()
+    return "## vector databases\n\n- 2026-02-26: Qdrant shipped quantization."
+
+  result = update_chronicle_sections(
+      path, {"vector databases": "[2026-02-26] Qdrant ships quantization"}, mock_llm, date_str="2026-02-26")
+
+  assert len(prompts) == 1
+  assert "Pinecone raised a round" in prompts[0]
+  assert "Laundry" not in prompts[0]
+  assert result.updated_topics == ["vector databases"]
+  sections = split_chronicle(path.read_text(encoding="utf-8"))
+  assert sections["robotics"] == "- 2026-02-01: Laundry-folding robots demoed."
+  # Today's entry is appended to the section, which the LLM no longer rewrites.
+  assert sections["vector databases"] == (
+      "- 2026-02-10: Pinecone raised a round.\n- 2026-02-26: Qdrant shipped quantization.")
+  assert result.content == path.read_text(encoding="utf-8")
+
+  excerpt = load_chronicle_sections(path, ["vector databases", "unknown"])
+  assert "## vector databases" in excerpt and "## robotics" not in excerpt
+
+
+def test_topics_update_concurrently_and_failures_keep_old_section(tmp_path: Path) -> None:
+  path = tmp_path / "chronicle.md"
+  path.write_text(EXISTING, encoding="utf-8")
+  active = 0
+  peak = 0
+  lock = threading.Lock()
+
+  def mock_llm(user: str, system: str | None) -> str:
+    nonlocal active, peak
+    with lock:
+      active += 1
+      peak = max(peak, active)
+    time.sleep(0.05)
+    with lock:
+      active -= 1
+    if "Topic: robotics" in user:
+      raise RuntimeError("rate limited")
+    topic = user.split("Topic: ", 1)[1].split("\n", 1)[0]
+    return f"- 2026-02-26: update for {topic}"
+
+  result = update_chronicle_sections(
+      path,
+      {"robotics": "new robot", "vector databases": "new db", "AI agents": "new agent"},
+      mock_llm,
+      max_workers=3,
+  )
+
+  assert peak > 1
+  assert result.updated_topics == ["AI agents", "vector databases"]
+  assert result.failed_topics == {"robotics": "rate limited"}
+  sections = split_chronicle(path.read_text(encoding="utf-8"))
+  assert sections["robotics"] == "- 2026-02-01: Laundry-folding robots demoed."
+  assert sections["AI agents"] == "- 2026-02-26: update for AI agents"
+
+
+def test_migration_keeps_text_before_the_first_topic(tmp_path: Path) -> None:
+  path = tmp_path / "chronicle.md"
+  preamble = "# Team Chronicle\n\nCurated by the research desk; see the wiki for sources."
+  path.write_text(EXISTING.replace(EXISTING.split("\n## ", 1)[0], preamble), encoding="utf-8")
+
+  sections = ChronicleSections(path)
+  sections.merge({"robotics": "- 2026-02-26: Robots fold towels too."})
+
+  content = path.read_text(encoding="utf-8")
+  assert content.startswith(preamble + "\n\n## robotics")
+  assert "Pinecone raised a round." in content
+
+
+def test_merge_refuses_to_overwrite_concurrent_update(tmp_path: Path) -> None:
+  sections = ChronicleSections(tmp_path / "chronicle.md")
+  sections.merge({"robotics": "- first"})
+  stale = {"robotics": sections.load()["robotics"]["sha256"]}
+  sections.merge({"robotics": "- second"})
+
+  content, conflicts = sections.merge({"robotics": "- stale rewrite"}, stale)
+  assert conflicts == ["robotics"]
+  assert "- second" in content and "stale rewrite" not in content
+
+
+def test_sections_keep_updating_after_outgrowing_the_budget(tmp_path: Path) -> None:
+  path = tmp_path / "chronicle.md"
+  sections = ChronicleSections(path)
+  big = "\n".join(f"- 2025-{1 + i % 12:02d}-01: entry {i} about robot arms." for i in range(2000))
+  sections.merge({"robotics": big})
+  prompts: list[str] = []
+
+  def one_entry(user: str, system: str | None) -> str:
+    prompts.append(user)
+    return f"- 2026-03-{len(prompts):02d}: robot arms, day {len(prompts)}."
+
+  packer = ContextPacker(budget_tokens=8_000)
+  for day in range(1, 4):
+    result = update_chronicle_sections(
+        path, {"robotics": f"[2026-03-{day:02d}] Robot arm folds laundry"}, one_entry,
+        date_str=f"2026-03-{day:02d}", packer=packer, summaries={"robotics": ["- [month 2026-02] Robot arms spread."]})
+    assert result.updated_topics == ["robotics"] and result.failed_topics == {}
+
+  # Prompts hold the new context, the pyramid and only the most recent entries, however long the section gets.
+  assert all(packer.counter.count(prompt) < 1_000 for prompt in prompts)
+  assert "Robot arms spread." in prompts[-1] and "entry 1999 " in prompts[-1] and "entry 1994 " not in prompts[-1]
+  assert "robot arms, day 2." in prompts[-1]
+  body = sections.read_section("robotics").strip()
+  assert body.startswith(big) and body.endswith("- 2026-03-03: robot arms, day 3.")
@@ -0,0 +1,56 @@
+from alert_historian.narrative.chronicle_sections import build_topic_contexts
+from alert_historian.narrative.clustering import cluster_items
+from alert_historian.narrative.delta import generate_topic_deltas
+from alert_historian.state.store import PendingSyncItem
+
+
+def _item(key: str, topic: str, title: str) -> PendingSyncItem:
+  return PendingSyncItem(
+      item_key=key,
+      message_key="m",
+      topic=topic,
+      day="2026-02-26",
+      url=f"https://example.com/{key}",
+      url_normalized=f"https://example.com/{key}",
+      title=title,
+      snippet="",
+      source_domain="example.com",
+      source_message_id="<m>",
+  )
+
+
+ITEMS = [
+    _item("a1", "robotics", "Robot arm folds laundry"),
+    _item("b1", "robotics", "Humanoid pilot in car plant"),
+    _item("a2", "robotics", "Laundry-folding robot arm unveiled"),
+    _item("a3", "robotics", "Startup shows robot that folds clothes"),
+    _item("c1", "AI agents", "Agents share memory"),
+]
+EMBEDDINGS = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.98, 0.1, 0.0], [0.95, 0.0, 0.2], [1.0, 0.0, 0.0]]
+
+
+def test_items_of_one_story_cluster_within_their_topic() -> None:
+  clusters = cluster_items(ITEMS, EMBEDDINGS, max_distance=0.1)
+
+  assert [(c.topic, c.representative.item_key, c.size) for c in clusters] == [
+      ("AI agents", "c1", 1), ("robotics", "a1", 3), ("robotics", "b1", 1)]
+  assert clusters[1].title() == "Robot arm folds laundry (3 articles)"
+  assert [c.size for c in cluster_items(ITEMS, EMBEDDINGS, max_distance=0.0)] == [1, 1, 1, 1, 1]
+
+
+def test_prompts_list_one_entry_per_story() -> None:
+  clusters = cluster_items(ITEMS, EMBEDDINGS, max_distance=0.1)
+  prompts: list[str] = []
+
+  def mock_llm(user: str, system: str | None) -> str:
+    prompts.append(user)
+    return "- Link."
+
+  generate_topic_deltas(ITEMS, {}, "", mock_llm, max_workers=1, clusters=clusters)
+  robotics = next(p for p in prompts if "Topic: robotics" in p)
+  assert "Today's new items (4, as 2 stories):" in robotics
+  assert "- Robot arm folds laundry (3 articles)\n- Humanoid pilot in car plant" in robotics
+  assert "Laundry-folding" not in robotics
+
+  contexts = build_topic_contexts(ITEMS, clusters=clusters)
+  assert contexts["robotics"].count("[2026-02-26]") == 2
@@ -0,0 +1,75 @@
+from alert_historian.narrative.context_packer import (
+    ContextPacker,
+    ContextSection,
+    prompt_budget_for_model,
+    truncate_to_sentence,
+)
+from alert_historian.narrative.delta import generate_topic_deltas
+from alert_historian.narrative.embeddings import TokenCounter
+from alert_historian.state.store import PendingSyncItem
+
+
+class WordCounter(TokenCounter):
+  """One token per whitespace-separated word, so budgets are easy to reason about."""
+
+  def count(self, text: str) -> int:
+    return len(text.split())
+
+  def truncate(self, text: str, max_tokens: int) -> str:
+    return " ".join(text.split(" ")[:max_tokens])
+
+
+def test_sections_fill_budget_in_priority_order_with_whole_entries() -> None:
+  packer = ContextPacker(budget_tokens=12, counter=WordCounter())
+  packed = packer.pack("fixed two", [
+      ContextSection("today", ["a b c", "d e f"]),
+      ContextSection("past", ["p1 p1", "p2 p2", "p3 p3"]),
+      ContextSection("chronicle", ["old entry", "new entry"], newest_last=True),
+  ])
+
+  assert packed.sections["today"] == "a b c\nd e f"
+  assert packed.sections["past"] == "p1 p1"
+  assert packed.dropped == {"today": 0, "past": 2, "chronicle": 2}
+  assert packed.sections["chronicle"] == "(none)"
+  assert packed.used_tokens <= packed.budget_tokens == 12
+
+  newest = ContextPacker(budget_tokens=3, counter=WordCounter()).pack(
+      "", [ContextSection("chronicle", ["old entry", "mid entry", "new entry"], newest_last=True)])
+  assert newest.sections["chronicle"] == "new entry"
+
+
+def test_oversized_first_entry_is_cut_at_sentence_boundary() -> None:
+  counter = WordCounter()
+  text = "First sentence here. Second sentence is much longer than the budget allows."
+  assert truncate_to_sentence(text, 6, counter) == "First sentence here. …"
+  packed = ContextPacker(budget_tokens=6, counter=counter).pack("", [ContextSection("today", [text])])
+  assert packed.sections["today"] == "First sentence here. …"
+
+
+def test_budget_is_capped_by_model_window() -> None:
+  assert prompt_budget_for_model("gpt-4o-mini-2024-07-18", 8_000) == 8_000
+  assert prompt_budget_for_model("gpt-4", 100_000) == 8_192 - 4_096
+
+
+def test_topic_delta_prompts_respect_budget_and_usage_is_recorded() -> None:
+  items = [
+      PendingSyncItem(
+          item_key=f"k{i}", message_key="m", topic="robotics", day="2026-02-26",
+          url="u", url_normalized="u", title=f"Robot story {i} " + "detail " * 40, snippet="",
+          source_domain="example.com", source_message_id="<m>")
+      for i in range(50)
+  ]
+  packer = ContextPacker(budget_tokens=600)
+  prompts: list[str] = []
+
+  def mock_llm(user: str, system: str | None) -> str:
+    prompts.append(system + user)
+    return "- Link."
+
+  generate_topic_deltas(items, {}, "", mock_llm, packer=packer)
+  assert packer.counter.count(prompts[0]) <= 600
+  assert "Robot story 0 " in prompts[0] and "Robot story 49 " not in prompts[0]
+  [call] = packer.usage
+  assert call.label == "delta:robotics"
+  assert call.prompt_tokens <= 600 and call.completion_tokens > 0
+  assert packer.usage_totals()["calls"] == 1
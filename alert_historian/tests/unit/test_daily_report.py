@@ -0,0 +1,137 @@
+import json
+import sqlite3
+import threading
+from datetime import date, datetime
+from pathlib import Path
+
+from alert_historian.ingestion.schema import CanonicalAlertItem, CanonicalAlertPayload, RawRef
+from alert_historian.reporting.daily_report import build_daily_report, build_range_report, build_reports
+from alert_historian.state.store import StateStore
+
+
+def _payload(message_id: str, topic: str, received_at: datetime, n_items: int) -> CanonicalAlertPayload:
+  return CanonicalAlertPayload(
+      source="google_alerts_export",
+      source_account="test@example.com",
+      source_message_id=message_id,
+      received_at=received_at,
+      alert_topic=topic,
+      items=[
+          CanonicalAlertItem(
+              item_id=f"{message_id}-{i}",
+              url=f"https://example.com/{message_id}/{i}",
+              url_normalized=f"https://example.com/{message_id}/{i}",
+              title=f"Story {i}",
+              snippet="",
+              source_domain="example.com",
+          )
+          for i in range(n_items)
+      ],
+      raw_ref=RawRef(store="json_export", path="sample.json"),
+  )
+
+
+def _seed(store: StateStore) -> list[str]:
+  created = store.save_new_payloads([
+      _payload("m1", "robotics", datetime(2026, 2, 3, 9), 12),
+      _payload("m2", "AI agents", datetime(2026, 2, 3, 10), 1),
+      _payload("m3", "robotics", datetime(2026, 2, 5, 9), 2),
+  ])
+  store.record_sync_attempts([(key, "run1", "synced", 1, None, 1) for key in created[:12]])
+  store.record_sync_attempts([(created[12], "run1", "retryable_failed", 1, "503", None)])
+  return created
+
+
+def test_rollups_follow_ingest_and_sync(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  _seed(store)
+
+  days = store.topic_day_rollups("2026-02-01", "2026-02-28")
+  assert sorted(days) == ["2026-02-03", "2026-02-05"]
+  count, links = days["2026-02-03"]["robotics"]
+  assert (count, len(links), links[0]) == (12, 10, "https://example.com/m1/0")
+  assert store.run_stats("run1") == {"synced": 12, "retryable_failed": 1, "total": 13}
+  today = datetime.utcnow().date().isoformat()
+  assert store.sync_day_rollups(today, today)[today]["run1"] == {"retryable_failed": 1, "synced": 12}
+  store.close()
+
+
+def test_rollups_are_backfilled_for_existing_databases(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  _seed(store)
+  expected = store.topic_day_rollups("2026-02-01", "2026-02-28")
+  store.close()
+  conn = sqlite3.connect(tmp_path / "state.db")
+  conn.executescript("""
+    DROP TRIGGER topic_day_rollups_insert; DROP TRIGGER sync_day_rollups_insert;
+    DROP TABLE topic_day_rollups; DROP TABLE sync_day_rollups;
+  """)
+  conn.close()
+
+  # Connections opened at once (as pipeline stages do) fill the new tables exactly once.
+  start = threading.Barrier(4)
+  errors: list[BaseException] = []
+
+  def open_store() -> None:
+    start.wait()
+    try:
+      StateStore(tmp_path / "state.db").close()
+    except BaseException as e:
+      errors.append(e)
+
+  threads = [threading.Thread(target=open_store) for _ in range(4)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert errors == []
+  reopened = StateStore(tmp_path / "state.db")
+  assert reopened.topic_day_rollups("2026-02-01", "2026-02-28") == expected
+  assert reopened.run_stats("run1")["total"] == 13
+  reopened.close()
+
+
+def test_reports_for_a_range_are_regenerated_from_rollups(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  _seed(store)
+
+  paths = build_reports(store, tmp_path / "reports", date(2026, 2, 3), date(2026, 2, 5), max_workers=3)
+  assert [p.name for p in paths] == ["2026-02-03.md", "2026-02-04.md", "2026-02-05.md"]
+  first = paths[0].read_text(encoding="utf-8")
+  assert "- Canonical items inserted: 13" in first
+  assert "- AI agents (1 new)" in first and "- robotics (12 new)" in first
+  assert first.count("  - https://example.com/m1/") == 10
+  assert "- No new items for this day." in paths[1].read_text(encoding="utf-8")
+
+  run_report = build_daily_report(store, tmp_path / "reports", "run1", 2, {"synced": 2, "total": 2}, day="2026-02-05")
+  content = run_report.read_text(encoding="utf-8")
+  assert "- Canonical items inserted: 2" in content and "- synced: 2" in content
+  assert "- robotics (2 new)" in content
+  store.close()
+
+
+def test_one_pass_writes_markdown_json_and_html(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  _seed(store)
+  store.save_payloads([_payload("m4", "<script>", datetime(2026, 2, 4, 9), 1)])
+
+  paths = build_range_report(
+      store, tmp_path / "reports", date(2026, 2, 3), date(2026, 2, 5), formats=("json", "md", "html"))
+  assert [p.name for p in paths] == [
+      "2026-02-03_2026-02-05.json", "2026-02-03_2026-02-05.md", "2026-02-03_2026-02-05.html"]
+  data = json.loads(paths[0].read_text(encoding="utf-8"))
+  # Sync attempts count on the day they were recorded (today), not the items' day.
+  assert (data["start_day"], data["ingest"]["inserted"], data["sync"]["totals"]["total"]) == ("2026-02-03", 16, 0)
+  assert [(t["day"], t["topic"], t["new_items"]) for t in data["topics"]] == [
+      ("2026-02-03", "AI agents", 1), ("2026-02-03", "robotics", 12), ("2026-02-04", "<script>", 1),
+      ("2026-02-05", "robotics", 2)]
+  markdown = paths[1].read_text(encoding="utf-8")
+  assert "# Alert Historian Report (2026-02-03 to 2026-02-05)" in markdown and "### 2026-02-04" in markdown
+  page = paths[2].read_text(encoding="utf-8")
+  assert page.startswith("<!DOCTYPE html>") and page.rstrip().endswith("</html>")
+  assert "&lt;script&gt;" in page and "<script>" not in page
+  assert not list((tmp_path / "reports").glob(".*"))
+
+  empty = build_range_report(store, tmp_path / "reports", date(2025, 1, 1), date(2025, 1, 2), formats=("json",))
+  assert json.loads(empty[0].read_text(encoding="utf-8"))["topics"] == []
+  store.close()
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from alert_historian.narrative.embeddings import (
+  EmbeddingDispatcher,
+  TokenCounter,
+  create_embedding_fn,
+  pack_batches,
+)
+from alert_historian.narrative.local_embeddings import HashingEmbedder, sentence_transformers_available
+from alert_historian.narrative.vector_store import COLLECTION_NAME, collection_name_for_model
+
+
+class RateLimited(Exception):
+  status_code = 429
+
+
+def test_pack_batches_respects_token_and_input_budgets() -> None:
+  assert pack_batches([4, 4, 4, 4], max_batch_tokens=8) == [[0, 1], [2, 3]]
+  assert pack_batches([1, 1, 1], max_batch_tokens=100, max_batch_inputs=2) == [[0, 1], [2]]
+  # An input larger than the budget still goes out, alone.
+  assert pack_batches([2, 20, 2], max_batch_tokens=10) == [[0], [1], [2]]
+
+
+def test_estimating_counter_truncates_to_budget() -> None:
+  counter = TokenCounter()
+  text = "x" * 300
+  assert counter.count(text) == 100
+  assert counter.count(counter.truncate(text, 10)) == 10
+
+
+def test_dispatcher_preserves_order_across_concurrent_batches() -> None:
+  active = 0
+  peak = 0
+  lock = threading.Lock()
+
+  def embed(texts: list[str]) -> list[list[float]]:
+    nonlocal active, peak
+    with lock:
+      active += 1
+      peak = max(peak, active)
+    # Later batches finish first, so order must not depend on completion order.
+    time.sleep(0.02 if texts[0] == "doc-0" else 0.0)
+    with lock:
+      active -= 1
+    return [[float(t.split("-")[1])] for t in texts]
+
+  dispatcher = EmbeddingDispatcher(embed, max_batch_tokens=2, concurrency=3)
+  texts = [f"doc-{i}" for i in range(20)]
+  vectors = dispatcher(texts)
+
+  assert vectors == [[float(i)] for i in range(20)]
+  assert dispatcher.batches_sent == 20
+  assert 1 < peak <= 3
+
+
+def test_dispatcher_retries_rate_limits_then_gives_up() -> None:
+  calls = 0
+
+  def flaky(texts: list[str]) -> list[list[float]]:
+    nonlocal calls
+    calls += 1
+    if calls < 3:
+      raise RateLimited()
+    return [[1.0] for _ in texts]
+
+  sleeps: list[float] = []
+  dispatcher = EmbeddingDispatcher(flaky, sleep=sleeps.append)
+  assert dispatcher(["a", "b"]) == [[1.0], [1.0]]
+  assert dispatcher.retries == 2
+  assert len(sleeps) == 2
+
+  def always_limited(texts: list[str]) -> list[list[float]]:
+    raise RateLimited()
+
+  with pytest.raises(RateLimited):
+    EmbeddingDispatcher(always_limited, max_attempts=2, sleep=lambda s: None)(["a"])
+
+  def broken(texts: list[str]) -> list[list[float]]:
+    raise ValueError("bad input")
+
+  with pytest.raises(ValueError):
+    EmbeddingDispatcher(broken, sleep=sleeps.append)(["a"])
+  assert len(sleeps) == 2
+
+
+def test_hashing_embedder_is_deterministic_and_normalized() -> None:
+  embedder = HashingEmbedder(dim=256)
+  texts = [
+      "Pinecone raises funding for its vector database",
+      "Vector database startup Pinecone raises new funding",
+      "Robot arm learns to fold laundry",
+  ]
+  vectors = embedder.embed_array(texts)
+
+  assert vectors.shape == (3, 256)
+  assert vectors.tolist() == HashingEmbedder(dim=256).embed_array(texts).tolist()
+  assert [round(float(v @ v), 5) for v in vectors] == [1.0, 1.0, 1.0]
+  assert vectors[0] @ vectors[1] > 0.5 > vectors[0] @ vectors[2]
+  # Batch composition does not change a document's vector.
+  assert embedder([texts[2]]) == embedder(texts)[2:]
+
+
+def test_create_embedding_fn_selects_backend() -> None:
+  hashing = create_embedding_fn("hashing", hashing_dim=64)
+  assert hashing.model_id == "hashing-ngram345-64"
+  assert len(hashing(["a b c"])[0]) == 64
+
+  local = create_embedding_fn("local", hashing_dim=64)
+  expected = "sentence-transformers:" if sentence_transformers_available() else "hashing-"
+  assert local.model_id.startswith(expected)
+
+  assert create_embedding_fn("openai", model="text-embedding-3-large").model_id == "text-embedding-3-large"
+  with pytest.raises(ValueError):
+    create_embedding_fn("word2vec")
+
+
+def test_collection_name_per_embedding_model() -> None:
+  assert collection_name_for_model("text-embedding-3-small") == COLLECTION_NAME
+  assert collection_name_for_model("hashing-ngram345-512") == "alert_items__hashing-ngram345-512"
+  assert collection_name_for_model("sentence-transformers:all-MiniLM-L6-v2") == (
+      "alert_items__sentence-transformers-all-MiniLM-L6-v2")
@@ -0,0 +1,119 @@
+import base64
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+from requests.adapters import BaseAdapter
+
+from alert_historian.sync.findfirst_client import FindFirstClient
+
+
+@dataclass
+class FakeSettings:
+  findfirst_base_url: str = "http://findfirst.test"
+  findfirst_username: str = "jsmith"
+  findfirst_password: str = "test"
+  findfirst_session_path: Path | None = None
+
+
+def make_jwt(exp: float) -> str:
+  def part(obj: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(obj).encode()).decode().rstrip("=")
+  return f"{part({'alg': 'none'})}.{part({'exp': int(exp)})}.sig"
+
+
+class StubAdapter(BaseAdapter):
+  """Answers signin by issuing a fresh cookie and rejects API calls whose cookie is in `expired`."""
+
+  def __init__(self, jar):
+    super().__init__()
+    self.jar = jar
+    self.calls: list[str] = []
+    self.expired: set[str] = set()
+
+  def send(self, request, **kwargs):
+    path = request.path_url
+    self.calls.append(path)
+    resp = requests.Response()
+    resp.request = request
+    resp.url = request.url
+    if path == "/user/signin":
+      resp.status_code = 200
+      self.jar.set("findfirst", make_jwt(time.time() + 3600))
+      resp._content = b'{"refreshToken": "r"}'
+    elif any(token in (request.headers.get("Cookie") or "") for token in self.expired):
+      resp.status_code = 401
+      resp._content = b""
+    else:
+      resp.status_code = 200
+      resp._content = b"[]"
+    return resp
+
+  def close(self):
+    pass
+
+
+def make_client(session_path: Path | None) -> tuple[FindFirstClient, StubAdapter]:
+  client = FindFirstClient(FakeSettings(findfirst_session_path=session_path))
+  adapter = StubAdapter(client.session.cookies)
+  client.session.mount("http://", adapter)
+  return client, adapter
+
+
+def test_ensure_session_reuses_saved_cookie(tmp_path: Path) -> None:
+  session_path = tmp_path / "session.json"
+  first, first_adapter = make_client(session_path)
+  assert first.ensure_session().status_code == 200
+  assert first_adapter.calls == ["/user/signin"]
+  assert session_path.exists()
+
+  second, second_adapter = make_client(session_path)
+  resp = second.ensure_session()
+  assert resp.status_code == 200
+  assert resp.data == {"reused": True}
+  assert second_adapter.calls == []
+
+
+def test_ensure_session_signs_in_when_saved_jwt_expired(tmp_path: Path) -> None:
+  session_path = tmp_path / "session.json"
+  session_path.write_text(json.dumps({
+      "base_url": "http://findfirst.test",
+      "username": "jsmith",
+      "cookies": [{"name": "findfirst", "value": make_jwt(time.time() - 10), "domain": "", "path": "/"}],
+  }), encoding="utf-8")
+  client, adapter = make_client(session_path)
+  assert client.ensure_session().status_code == 200
+  assert adapter.calls == ["/user/signin"]
+
+
+def test_malformed_session_file_is_ignored(tmp_path: Path) -> None:
+  session_path = tmp_path / "session.json"
+  owner = {"base_url": "http://findfirst.test", "username": "jsmith"}
+  for content in (
+      "not json",
+      "[]",
+      json.dumps({**owner, "cookies": {"findfirst": "x"}}),
+      json.dumps({**owner, "cookies": [{"name": "findfirst"}]}),
+      json.dumps({**owner, "cookies": [{"name": "findfirst", "value": "x"}, "stray"]}),
+      json.dumps({**owner, "cookies": [{"name": "findfirst", "value": "x", "path": None}]}),
+  ):
+    session_path.write_text(content, encoding="utf-8")
+    client, adapter = make_client(session_path)
+    assert client.load_session() is False
+    assert not client.session.cookies
+    # Sync still starts: it signs in afresh.
+    assert client.ensure_session().status_code == 200
+    assert adapter.calls == ["/user/signin"]
+
+
+def test_request_reauthenticates_once_on_401(tmp_path: Path) -> None:
+  client, adapter = make_client(tmp_path / "session.json")
+  stale = make_jwt(time.time() + 3600) + "stale"
+  client.session.cookies.set("findfirst", stale)
+  adapter.expired.add(stale)
+
+  resp = client.list_tags()
+  assert resp.status_code == 200
+  assert adapter.calls == ["/api/tags", "/user/signin", "/api/tags"]
@@ -0,0 +1,181 @@
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from alert_historian.narrative.flat_index import FlatVectorStore, where_to_sql
+from alert_historian.narrative.local_embeddings import HashingEmbedder
+from alert_historian.state.store import PendingSyncItem
+
+
+def _item(key: str, topic: str, title: str, day: str = "2026-02-26") -> PendingSyncItem:
+  return PendingSyncItem(
+      item_key=key,
+      message_key="msg1",
+      topic=topic,
+      day=day,
+      url=f"https://example.com/{key}",
+      url_normalized=f"https://example.com/{key}",
+      title=title,
+      snippet="",
+      source_domain="example.com",
+      source_message_id="<m1>",
+  )
+
+
+ITEMS = [
+    _item("k1", "vector databases", "Pinecone raises funding for vector database", day="2026-02-20"),
+    _item("k2", "robotics", "Robot arm learns to fold laundry", day="2026-02-21"),
+    _item("k3", "vector databases", "Qdrant adds quantization to its vector database", day="2026-02-22"),
+    _item("k4", "robotics", "Warehouse robots get new vector database for maps", day="2026-02-23"),
+]
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_flat_index_query_filter_and_reopen(tmp_path: Path, dtype: str) -> None:
+  embedder = HashingEmbedder(dim=128)
+  store = FlatVectorStore(tmp_path / "flat", embedder, dtype=dtype)
+  assert store.query("anything") == []
+  assert store.upsert_items(ITEMS) == 4
+
+  results = store.query("vector database funding", n_results=4)
+  assert results[0]["id"] == "k1"
+  assert results[0]["metadata"]["topic"] == "vector databases"
+  assert results[0]["document"] == "Pinecone raises funding for vector database"
+  assert [r["distance"] for r in results] == sorted(r["distance"] for r in results)
+
+  robotics = store.query("vector database", n_results=5, where={"topic": "robotics"})
+  assert [r["id"] for r in robotics] == ["k4", "k2"]
+  recent = store.query("vector database", where={"$and": [{"topic": "vector databases"}, {"day": {"$gte": "2026-02-21"}}]})
+  assert [r["id"] for r in recent] == ["k3"]
+  assert store.query("vector database", where={"topic": {"$in": []}}) == []
+  store.close()
+
+  # Re-upserting an id replaces its row; nothing is duplicated across reopen.
+  reopened = FlatVectorStore(tmp_path / "flat", embedder, dtype=dtype)
+  reopened.upsert_items([_item("k2", "robotics", "Pinecone raises funding for vector database")])
+  assert reopened.count == 4
+  top = reopened.query("vector database funding", n_results=2)
+  assert {r["id"] for r in top} == {"k1", "k2"}
+  reopened.close()
+
+
+def test_flat_index_query_many_filters_each_topic(tmp_path: Path) -> None:
+  store = FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=128))
+  store.upsert_items(ITEMS)
+  grouped = store.query_many(
+      {"robotics": "vector database maps", "vector databases": "vector database funding"},
+      n_results=1,
+      exclude_ids={"k1"},
+  )
+  assert [r["id"] for r in grouped["robotics"]] == ["k4"]
+  assert [r["id"] for r in grouped["vector databases"]] == ["k3"]
+  unfiltered = store.query_many({"any": "laundry robot"}, n_results=1, filter_by_topic=False)
+  assert [r["id"] for r in unfiltered["any"]] == ["k2"]
+  store.close()
+
+
+def test_query_many_fetches_past_exclusions_only_where_needed(tmp_path: Path) -> None:
+  store = FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=128))
+  today = [_item(f"t{i}", "robotics", f"Robot arm folds laundry, take {i}") for i in range(40)]
+  store.upsert_items(ITEMS + today)
+  fetched: list[tuple[str, int]] = []
+  query_group = store._query_group
+  store._query_group = lambda embeddings, n, where: fetched.append((where["topic"], n)) or query_group(embeddings, n, where)
+
+  grouped = store.query_many(
+      {"robotics": "robot arm folds laundry", "vector databases": "vector database funding"},
+      n_results=2,
+      exclude_ids={item.item_key for item in today},
+  )
+  assert sorted(r["id"] for r in grouped["robotics"]) == ["k2", "k4"]
+  assert [r["id"] for r in grouped["vector databases"]] == ["k1", "k3"]
+  # Only the topic that lost its results to the exclusion is asked again, with a growing page.
+  assert [n for topic, n in fetched if topic == "vector databases"] == [4]
+  assert [n for topic, n in fetched if topic == "robotics"] == [4, 8, 16, 32, 42]
+  store.close()
+
+
+def test_flat_index_scores_match_float32_cosine(tmp_path: Path) -> None:
+  rng = np.random.default_rng(0)
+  vectors = rng.normal(size=(300, 64)).astype(np.float32)
+  store = FlatVectorStore(tmp_path / "flat", lambda texts: [])
+  store._upsert([f"id{i}" for i in range(300)], vectors.tolist(), [{"topic": "t"}] * 300, [""] * 300)
+
+  query = rng.normal(size=64).astype(np.float32)
+  exact = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)) @ (query / np.linalg.norm(query))
+  results = store.query_embedding(query.tolist(), n_results=10)
+
+  assert [r["id"] for r in results[:3]] == [f"id{i}" for i in np.argsort(-exact)[:3]]
+  for r in results:
+    assert abs((1.0 - r["distance"]) - exact[int(r["id"][2:])]) < 0.02
+  store.close()
+
+
+def test_flat_index_rejects_mismatched_settings(tmp_path: Path) -> None:
+  store = FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=32))
+  store.upsert_items(ITEMS[:1])
+  store.close()
+
+  with pytest.raises(ValueError):
+    FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=32), dtype="float16")
+  wrong_dim = FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=16))
+  with pytest.raises(ValueError):
+    wrong_dim.upsert_items(ITEMS[1:2])
+  wrong_dim.close()
+
+
+def test_flat_index_drops_vectors_from_interrupted_upsert(tmp_path: Path) -> None:
+  store = FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=32))
+  store.upsert_items(ITEMS[:2])
+  store.close()
+  vectors_path = tmp_path / "flat" / "alert_items" / "vectors.bin"
+  with vectors_path.open("ab") as fh:
+    fh.write(b"\x01" * 32)
+
+  reopened = FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=32))
+  assert vectors_path.stat().st_size == 2 * 32
+  reopened.upsert_items(ITEMS[2:3])
+  assert reopened.query(ITEMS[2].title, n_results=1)[0]["id"] == "k3"
+  reopened.close()
+
+
+def test_flat_index_day_window_and_recency_rerank(tmp_path: Path) -> None:
+  store = FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=128))
+  store.upsert_items([
+      _item("old", "robotics", "Robot arm learns to fold laundry", day="2024-03-01"),
+      _item("recent", "robotics", "Robot arm learns to fold towels", day="2026-02-20"),
+      _item("other", "vector databases", "Robot arm learns to fold laundry", day="2026-02-21"),
+  ])
+  query = {"robotics": "Robot arm learns to fold laundry"}
+
+  assert [r["id"] for r in store.query_many(query, n_results=2)["robotics"]] == ["old", "recent"]
+  windowed = store.query_many(query, n_results=2, start_day="2026-01-01", end_day="2026-02-28")
+  assert [r["id"] for r in windowed["robotics"]] == ["recent"]
+  reranked = store.query_many(query, n_results=2, recency_half_life_days=30, today=date(2026, 2, 26))
+  assert [r["id"] for r in reranked["robotics"]] == ["recent", "old"]
+  assert reranked["robotics"][0]["score"] > reranked["robotics"][1]["score"]
+  store.close()
+
+
+def test_flat_index_backfills_day_numbers_on_open(tmp_path: Path) -> None:
+  store = FlatVectorStore(tmp_path / "flat", lambda texts: [])
+  store._upsert(["a", "b"], [[1.0, 0.0], [0.0, 1.0]], [{"topic": "t", "day": "2026-02-20"}, {"topic": "t"}], ["", ""])
+  store.close()
+
+  reopened = FlatVectorStore(tmp_path / "flat", lambda texts: [])
+  hits = reopened.query_embedding([1.0, 0.0], n_results=2, where={"day_num": {"$gte": 20260101}})
+  assert [(r["id"], r["metadata"]["day_num"]) for r in hits] == [("a", 20260220)]
+  assert reopened.query_embedding([0.0, 1.0], n_results=2, where={"day_num": 0})[0]["id"] == "b"
+  reopened.close()
+
+
+def test_where_to_sql_rejects_unknown_operators_and_keys() -> None:
+  sql, params = where_to_sql({"$or": [{"topic": "a"}, {"topic": {"$ne": "b"}}]})
+  assert sql == "(json_extract(metadata_json, '$.topic') = ? OR json_extract(metadata_json, '$.topic') != ?)"
+  assert params == ["a", "b"]
+  with pytest.raises(ValueError):
+    where_to_sql({"topic": {"$regex": "a"}})
+  with pytest.raises(ValueError):
+    where_to_sql({"topic') OR 1=1 --": "a"})
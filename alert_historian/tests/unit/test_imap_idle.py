@@ -0,0 +1,65 @@
+import imaplib
+import socket
+import threading
+
+import pytest
+
+from alert_historian.ingestion import imap_adapter
+from alert_historian.ingestion.imap_adapter import ImapMailbox
+
+
+class FakeImapClient:
+  """The parts of imaplib.IMAP4 that IDLE uses, over one end of a socket pair."""
+
+  capabilities = ("IMAP4REV1", "IDLE")
+
+  def __init__(self, sock: socket.socket):
+    self.sock = sock
+    self.tagged_commands: dict[bytes, object] = {}
+
+  def _new_tag(self) -> bytes:
+    self.tagged_commands[b"A001"] = None
+    return b"A001"
+
+  def send(self, data: bytes) -> None:
+    self.sock.sendall(data)
+
+
+@pytest.fixture
+def idle_pair():
+  client_sock, server_sock = socket.socketpair()
+  yield ImapMailbox(None, FakeImapClient(client_sock)), server_sock
+  client_sock.close()
+  server_sock.close()
+
+
+def test_idle_returns_when_new_mail_is_announced(idle_pair) -> None:
+  mailbox, server = idle_pair
+  server.sendall(b"+ idling\r\n* 1 RECENT\r\n* 12 EXISTS\r\nA001 OK IDLE terminated\r\n")
+
+  assert mailbox.supports_idle
+  assert mailbox.idle(timeout=5) is True
+  assert server.recv(100) == b"A001 IDLE\r\nDONE\r\n"
+  assert mailbox.client.tagged_commands == {}
+
+
+def test_idle_times_out_or_stops_without_new_mail(idle_pair, monkeypatch) -> None:
+  monkeypatch.setattr(imap_adapter, "IDLE_POLL_SECONDS", 0.05)
+  mailbox, server = idle_pair
+  server.sendall(b"+ idling\r\n")
+  responder = threading.Timer(0.1, lambda: server.sendall(b"A001 OK IDLE terminated\r\n"))
+  responder.start()
+  assert mailbox.idle(timeout=0.05) is False
+  responder.join()
+
+  stop = threading.Event()
+  stop.set()
+  server.sendall(b"+ idling\r\nA001 OK IDLE terminated\r\n")
+  assert mailbox.idle(timeout=60, stop=stop) is False
+
+
+def test_idle_surfaces_a_dropped_connection(idle_pair) -> None:
+  mailbox, server = idle_pair
+  server.sendall(b"+ idling\r\n* BYE autologout\r\n")
+  with pytest.raises(imaplib.IMAP4.abort):
+    mailbox.idle(timeout=5)
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from alert_historian.narrative.llm_cache import LLMResponseCache, cached_llm_client, prompt_key
+
+
+def _counting_llm(calls: list[tuple[str, str | None]]):
+  def llm(user: str, system: str | None) -> str:
+    calls.append((user, system))
+    return f"answer {len(calls)}"
+
+  return llm
+
+
+def test_repeated_prompt_is_served_from_cache_across_reopen(tmp_path: Path) -> None:
+  calls: list[tuple[str, str | None]] = []
+  cache = LLMResponseCache(tmp_path / "llm.db")
+  client = cached_llm_client(_counting_llm(calls), cache, "gpt-4o-mini")
+
+  assert client("prompt", "system") == "answer 1"
+  assert client("prompt", "system") == "answer 1"
+  assert client("prompt", "other system") == "answer 2"
+  assert cached_llm_client(_counting_llm(calls), cache, "gpt-4o")("prompt", "system") == "answer 3"
+  assert (cache.hits, cache.misses) == (1, 3)
+  cache.close()
+
+  reopened = LLMResponseCache(tmp_path / "llm.db")
+  assert cached_llm_client(_counting_llm(calls), reopened, "gpt-4o-mini")("prompt", "system") == "answer 1"
+  assert len(calls) == 3
+  reopened.close()
+
+
+def test_bypass_calls_llm_and_refreshes_entry(tmp_path: Path) -> None:
+  calls: list[tuple[str, str | None]] = []
+  cache = LLMResponseCache(tmp_path / "llm.db")
+  cached_llm_client(_counting_llm(calls), cache, "m")("prompt", None)
+
+  assert cached_llm_client(_counting_llm(calls), cache, "m", bypass=True)("prompt", None) == "answer 2"
+  assert cached_llm_client(_counting_llm(calls), cache, "m")("prompt", None) == "answer 2"
+  assert len(calls) == 2
+  cache.close()
+
+
+def test_least_recently_used_entries_are_evicted_past_size_cap(tmp_path: Path) -> None:
+  cache = LLMResponseCache(tmp_path / "llm.db", max_bytes=25)
+  cache.put("a", "m", "x" * 10)
+  cache.put("b", "m", "y" * 10)
+  assert cache.get("a") == "x" * 10
+  cache.put("c", "m", "z" * 10)
+
+  assert cache.get("b") is None
+  assert cache.get("a") == "x" * 10 and cache.get("c") == "z" * 10
+  assert cache.total_bytes() == 20
+  cache.close()
+
+
+def test_prompt_key_separates_parts() -> None:
+  assert prompt_key("m", "ab", "c") != prompt_key("m", "a", "bc")
+  assert prompt_key("m", None, "u") != prompt_key("m", "", "u")
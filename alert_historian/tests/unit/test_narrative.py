@@ -1,12 +1,22 @@
 """Unit tests for narrative module: vector store, chronicle, delta, daily report."""
 
+import threading
+import time
 from pathlib import Path
 
 import pytest
 
 from alert_historian.narrative.chronicle import load_chronicle, update_chronicle
-from alert_historian.narrative.delta import generate_delta
-from alert_historian.narrative.vector_store import AlertVectorStore
+from alert_historian.narrative.delta import generate_delta, generate_topic_deltas
+from alert_historian.narrative.embedding_cache import EmbeddingCache
+from alert_historian.narrative.local_embeddings import HashingEmbedder
+from alert_historian.narrative.vector_store import (
+    COLLECTION_NAME,
+    DAY_BACKFILL_FLAG,
+    AlertVectorStore,
+    build_topic_queries,
+    collection_name_for_model,
+)
 from alert_historian.reporting.daily_report import build_daily_report
 from alert_historian.state.store import PendingSyncItem, StateStore
 
@@ -55,12 +65,121 @@ def test_vector_store_upsert_and_query(tmp_path: Path) -> None:
   assert results[0]["metadata"].get("topic") in ("vector databases", "AI")
 
 
+def test_vector_store_day_window_and_backfill(tmp_path: Path) -> None:
+  """Chroma filters on the integer day; items stored without it are backfilled on the first open only."""
+  import chromadb
+
+  legacy = chromadb.PersistentClient(path=str(tmp_path / "chroma")).get_or_create_collection(
+      COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+  legacy.upsert(ids=["legacy"], embeddings=[[1.0, 0.5]], metadatas=[{"topic": "vector databases", "day": "2026-02-01"}])
+
+  store = AlertVectorStore(tmp_path / "chroma", embedding_fn=lambda texts: [[1.0, 0.5]] * len(texts))
+  store.upsert_items([_make_item(item_key="k1", day="2025-06-01"), _make_item(item_key="k2", day="2026-02-20")])
+  results = store.query_many({"vector databases": "q"}, n_results=5, start_day="2026-01-01")
+  assert sorted(r["id"] for r in results["vector databases"]) == ["k2", "legacy"]
+  assert store.query_many({"AI": "q"}, start_day="2026-01-01") == {"AI": []}
+  assert store._collection.metadata[DAY_BACKFILL_FLAG] is True
+
+  # Once flagged, opening does not scan the collection again.
+  store._collection.upsert(ids=["late"], embeddings=[[1.0, 0.5]], metadatas=[{"day": "2026-02-02"}])
+  reopened = AlertVectorStore(tmp_path / "chroma", embedding_fn=lambda texts: [[1.0, 0.5]] * len(texts))
+  assert "day_num" not in reopened._collection.get(ids=["late"])["metadatas"][0]
+  # Recording the flag kept the cosine space (a scaled copy of a stored vector is at distance 0).
+  assert reopened.query_embedding([2.0, 1.0], n_results=1)[0]["distance"] < 1e-6
+
+
 def test_vector_store_empty_upsert(tmp_path: Path) -> None:
   """Empty upsert returns 0."""
   store = AlertVectorStore(tmp_path / "chroma", embedding_fn=lambda t: [[]] * len(t))
   assert store.upsert_items([]) == 0
 
 
+def test_vector_store_embedding_cache_skips_known_text(tmp_path: Path) -> None:
+  """Re-upserting unchanged items reuses cached embeddings instead of re-embedding."""
+  embedded: list[list[str]] = []
+
+  def mock_embed(texts: list[str]) -> list[list[float]]:
+    embedded.append(list(texts))
+    return [[0.25 * (i + 1)] * 4 for i in range(len(texts))]
+
+  cache = EmbeddingCache(tmp_path / "embedding_cache.db")
+  try:
+    store = AlertVectorStore(tmp_path / "chroma", embedding_fn=mock_embed, embedding_cache=cache)
+    items = [_make_item(item_key="k1"), _make_item(item_key="k2", title="Other title")]
+    store.upsert_items(items)
+    store.upsert_items(items + [_make_item(item_key="k3", title="Other title")])
+  finally:
+    cache.close()
+
+  assert embedded == [["Test Title\nTest snippet about vectors", "Other title\nTest snippet about vectors"]]
+  assert store.cache_hits == 3
+  assert store.cache_misses == 2
+
+  reopened = EmbeddingCache(tmp_path / "embedding_cache.db")
+  try:
+    got = reopened.get_many("text-embedding-3-small", ["Test Title\nTest snippet about vectors", "missing"])
+  finally:
+    reopened.close()
+  assert got == [[0.25] * 4, None]
+
+
+def test_vector_store_with_offline_hashing_backend(tmp_path: Path) -> None:
+  """The hashing backend needs no network and ranks related text first."""
+  embedder = HashingEmbedder()
+  store = AlertVectorStore(
+      tmp_path / "chroma",
+      embedding_fn=embedder,
+      embedding_model=embedder.model_id,
+      collection_name=collection_name_for_model(embedder.model_id),
+  )
+  store.upsert_items([
+      _make_item(item_key="k1", title="Pinecone raises funding for vector database", snippet=""),
+      _make_item(item_key="k2", topic="robotics", title="Robot arm learns to fold laundry", snippet=""),
+  ])
+
+  results = store.query("vector database funding round", n_results=2)
+  assert [r["id"] for r in results] == ["k1", "k2"]
+
+
+def test_vector_store_query_many_groups_per_topic(tmp_path: Path) -> None:
+  """query_many embeds all topic queries in one call and filters each to its topic."""
+  embedder = HashingEmbedder()
+  calls: list[int] = []
+
+  def counting_embed(texts: list[str]) -> list[list[float]]:
+    calls.append(len(texts))
+    return embedder(texts)
+
+  store = AlertVectorStore(tmp_path / "chroma", embedding_fn=counting_embed)
+  past = [
+      _make_item(item_key="p1", title="Pinecone raises funding for vector database", snippet=""),
+      _make_item(item_key="p2", title="Qdrant ships vector quantization", snippet=""),
+      _make_item(item_key="p3", topic="robotics", title="Robot arm learns to fold laundry", snippet=""),
+  ]
+  today = [
+      _make_item(item_key="t1", title="Pinecone funding round closes", snippet=""),
+      _make_item(item_key="t2", topic="robotics", title="Laundry folding robot ships", snippet=""),
+  ]
+  store.upsert_items(past + today)
+  calls.clear()
+
+  queries = build_topic_queries(today)
+  assert set(queries) == {"vector databases", "robotics"}
+  grouped = store.query_many(queries, n_results=2, exclude_ids={"t1", "t2"})
+
+  assert calls == [2]
+  assert [r["id"] for r in grouped["vector databases"]] == ["p1", "p2"]
+  assert [r["id"] for r in grouped["robotics"]] == ["p3"]
+
+
+def test_build_topic_queries_is_bounded() -> None:
+  items = [_make_item(item_key=f"k{i}", title=f"Headline number {i} " + "x" * 300) for i in range(20)]
+  queries = build_topic_queries(items, per_topic=3, max_chars=200)
+  assert list(queries) == ["vector databases"]
+  assert len(queries["vector databases"]) == 200
+  assert "Headline number 3" not in queries["vector databases"]
+
+
 def test_load_chronicle_empty(tmp_path: Path) -> None:
   """load_chronicle returns template when file does not exist."""
   content = load_chronicle(tmp_path / "nonexistent.md")
@@ -110,6 +229,85 @@ def test_generate_delta_with_items() -> None:
   assert "vector databases" in result
 
 
+def test_generate_delta_with_grouped_context() -> None:
+  """Per-topic past context is rendered under each topic."""
+  seen: list[str] = []
+
+  def mock_llm(user: str, system: str | None) -> str:
+    seen.append(user)
+    return "## vector databases\n\nLink."
+
+  past = {
+      "vector databases": [{"metadata": {"topic": "vector databases", "day": "2026-02-20", "title": "Earlier news"}}],
+      "robotics": [],
+  }
+  generate_delta([_make_item()], past, "", mock_llm)
+  assert "vector databases:\n- [2026-02-20] vector databases: Earlier news" in seen[0]
+  assert "robotics:\n(none)" in seen[0]
+
+
+def test_generate_topic_deltas_runs_topics_concurrently_in_sorted_order(caplog) -> None:
+  """Each topic gets its own call with only its past items and Chronicle section."""
+  prompts: dict[str, str] = {}
+  lock = threading.Lock()
+  chronicle = "# Alert Chronicle\n\n## robotics\n\n- 2026-02-01: Laundry robots.\n\n## vector databases\n\n- 2026-02-10: Pinecone round."
+
+  def mock_llm(user: str, system: str | None) -> str:
+    assert "no ## topic heading" in (system or "")
+    topic = user.split("Topic: ", 1)[1].split("\n", 1)[0]
+    with lock:
+      prompts[topic] = user
+    time.sleep(0.2)
+    if topic == "AI agents":
+      raise RuntimeError("rate limited")
+    return f"## {topic}\n\n- Link for {topic}."
+
+  items = [
+      _make_item("k1", topic="vector databases", title="Qdrant quantization"),
+      _make_item("k2", topic="robotics", title="Robot arm"),
+      _make_item("k3", topic="AI agents", title="Agent framework"),
+  ]
+  past = {"vector databases": [{"metadata": {"topic": "vector databases", "day": "2026-02-20", "title": "Earlier news"}}]}
+  started = time.perf_counter()
+  summaries = {"robotics": ["- [week 2026-W08] Robot pilots scaled up."]}
+  result = generate_topic_deltas(
+      items, past, chronicle, mock_llm, date_str="2026-02-26", max_workers=3, summaries=summaries)
+
+  assert time.perf_counter() - started < 0.5
+  assert result == (
+      "## AI agents\n\n- _(story link unavailable)_\n\n"
+      "## robotics\n\n- Link for robotics.\n\n"
+      "## vector databases\n\n- Link for vector databases."
+  )
+  # The error itself is logged, not written into the report.
+  assert "'AI agents' failed" in caplog.text and "rate limited" in caplog.text
+  assert "Earlier news" in prompts["vector databases"] and "Earlier news" not in prompts["robotics"]
+  assert "Pinecone round" in prompts["vector databases"] and "Pinecone" not in prompts["robotics"]
+  assert "Robot pilots scaled up" in prompts["robotics"] and "Robot pilots" not in prompts["vector databases"]
+  assert generate_topic_deltas([], {}, "", mock_llm) == ""
+
+
+def test_delta_prompts_show_only_recent_chronicle_entries() -> None:
+  """Older Chronicle history reaches Delta prompts only through the rollup pyramid."""
+  prompts: list[str] = []
+
+  def mock_llm(user: str, system: str | None) -> str:
+    prompts.append(user)
+    return "- Link."
+
+  section = "\n".join(f"- 2025-12-{day:02d}: Robotics entry {day}." for day in range(1, 21))
+  chronicle = f"# Alert Chronicle\n\n## robotics\n\n{section}"
+  summaries = {"robotics": ["- [month 2025-12] Robotics entries piled up."]}
+  items = [_make_item("k1", topic="robotics", title="Robot arm")]
+  generate_topic_deltas(items, {}, chronicle, mock_llm, date_str="2026-02-26", summaries=summaries)
+  generate_delta(items, [], chronicle, mock_llm, date_str="2026-02-26", summaries=summaries)
+
+  for prompt in prompts:
+    assert "Robotics entries piled up." in prompt
+    assert "Robotics entry 20." in prompt and "Robotics entry 16." in prompt
+    assert "Robotics entry 15." not in prompt
+
+
 def test_build_daily_report_without_narrative(tmp_path: Path) -> None:
   """Report without narrative_delta has no Narrative Delta section."""
   db_path = tmp_path / "state.db"
@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from alert_historian.narrative.flat_index import FlatVectorStore
+from alert_historian.narrative.local_embeddings import HashingEmbedder
+from alert_historian.narrative.novelty import classify_distance, score_novelty
+from alert_historian.reporting.daily_report import build_daily_report
+from alert_historian.state.store import PendingSyncItem, StateStore
+
+
+def _item(key: str, topic: str, title: str, snippet: str = "") -> PendingSyncItem:
+  return PendingSyncItem(
+      item_key=key,
+      message_key="msg1",
+      topic=topic,
+      day="2026-02-26",
+      url=f"https://example.com/{key}",
+      url_normalized=f"https://example.com/{key}",
+      title=title,
+      snippet=snippet,
+      source_domain="example.com",
+      source_message_id="<m1>",
+  )
+
+
+def test_classify_distance_thresholds() -> None:
+  assert classify_distance(None) == "new"
+  assert classify_distance(0.02) == "redundant"
+  assert classify_distance(0.2) == "continuing"
+  assert classify_distance(0.6) == "new"
+  assert classify_distance(0.2, redundant_below=0.25) == "redundant"
+
+
+def test_near_copies_skip_topic_and_new_stories_do_not(tmp_path: Path) -> None:
+  store = FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=256))
+  store.upsert_items([
+      _item("old1", "robotics", "Robot arm learns to fold laundry at home"),
+      _item("old2", "vector databases", "Pinecone raises funding for its vector database"),
+  ])
+  today = [
+      # Same story republished under a new URL, and an item that is already stored.
+      _item("new1", "robotics", "Robot arm learns to fold laundry at home"),
+      _item("old1", "robotics", "Robot arm learns to fold laundry at home"),
+      _item("new2", "vector databases", "Qdrant ships binary quantization for billion-scale search"),
+      _item("new3", "AI agents", "Agents coordinate over shared memory"),
+  ]
+
+  nearest = store.nearest_distances(today)
+  assert nearest["new3"] is None
+  assert nearest["new1"] < 0.01
+  report = score_novelty(today, nearest)
+  store.close()
+
+  assert report.item_labels == {"new1": "redundant", "old1": "new", "new2": "new", "new3": "new"}
+  assert report.skipped_topics == []
+  assert report.topics["robotics"].counts == {"new": 1, "continuing": 0, "redundant": 1}
+
+  gated = score_novelty(today[:1] + today[2:], nearest)
+  assert gated.skipped_topics == ["robotics"]
+  assert [i.item_key for i in gated.filter_items(today)] == ["new2", "new3"]
+  assert "- robotics: 0 new, 0 continuing, 1 redundant; skipped (nothing new)" in gated.markdown()
+
+
+def test_daily_report_shows_novelty_decisions(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  try:
+    path = build_daily_report(
+        store, tmp_path / "reports", "run1", 0, {},
+        novelty_summary="- robotics: 0 new, 0 continuing, 2 redundant; skipped (nothing new)",
+    )
+    content = path.read_text(encoding="utf-8")
+    assert "## Novelty" in content and "skipped (nothing new)" in content
+  finally:
+    store.close()
@@ -0,0 +1,108 @@
+from datetime import date
+from pathlib import Path
+
+from alert_historian.narrative.flat_index import FlatVectorStore
+from alert_historian.narrative.local_embeddings import HashingEmbedder
+from alert_historian.narrative.partitions import PartitionedVectorStore, day_bounds, select_representatives
+from alert_historian.narrative.vector_store import create_vector_store, window_where
+from alert_historian.state.store import PendingSyncItem
+
+
+def _item(key: str, topic: str, day: str, title: str) -> PendingSyncItem:
+  return PendingSyncItem(
+      item_key=key,
+      message_key="msg1",
+      topic=topic,
+      day=day,
+      url=f"https://example.com/{key}",
+      url_normalized=f"https://example.com/{key}",
+      title=title,
+      snippet="",
+      source_domain="example.com",
+      source_message_id="<m1>",
+  )
+
+
+def test_day_bounds_follow_window_filters() -> None:
+  assert day_bounds(None) == (None, None)
+  assert day_bounds(window_where("robotics", "2026-01-15", "2026-03-01")) == (20260115, 20260301)
+  assert day_bounds({"$or": [{"day_num": {"$gte": 1}}, {"topic": "x"}]}) == (None, None)
+
+
+def test_existing_collection_is_migrated_and_queries_fan_out_by_window(tmp_path: Path) -> None:
+  embedder = HashingEmbedder(dim=128)
+  legacy = FlatVectorStore(tmp_path / "flat", embedder)
+  legacy.upsert_items([_item("jan", "robotics", "2026-01-10", "Robot arm folds laundry")])
+  legacy.close()
+
+  store = create_vector_store("flat", tmp_path / "flat", embedder, partitioning="month")
+  assert isinstance(store, PartitionedVectorStore)
+  assert not (tmp_path / "flat" / "alert_items").exists()
+  store.upsert_items([
+      _item("feb", "robotics", "2026-02-12", "Robot arm folds laundry again"),
+      _item("mar", "robotics", "2026-03-03", "Robot arm folds laundry faster"),
+  ])
+  assert list(store.partitions) == ["2026_01", "2026_02", "2026_03"]
+
+  everything = store.query_many({"robotics": "Robot arm folds laundry"}, n_results=5)["robotics"]
+  assert sorted(r["id"] for r in everything) == ["feb", "jan", "mar"]
+  assert [r["distance"] for r in everything] == sorted(r["distance"] for r in everything)
+  windowed = store.query_many({"robotics": "Robot arm folds laundry"}, n_results=5, start_day="2026-02-01")
+  assert sorted(r["id"] for r in windowed["robotics"]) == ["feb", "mar"]
+  store.close()
+
+  reopened = PartitionedVectorStore("flat", tmp_path / "flat", embedder, max_open=1)
+  assert reopened.query("Robot arm", n_results=1, where=window_where(end_day="2026-01-31"))[0]["id"] == "jan"
+  reopened.close()
+
+
+def test_old_partitions_compact_to_representatives(tmp_path: Path) -> None:
+  embedder = HashingEmbedder(dim=256)
+  store = PartitionedVectorStore("flat", tmp_path / "flat", embedder)
+  old = [_item(f"dup{i}", "robotics", "2025-01-05", "Robot arm folds laundry at home") for i in range(5)]
+  old.append(_item("other", "robotics", "2025-01-06", "Quantum chip startup raises seed round"))
+  store.upsert_items(old + [_item("recent", "robotics", "2026-02-01", "Warehouse robots expand")])
+
+  assert store.compact(today=date(2026, 2, 10), keep_months=12, representatives_per_topic=3) == {"2025_01": (6, 2)}
+  assert store.partitions["2025_01"]["compacted"] is True
+  assert store.compact(today=date(2026, 2, 10), keep_months=12) == {}
+
+  rows = store.query("Robot arm folds laundry at home", n_results=10)
+  kept = {r["id"]: r["metadata"].get("represents") for r in rows}
+  assert kept.pop("recent") is None
+  assert sorted(kept.values()) == [1, 5] and "other" in kept
+  store.close()
+
+
+def test_select_representatives_keeps_one_per_duplicate_group() -> None:
+  rows = [
+      {"id": "a1", "document": "", "metadata": {"topic": "t"}, "embedding": [1.0, 0.0]},
+      {"id": "a2", "document": "", "metadata": {"topic": "t"}, "embedding": [0.99, 0.01]},
+      {"id": "b", "document": "", "metadata": {"topic": "t"}, "embedding": [0.0, 1.0]},
+  ]
+  kept = select_representatives(rows, per_topic=2)
+  assert sorted(r["metadata"]["represents"] for r in kept) == [1, 2]
+  assert "b" in {r["id"] for r in kept}
+
+
+def test_topic_queries_open_each_partition_once(tmp_path: Path) -> None:
+  embedder = HashingEmbedder(dim=64)
+  topics = ["robotics", "AI agents", "vector databases", "quantum"]
+  store = PartitionedVectorStore("flat", tmp_path / "flat", embedder)
+  store.upsert_items([
+      _item(f"{topic}-{year}-{month}", topic, f"{year}-{month:02d}-10", f"{topic} story {year}-{month}")
+      for year in (2024, 2025) for month in range(1, 13) for topic in topics
+  ])
+  store.close()
+
+  today = [_item(f"new-{topic}", topic, "2026-01-02", f"{topic} story today") for topic in topics]
+  for start_day, expected_opens in ((None, 24), ("2025-10-01", 3)):
+    reopened = PartitionedVectorStore("flat", tmp_path / "flat", embedder)
+    opened: list[str] = []
+    open_collection = reopened._open_collection
+    reopened._open_collection = lambda name: opened.append(name) or open_collection(name)
+    nearest = reopened.nearest_distances(today, start_day=start_day)
+    reopened.close()
+    # One open per partition in the window, not one per partition and topic.
+    assert len(opened) == expected_opens
+    assert all(distance is not None for distance in nearest.values())
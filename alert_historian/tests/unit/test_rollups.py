@@ -0,0 +1,114 @@
+from datetime import date, datetime
+from pathlib import Path
+
+from alert_historian.ingestion.schema import CanonicalAlertItem, CanonicalAlertPayload, RawRef
+from alert_historian.narrative.flat_index import FlatVectorStore
+from alert_historian.narrative.local_embeddings import HashingEmbedder
+from alert_historian.narrative.rollups import build_rollups, iso_week, month_bounds, summary_pyramid, upsert_rollups
+from alert_historian.state.store import StateStore
+
+
+def _payload(message_id: str, topic: str, received_at: datetime, title: str) -> CanonicalAlertPayload:
+  return CanonicalAlertPayload(
+      source="google_alerts_export",
+      source_account="test@example.com",
+      source_message_id=message_id,
+      received_at=received_at,
+      alert_topic=topic,
+      items=[
+          CanonicalAlertItem(
+              item_id=message_id,
+              url=f"https://example.com/{message_id}",
+              url_normalized=f"https://example.com/{message_id}",
+              title=title,
+              snippet="",
+              source_domain="example.com",
+          )
+      ],
+      raw_ref=RawRef(store="json_export", path="sample.json"),
+  )
+
+
+def _mock_llm(calls: list[str]):
+  def llm(user: str, system: str | None) -> str:
+    period = user.split("Period: ", 1)[1].split("\n", 1)[0]
+    calls.append(period)
+    return f"Summary of {period}."
+
+  return llm
+
+
+def test_week_and_month_boundaries() -> None:
+  assert iso_week(date(2026, 2, 26)) == ("2026-W09", date(2026, 2, 23), date(2026, 3, 1))
+  # February 2026 owns the ISO weeks whose Thursday falls in February: W06 (Feb 2) to W09 (ends Mar 1).
+  assert month_bounds("2026-02") == (date(2026, 2, 2), date(2026, 3, 1))
+  assert month_bounds("2026-12") == (date(2026, 11, 30), date(2027, 1, 3))
+
+
+def test_only_closed_unsummarized_periods_are_built(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  store.save_payloads([
+      _payload("m1", "robotics", datetime(2026, 2, 3, 9), "Robot arm folds laundry"),
+      _payload("m2", "robotics", datetime(2026, 2, 4, 9), "Warehouse robots expand"),
+      _payload("m3", "robotics", datetime(2026, 3, 4, 9), "Humanoid pilot"),
+      _payload("m4", "robotics", datetime(2026, 3, 10, 9), "Today's robot news"),
+  ])
+  calls: list[str] = []
+
+  result = build_rollups(store, _mock_llm(calls), today=date(2026, 3, 10))
+  # Days before today; W06 and W10 have closed; February (to Mar 1) has closed, March has not.
+  assert result.counts() == {"day": 3, "week": 2, "month": 1}
+  assert not result.failed
+  assert "day 2026-03-10 (2026-03-10 to 2026-03-10)" not in calls
+  [month] = store.get_rollups("month", topic="robotics")
+  assert (month.period, month.source_count) == ("2026-02", 1)
+  assert month.summary == "Summary of month 2026-02 (2026-02-02 to 2026-03-01)."
+
+  calls.clear()
+  assert build_rollups(store, _mock_llm(calls), today=date(2026, 3, 10)).created == []
+  assert calls == []
+
+  pyramid = summary_pyramid(store, "robotics", today=date(2026, 3, 10), sizes={"month": 1, "week": 1, "day": 2})
+  assert [entry.split("]")[0] for entry in pyramid] == [
+      "- [month 2026-02", "- [week 2026-W10", "- [day 2026-02-04", "- [day 2026-03-04"]
+
+  vectors = FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=64), collection_name="alert_items__rollups")
+  assert upsert_rollups(vectors, store.get_rollups("week")) == 2
+  hits = vectors.query("Summary of week 2026-W10", n_results=1, where={"topic": "robotics"})
+  assert hits[0]["id"] == "rollup:week:2026-W10:robotics"
+  assert hits[0]["metadata"]["level"] == "week"
+  vectors.close()
+  store.close()
+
+
+def test_failed_summaries_are_retried_next_run(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  store.save_payloads([_payload("m1", "robotics", datetime(2026, 2, 3, 9), "Robot arm folds laundry")])
+
+  def failing(user: str, system: str | None) -> str:
+    raise RuntimeError("rate limited")
+
+  result = build_rollups(store, failing, today=date(2026, 2, 4))
+  assert result.failed == {"day:2026-02-03:robotics": "rate limited"}
+  assert build_rollups(store, _mock_llm([]), today=date(2026, 2, 4)).counts()["day"] == 1
+  store.close()
+
+
+def test_capped_backfill_waits_for_complete_weeks_and_months(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  # Seven days of ISO week 2026-W06 (Feb 2-8), the first week of February.
+  store.save_payloads([
+      _payload(f"m{day}", "robotics", datetime(2026, 2, day, 9), f"Robot story {day}") for day in range(2, 9)])
+  today = date(2026, 3, 10)
+
+  first = build_rollups(store, _mock_llm([]), today=today, max_periods=3)
+  assert first.counts() == {"day": 3, "week": 0, "month": 0}
+  assert build_rollups(store, _mock_llm([]), today=today, max_periods=3).counts() == {"day": 3, "week": 0, "month": 0}
+
+  last = build_rollups(store, _mock_llm([]), today=today, max_periods=3)
+  assert last.counts() == {"day": 1, "week": 1, "month": 1}
+  [week] = store.get_rollups("week", topic="robotics")
+  [month] = store.get_rollups("month", topic="robotics")
+  assert (week.period, week.source_count) == ("2026-W06", 7)
+  assert (month.period, month.source_count) == ("2026-02", 1)
+  store.close()
@@ -0,0 +1,95 @@
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from alert_historian.ingestion.schema import CanonicalAlertItem, CanonicalAlertPayload, RawRef
+from alert_historian.narrative.flat_index import FlatVectorStore
+from alert_historian.narrative.local_embeddings import HashingEmbedder
+from alert_historian.narrative.search import reciprocal_rank_fusion, search_history
+from alert_historian.state.store import StateStore, fts_query
+
+
+def _payload(message_id: str, topic: str, received_at: datetime, titles: list[str]) -> CanonicalAlertPayload:
+  return CanonicalAlertPayload(
+      source="google_alerts_export",
+      source_account="test@example.com",
+      source_message_id=message_id,
+      received_at=received_at,
+      alert_topic=topic,
+      items=[
+          CanonicalAlertItem(
+              item_id=f"{message_id}-{i}",
+              url=f"https://news{i}.example.com/{message_id}",
+              url_normalized=f"https://news{i}.example.com/{message_id}",
+              title=title,
+              snippet="Coverage of the week in automation.",
+              source_domain=f"news{i}.example.com",
+          )
+          for i, title in enumerate(titles)
+      ],
+      raw_ref=RawRef(store="json_export", path="sample.json"),
+  )
+
+
+def _seed(store: StateStore) -> None:
+  store.save_payloads([
+      _payload("m1", "robotics", datetime(2026, 1, 5, 9), ["Robot arm folds laundry", "Warehouse robots expand"]),
+      _payload("m2", "robotics", datetime(2026, 2, 5, 9), ["Robotic laundry startup raises funding"]),
+      _payload("m3", "AI agents", datetime(2026, 2, 6, 9), ["Agents fold into office suites"]),
+  ])
+
+
+def test_fts_query_quotes_words_and_keeps_prefixes() -> None:
+  assert fts_query('robot "arm" robo*') == '"robot" """arm""" "robo"*'
+  assert fts_query("  ") == ""
+
+
+def test_full_text_search_ranks_and_filters(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  _seed(store)
+
+  hits = store.search_items("laundry")
+  assert {item.title for item, _ in hits} == {"Robot arm folds laundry", "Robotic laundry startup raises funding"}
+  assert hits[0][1] >= hits[1][1] > 0
+  # Porter stemming: "folding" matches "folds" and "fold".
+  assert {item.topic for item, _ in store.search_items("folding")} == {"robotics", "AI agents"}
+  assert [item.title for item, _ in store.search_items("folding", topic="AI agents")] == ["Agents fold into office suites"]
+  assert [item.day for item, _ in store.search_items("laundry", start_day="2026-02-01")] == ["2026-02-05"]
+  assert [item.title for item, _ in store.search_items("news1.example.com")] == ["Warehouse robots expand"]
+  store.close()
+
+
+def test_index_is_built_for_existing_databases(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  _seed(store)
+  store.close()
+  conn = sqlite3.connect(tmp_path / "state.db")
+  conn.execute("DROP TABLE items_fts")
+  conn.commit()
+  conn.close()
+
+  reopened = StateStore(tmp_path / "state.db")
+  assert len(reopened.search_items("laundry")) == 2
+  reopened.close()
+
+
+def test_reciprocal_rank_fusion_rewards_agreement() -> None:
+  fused = reciprocal_rank_fusion({"bm25": ["a", "b", "c"], "vector": ["c", "a", "d"]}, k=60)
+  assert [id_val for id_val, _, _ in fused] == ["a", "c", "b", "d"]
+  assert fused[0][2] == {"bm25": 1, "vector": 2}
+
+
+def test_hybrid_search_adds_semantic_neighbours(tmp_path: Path) -> None:
+  store = StateStore(tmp_path / "state.db")
+  _seed(store)
+  vectors = FlatVectorStore(tmp_path / "flat", HashingEmbedder(dim=256))
+  keys = [row["item_key"] for row in store.conn.execute("SELECT item_key FROM items")]
+  vectors.upsert_items(list(store.items_by_keys(keys).values()))
+
+  hits = search_history(store, "Robot arm folds laundry", vector_store=vectors, limit=3)
+  assert hits[0].item.title == "Robot arm folds laundry"
+  assert hits[0].ranks == {"bm25": 1, "vector": 1}
+  assert all("vector" in hit.ranks for hit in hits)
+  assert len(search_history(store, "laundry", topic="robotics", limit=5)) == 2
+  vectors.close()
+  store.close()